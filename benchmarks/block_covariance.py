@@ -0,0 +1,55 @@
+"""
+Compute the covariance matrix of a global fit to many datasets, in which
+every component shares one parameter and has two of its own. Every component
+only contributes to the block of the Hessian of its own parameters, and the
+Hessian as a whole is block-arrowhead shaped. Time assembling the Hessian,
+and compare inverting it through the Schur complement of the shared
+parameter to inverting it as a dense matrix.
+"""
+from __future__ import print_function
+import time
+
+import numpy as np
+from symfit import variables, parameters, Parameter, Model, Fit, exp
+from symfit.core import fit as fit_module
+
+n_datasets = 60
+n_points = 50
+
+xs = variables(', '.join('x_{}'.format(i) for i in range(n_datasets)))
+ys = variables(', '.join('y_{}'.format(i) for i in range(n_datasets)))
+ks = parameters(', '.join('k_{}'.format(i) for i in range(n_datasets)),
+                value=1.0, min=0)
+cs = parameters(', '.join('c_{}'.format(i) for i in range(n_datasets)),
+                value=0.0)
+amplitude = Parameter('A', value=2.0)
+model = Model({y: amplitude * exp(- k * x) + c
+               for x, y, k, c in zip(xs, ys, ks, cs)})
+
+np.random.seed(0)
+data = {}
+for i, (x, y) in enumerate(zip(xs, ys)):
+    xdata = np.linspace(0, 3, n_points)
+    data[x.name] = xdata
+    data[y.name] = 2.0 * np.exp(- (0.5 + i / n_datasets) * xdata) + 0.1
+    data[y.name] += np.random.normal(0, 0.01, xdata.shape)
+
+
+if __name__ == '__main__':
+    fit = Fit(model, **data)
+    best_fit_params = {param.name: param.value for param in model.params}
+    # Generate the code for the Hessian before timing.
+    hess = fit.objective.eval_hessian(**best_fit_params)
+    print('{} datasets, {} parameters'.format(n_datasets, len(model.params)))
+    blocks = fit_module._parameter_blocks(fit.objective)
+    for name, func in [
+        ('Hessian', lambda: fit.objective.eval_hessian(**best_fit_params)),
+        ('dense inverse', lambda: np.linalg.inv(hess)),
+        ('block inverse',
+         lambda: fit_module._inverse_block_arrowhead(hess, *blocks)),
+    ]:
+        start = time.time()
+        for _ in range(10):
+            func()
+        duration = (time.time() - start) / 10
+        print('{:>14}: {:.1f} ms'.format(name, 1e3 * duration))
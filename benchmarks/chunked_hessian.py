@@ -0,0 +1,48 @@
+"""
+Reduce the Jacobian and Hessian of a model with a million data points to the
+Hessian of the least squares objective. Compare reducing all data points at
+once, which stores the outer product of the Jacobian for every data point, to
+reducing them in chunks. The Gauss-Newton approximation, used to estimate the
+covariance matrix when the Hessian is not available, does not evaluate the
+Hessian of the model at all.
+"""
+from __future__ import print_function
+import time
+import tracemalloc
+
+import numpy as np
+from symfit import variables, parameters, Model, exp, cos
+from symfit.core.objectives import LeastSquares, HessianObjectiveJacApprox
+
+x, y = variables('x, y')
+a, b, c, d, e = parameters('a, b, c, d, e')
+model = Model({y: a * exp(- b * x) * cos(c * x + d) + e})
+n_points = 10 ** 6
+xdata = np.linspace(0, 10, n_points)
+ydata = model(x=xdata, a=2.0, b=0.3, c=1.5, d=0.2, e=0.5).y
+ydata += np.random.normal(0, 0.05, ydata.shape)
+data = {x: xdata, y: ydata, model.sigmas[y]: np.ones_like(ydata)}
+
+
+class GaussNewton(LeastSquares, HessianObjectiveJacApprox):
+    pass
+
+
+if __name__ == '__main__':
+    p = [2.0, 0.3, 1.5, 0.2, 0.5]
+    for objective in [LeastSquares, GaussNewton]:
+        for chunk_size in [n_points, LeastSquares.chunk_size]:
+            obj = objective(model, data=data)
+            obj.chunk_size = chunk_size
+            obj.cache_size = 0
+            # Generate the code for the Hessian before timing.
+            obj.eval_hessian(p)
+            tracemalloc.start()
+            start = time.time()
+            obj.eval_hessian(p)
+            duration = time.time() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print('{:>12}, chunks of {:>7}: {:.0f} ms, peak {:.0f} MB'.format(
+                objective.__name__, chunk_size, 1e3 * duration, peak / 2 ** 20
+            ))
@@ -0,0 +1,42 @@
+"""
+Evaluate a sum of Gaussians and its Jacobian on a large dataset with the
+NumPy, Numba and C backends. With NumPy every operation makes a temporary
+array of the size of the data, whereas the others evaluate everything in a
+single compiled loop over the data, optionally on all cores.
+"""
+from __future__ import print_function
+import time
+
+import numpy as np
+from symfit import variables, Parameter, Model, exp
+from symfit.core.backends import NumPyBackend, NumbaBackend, CBackend
+
+n_peaks = 3
+x, y = variables('x, y')
+amplitudes = [Parameter('a{}'.format(i), value=1.0) for i in range(n_peaks)]
+positions = [Parameter('b{}'.format(i), value=2 * i) for i in range(n_peaks)]
+widths = [Parameter('c{}'.format(i), value=0.5) for i in range(n_peaks)]
+model_dict = {y: sum(a * exp(- (x - b) ** 2 / (2 * c ** 2))
+                     for a, b, c in zip(amplitudes, positions, widths))}
+
+
+if __name__ == '__main__':
+    xdata = np.linspace(-2, 2 * n_peaks, 10 ** 7)
+    values = {p.name: p.value for p in amplitudes + positions + widths}
+
+    for backend in [NumPyBackend(), NumbaBackend(),
+                    NumbaBackend(parallel=True), CBackend(),
+                    CBackend(parallel=True)]:
+        model = Model(model_dict)
+        model.backend = backend
+        # Generate and compile the code before timing.
+        model(x=xdata[:10], **values)
+        model.eval_jacobian(x=xdata[:10], **values)
+        for method in ['__call__', 'eval_jacobian']:
+            start = time.time()
+            getattr(model, method)(x=xdata, **values)
+            duration = time.time() - start
+            print('{:>12} parallel={!s:>5} {:>13}: {:.3f} s'.format(
+                backend.__class__.__name__,
+                getattr(backend, 'parallel', False), method, duration
+            ))
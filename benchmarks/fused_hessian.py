@@ -0,0 +1,42 @@
+"""
+Compare evaluating the components, jacobian and hessian of a model separately
+with evaluating them together using ``eval_fused``, which shares common
+subexpressions between all of them.
+"""
+from __future__ import print_function
+import timeit
+
+import numpy as np
+from symfit import parameters, variables, Model, exp
+
+x, y = variables('x, y')
+a1, b1, c1, a2, b2, c2 = parameters('a1, b1, c1, a2, b2, c2')
+
+gaussian = Model({y: a1 * exp(-(x - b1)**2 / (2 * c1**2))})
+two_peaks = Model({
+    y: a1 * exp(-(x - b1)**2 / (2 * c1**2)) + a2 * exp(-(x - b2)**2 / (2 * c2**2))
+})
+
+xdata = np.linspace(0, 10, 10000)
+values = dict(a1=1.0, b1=3.0, c1=1.0, a2=2.0, b2=6.0, c2=0.5)
+number = 200
+
+for name, model in [('gaussian', gaussian), ('two peaks', two_peaks)]:
+    kwargs = {p.name: values[p.name] for p in model.params}
+
+    def separate():
+        model(x=xdata, **kwargs)
+        model.eval_jacobian(x=xdata, **kwargs)
+        model.eval_hessian(x=xdata, **kwargs)
+
+    def fused():
+        model.eval_fused(x=xdata, **kwargs)
+
+    # Warm up, such that compilation is not timed.
+    separate()
+    fused()
+    t_separate = min(timeit.repeat(separate, number=number, repeat=3)) / number
+    t_fused = min(timeit.repeat(fused, number=number, repeat=3)) / number
+    print('{:>10}: separate {:.3e} s, fused {:.3e} s, speedup {:.2f}x'.format(
+        name, t_separate, t_fused, t_separate / t_fused
+    ))
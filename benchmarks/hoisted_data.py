@@ -0,0 +1,45 @@
+"""
+Fit a Fourier series of fixed frequency to a large dataset. All the
+trigonometric terms then only depend on the data and a fixed parameter, and
+are computed once per fit instead of on every evaluation of the model, its
+Jacobian and its Hessian. Compare fitting with and without room to keep
+them, using BFGS for the many evaluations it needs.
+"""
+from __future__ import print_function
+import time
+
+import numpy as np
+from symfit import parameters, variables, sin, cos, Fit, Model
+from symfit.core.minimizers import BFGS
+from symfit.core.models import HoistedData
+
+n_terms = 8
+n_points = 10 ** 5
+
+x, y = variables('x, y')
+w, = parameters('w', value=1.0, fixed=True)
+a0, = parameters('a0')
+cos_a = parameters(', '.join('a{}'.format(i) for i in range(1, n_terms + 1)))
+sin_b = parameters(', '.join('b{}'.format(i) for i in range(1, n_terms + 1)))
+series = a0 + sum(ai * cos(i * w * x) + bi * sin(i * w * x)
+                  for i, (ai, bi) in enumerate(zip(cos_a, sin_b), start=1))
+model = Model({y: series})
+
+xdata = np.linspace(-np.pi, np.pi, n_points)
+ydata = np.where(xdata > 0, 1.0, 0.0)
+
+
+if __name__ == '__main__':
+    # Generate the code for the Jacobian and Hessian before timing.
+    Fit(model, x=xdata, y=ydata, minimizer=BFGS).execute()
+    for name, max_size in [('computed every time', 0),
+                           ('computed once', HoistedData.max_size)]:
+        fit = Fit(model, x=xdata, y=ydata, minimizer=BFGS)
+        fit.objective.hoisted_data.max_size = max_size
+        start = time.time()
+        fit_result = fit.execute()
+        duration = time.time() - start
+        print('{:>20}: {:.0f} ms, {} iterations, {:.1f} MB hoisted'.format(
+            name, 1e3 * duration, fit_result.iterations,
+            fit.objective.hoisted_data.size / 2 ** 20
+        ))
@@ -0,0 +1,41 @@
+"""
+Fit a polynomial surface of degree 6, which is linear in all its 28
+coefficients. Fit now solves such problems in closed form with
+:class:`~symfit.core.minimizers.LinearLeastSquares`, and never generates the
+Hessian of the model. Compare to the iterative minimizers, including the
+time it takes to generate the code of a new model.
+"""
+from __future__ import print_function
+import time
+
+import numpy as np
+from symfit import variables, Parameter, Fit, Model
+from symfit.core.minimizers import (
+    BFGS, TrustRegionReflective, LinearLeastSquares
+)
+
+degree = 6
+x, y, z = variables('x, y, z')
+coefficients = {}
+for i in range(degree + 1):
+    for j in range(degree + 1 - i):
+        coefficients[i, j] = Parameter('c_{}_{}'.format(i, j), value=0.0)
+model_dict = {z: sum(c * x ** i * y ** j for (i, j), c in coefficients.items())}
+
+
+if __name__ == '__main__':
+    np.random.seed(0)
+    xdata, ydata = np.meshgrid(np.linspace(-1, 1, 200), np.linspace(-1, 1, 200))
+    true_values = {c.name: np.random.normal() for c in coefficients.values()}
+    zdata = Model(model_dict)(x=xdata, y=ydata, **true_values).z
+    zdata += np.random.normal(0, 0.05, zdata.shape)
+
+    for minimizer in [BFGS, TrustRegionReflective, LinearLeastSquares]:
+        start = time.time()
+        fit = Fit(Model(model_dict), x=xdata, y=ydata, z=zdata,
+                  minimizer=minimizer)
+        fit_result = fit.execute()
+        duration = time.time() - start
+        print('{:>21}: {:.2f} s, chi^2 {:.2f}'.format(
+            minimizer.__name__, duration, fit_result.chi_squared
+        ))
@@ -0,0 +1,73 @@
+"""
+Compare MINPACK using the analytic Jacobian of the residuals to MINPACK
+estimating it by forward differences, which costs one evaluation of the
+model per free parameter every time the Jacobian is needed. The parameters
+are bounded, so the Jacobian is chained through the change of variables
+used by leastsqbound.
+
+The number of function evaluations always drops sharply. The wall time only
+improves once the model has enough parameters for the finite differences to
+cost more than evaluating the analytic Jacobian.
+"""
+from __future__ import print_function
+import time
+
+import numpy as np
+from symfit import variables, parameters, Model, exp, cos
+from symfit.core.minimizers import MINPACK
+from symfit.core.objectives import VectorLeastSquares
+
+x, y = variables('x, y')
+xdata = np.linspace(0, 10, 10000)
+
+
+def damped_cosine():
+    a, b, c, d, e = parameters('a, b, c, d, e')
+    a.min, a.max = 0, 10
+    b.min, b.max = 0, 5
+    model = Model({y: a * exp(- b * x) * cos(c * x + d) + e})
+    return model, dict(a=2.0, b=0.3, c=1.5, d=0.2, e=0.5)
+
+
+def gaussians(n_peaks=4):
+    params = parameters(', '.join('a{0}, m{0}, s{0}'.format(i)
+                                  for i in range(n_peaks)))
+    expr = 0
+    true_values = {}
+    for i in range(n_peaks):
+        a, m, s = params[3 * i: 3 * i + 3]
+        a.min, s.min = 0, 0.1
+        expr += a * exp(- (x - m) ** 2 / (2 * s ** 2))
+        true_values.update({a.name: 1.0 + i, m.name: 1.5 + 2 * i,
+                            s.name: 0.5 + 0.1 * i})
+    return Model({y: expr}), true_values
+
+
+if __name__ == '__main__':
+    n_repeats = 10
+    np.random.seed(0)
+    for make_model in [damped_cosine, gaussians]:
+        model, true_values = make_model()
+        ydata = model(x=xdata, **true_values).y
+        ydata += np.random.normal(0, 0.05, ydata.shape)
+        objective = VectorLeastSquares(
+            model,
+            data={x: xdata, y: ydata, model.sigmas[y]: np.ones_like(ydata)}
+        )
+        guess = [1.1 * true_values[p.name] for p in model.params]
+        print('{} ({} parameters)'.format(make_model.__name__,
+                                          len(model.params)))
+        for name, jacobian in [('forward differences', None),
+                               ('analytic', objective.eval_jacobian)]:
+            minimizer = MINPACK(objective, model.params, jacobian=jacobian)
+            # Warm up, such that generating code is not part of the timing.
+            minimizer.execute()
+            start = time.time()
+            for _ in range(n_repeats):
+                minimizer.initial_guesses = guess
+                result = minimizer.execute()
+            duration = (time.time() - start) / n_repeats
+            info = result.minimizer_output['infodic']
+            print('{:>20}: {:.1f} ms, nfev = {}, njev = {}'.format(
+                name, 1e3 * duration, info['nfev'], info.get('njev', 0)
+            ))
@@ -0,0 +1,59 @@
+"""
+Compare the number of right-hand side and jacobian evaluations per second
+the ODE integrator can make, using the model from
+``examples/ode_reaction_multicomponent.py``. Before, every component and every
+element of the jacobian was a separate function, called from a list
+comprehension. Now, both are compiled into a single function returning an
+array, in which common subexpressions are only computed once.
+"""
+from __future__ import print_function
+import timeit
+
+import numpy as np
+from symfit import variables, parameters, D, ODEModel
+from symfit.core.support import sympy_to_py
+
+a, b, c, d, t = variables('a, b, c, d, t')
+k, p, l, m = parameters('k, p, l, m')
+
+a0 = 10
+b = a0 - d + a
+
+model_dict = {
+    D(d, t): l * c * b - m * d,
+    D(c, t): k * a * b - p * c - l * c * b + m * d,
+    D(a, t): - k * a * b + p * c,
+}
+model = ODEModel(model_dict, initial={t: 0.0, a: a0, c: 0.0, d: 0.0})
+
+# The callbacks as they used to be.
+args = model.independent_vars + model.dependent_vars + model.model_params
+components = [sympy_to_py(expr, args) for expr in model.values()]
+jacobian = [[sympy_to_py(sympy_expr, args) for sympy_expr in row]
+            for row in [[expr.diff(var) for var in model.dependent_vars]
+                        for expr in model.values()]]
+old_f = lambda ys, t, *a: [c(t, *(list(ys) + list(a))) for c in components]
+old_Dfun = lambda ys, t, *a: [[c(t, *(list(ys) + list(a))) for c in row]
+                              for row in jacobian]
+new_f, new_Dfun, _ = model._nsystem
+
+ys = np.array([5.0, 2.0, 1.0])
+params = (0.1, 0.2, 0.3, 0.3)
+assert np.allclose(old_f(ys, 0.5, *params), new_f(ys, 0.5, *params))
+assert np.allclose(old_Dfun(ys, 0.5, *params), new_Dfun(ys, 0.5, *params))
+
+number = 20000
+for name, f in [('rhs', (old_f, new_f)), ('jacobian', (old_Dfun, new_Dfun))]:
+    rates = [number / min(timeit.repeat(lambda: func(ys, 0.5, *params),
+                                        number=number, repeat=3))
+             for func in f]
+    print('{:>8}: before {:.0f} calls/s, after {:.0f} calls/s'.format(
+        name, *rates
+    ))
+
+tdata = np.linspace(0, 3, 1000)
+number = 20
+duration = min(timeit.repeat(
+    lambda: model(t=tdata, k=0.1, l=0.2, m=.3, p=0.3), number=number, repeat=3
+)) / number
+print('integration: {:.2e} s per call to the model'.format(duration))
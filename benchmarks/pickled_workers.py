@@ -0,0 +1,52 @@
+"""
+Measure the overhead per task of fitting the same model in a pool of 16
+worker processes. Every task sends the model to a worker, which used to turn
+its expressions and those of its Jacobian into numerical code all over
+again. A model which has been evaluated before pickling now carries its
+generated source code along, so the workers come up warm. A model which is
+pickled before its first use still pays the full price in every task.
+"""
+from __future__ import print_function
+from concurrent.futures import ProcessPoolExecutor
+import time
+
+import numpy as np
+from symfit import variables, parameters, Fit, Model, exp, cos
+
+x, y = variables('x, y')
+a, b, c, d, e = parameters('a, b, c, d, e')
+model_dict = {y: a * exp(- b * x) * cos(c * x + d) + e}
+xdata = np.linspace(0, 10, 200)
+params = dict(a=2.0, b=0.3, c=1.5, d=0.2, e=0.5)
+
+
+def fit_task(args):
+    model, ydata = args
+    fit = Fit(model, x=xdata, y=ydata)
+    return fit.execute().value(model.params[0])
+
+
+if __name__ == '__main__':
+    warm_model = Model(model_dict)
+    ydata = warm_model(x=xdata, **params).y
+    # Fitting once generates all the code a fit needs.
+    fit_task((warm_model, ydata))
+    n_tasks = 160
+    np.random.seed(0)
+    datasets = [ydata + np.random.normal(0, 0.05, ydata.shape)
+                for _ in range(n_tasks)]
+
+    with ProcessPoolExecutor(16) as executor:
+        # Make sure all workers have started and imported symfit.
+        list(executor.map(fit_task, [(Model(model_dict), ydata)] * 16))
+        for name in ['cold', 'warm']:
+            start = time.time()
+            if name == 'cold':
+                # A new model for every task, which has not generated its code.
+                tasks = [(Model(model_dict), ydata) for ydata in datasets]
+            else:
+                tasks = [(warm_model, ydata) for ydata in datasets]
+            results = list(executor.map(fit_task, tasks))
+            duration = time.time() - start
+            print('{}: {:.1f} ms per task'.format(name,
+                                                 1e3 * duration / n_tasks))
@@ -0,0 +1,48 @@
+"""
+Fit a global model to many datasets, in which every component shares one
+parameter and has one of its own. The Jacobian of the residuals is then
+almost entirely zero. Compare evaluating it as a sparse matrix, skipping
+the structural zeros, to evaluating it as a dense matrix.
+"""
+from __future__ import print_function
+import time
+
+import numpy as np
+from symfit import variables, parameters, Parameter, Model, Fit, exp
+from symfit.core.minimizers import TrustRegionReflective
+
+n_datasets = 50
+n_points = 100
+
+xs = variables(', '.join('x_{}'.format(i) for i in range(n_datasets)))
+ys = variables(', '.join('y_{}'.format(i) for i in range(n_datasets)))
+ks = parameters(', '.join('k_{}'.format(i) for i in range(n_datasets)),
+                value=1.0, min=0)
+amplitude = Parameter('A', value=1.0)
+model = Model({y: amplitude * exp(- k * x) for x, y, k in zip(xs, ys, ks)})
+
+np.random.seed(0)
+data = {}
+for i, (x, y) in enumerate(zip(xs, ys)):
+    xdata = np.linspace(0, 3, n_points)
+    data[x.name] = xdata
+    data[y.name] = 2.0 * np.exp(- (0.5 + i / n_datasets) * xdata)
+    data[y.name] += np.random.normal(0, 0.01, xdata.shape)
+
+
+if __name__ == '__main__':
+    # Generate the code for the Jacobian before timing.
+    Fit(model, minimizer=TrustRegionReflective, **data).execute()
+    print('{} datasets, {} parameters'.format(n_datasets, len(model.params)))
+    for name, max_density in [('dense', 0), ('sparse', 0.5)]:
+        TrustRegionReflective.max_sparse_density = max_density
+        fit = Fit(model, minimizer=TrustRegionReflective, **data)
+        jac = fit.minimizer.wrapped_jacobian(fit.minimizer.initial_guesses)
+        n_bytes = jac.data.nbytes if hasattr(jac, 'nnz') else jac.nbytes
+        start = time.time()
+        fit_result = fit.minimizer.execute()
+        duration = time.time() - start
+        print('{:>7}: {:.0f} ms, {} evaluations, Jacobian {:.1f} MB'.format(
+            name, 1e3 * duration, fit_result.minimizer_output['njev'],
+            n_bytes / 2 ** 20
+        ))
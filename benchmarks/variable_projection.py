@@ -0,0 +1,52 @@
+"""
+Fit a sum of Gaussians, whose amplitudes and offset enter the model linearly,
+with and without variable projection. With
+:class:`~symfit.core.objectives.VariableProjection` the linear parameters are
+solved for in every evaluation of the objective, so the minimizer only
+searches the positions and widths of the peaks.
+"""
+from __future__ import print_function
+import time
+
+import numpy as np
+from symfit import variables, Parameter, Fit, Model, exp
+from symfit.core.minimizers import BFGS, TrustRegionReflective
+from symfit.core.objectives import LeastSquares, VariableProjection
+
+n_peaks = 4
+x, y = variables('x, y')
+amplitudes = [Parameter('a{}'.format(i), value=1.0) for i in range(n_peaks)]
+positions = [Parameter('b{}'.format(i), value=2 * i + 0.3)
+             for i in range(n_peaks)]
+widths = [Parameter('c{}'.format(i), value=0.8) for i in range(n_peaks)]
+offset = Parameter('d', value=0.0)
+model = Model({y: sum(a * exp(- (x - b) ** 2 / (2 * c ** 2))
+                      for a, b, c in zip(amplitudes, positions, widths))
+                  + offset})
+
+
+if __name__ == '__main__':
+    np.random.seed(0)
+    xdata = np.linspace(-2, 2 * n_peaks, 2000)
+    values = {'d': 0.5}
+    for i in range(n_peaks):
+        values.update({'a{}'.format(i): 1.0 + i, 'b{}'.format(i): 2 * i,
+                       'c{}'.format(i): 0.5 + 0.1 * i})
+    ydata = model(x=xdata, **values).y
+    ydata += np.random.normal(0, 0.05, xdata.shape)
+
+    for minimizer in [BFGS, TrustRegionReflective]:
+        for objective in [LeastSquares, VariableProjection]:
+            fit = Fit(model, x=xdata, y=ydata, objective=objective,
+                      minimizer=minimizer)
+            # Generate the code of the model before timing.
+            fit.objective.eval_hessian(**values)
+            start = time.time()
+            fit_result = fit.execute()
+            duration = time.time() - start
+            print('{:>21} {:>18}: {:.3f} s, {:>3} evaluations, '
+                  'chi^2 {:.4f}'.format(
+                      minimizer.__name__, objective.__name__, duration,
+                      fit_result.minimizer_output['nfev'],
+                      fit_result.chi_squared
+                  ))
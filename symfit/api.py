@@ -2,7 +2,7 @@
 import symfit.core.operators
 
 # Expose useful objects.
-from symfit.core.fit import Fit
+from symfit.core.fit import Fit, BatchFit
 from symfit.core.models import (
     Model, ODEModel, ModelError, CallableModel, CallableNumericalModel,
     GradientModel
@@ -0,0 +1,633 @@
+"""
+Backends generate the code with which models are evaluated numerically. By
+default this is NumPy code like :func:`sympy.lambdify` generates, see
+:class:`NumPyBackend`, in which every operation makes a temporary array of
+the size of the data. For large datasets, :class:`NumbaBackend` and
+:class:`CBackend` fuse all operations into a single compiled loop over the
+data instead. :class:`ChunkedBackend` keeps the NumPy code, but evaluates
+it on one chunk of the data at a time in a pool of threads. A backend can be
+chosen for all models, or for a single model (class), by assigning it to the
+``backend`` attribute::
+
+    from symfit.core.backends import NumbaBackend
+
+    Model.backend = NumbaBackend(parallel=True)
+
+The backend applies to the components, the Jacobian and the Hessian of the
+model alike.
+"""
+from multiprocessing import cpu_count
+import abc
+import ctypes
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+import warnings
+
+import numpy as np
+from six import add_metaclass
+from sympy import Idx, MatrixExpr
+from sympy.printing.ccode import C99CodePrinter
+
+from symfit.core.support import (
+    sympy_to_py_source, sympy_to_kernel_source, py_from_source, inspect_sig
+)
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+class NumPyBackend(object):
+    """
+    Evaluates models with NumPy, using the code generated by
+    :func:`~symfit.core.support.sympy_to_py_source`.
+    """
+    #: Name of the backend, which is part of the key of the generated source
+    #: code.
+    name = 'numpy'
+
+    def source(self, assignments, args, single=False, hoist=()):
+        """
+        Generate the source code of a function evaluating ``assignments``.
+        Its arguments are those of
+        :func:`~symfit.core.support.sympy_to_py_source`.
+
+        :return: JSON serializable source code.
+        """
+        return sympy_to_py_source(assignments, args, single=single,
+                                  hoist=hoist)
+
+    def function(self, source):
+        """
+        :param source: source code generated by :meth:`source`.
+        :return: the function defined by ``source``.
+        """
+        return py_from_source(source)
+
+
+class ChunkedBackend(NumPyBackend):
+    """
+    Evaluates models with the same NumPy code as :class:`NumPyBackend`, but
+    on chunks of the data at a time, see :class:`ChunkedFunction`. The
+    temporary arrays of every operation are then only the size of a chunk,
+    which bounds the memory used by large datasets and keeps the temporaries
+    in the cache of the processor. Since NumPy releases the GIL, the chunks
+    are evaluated by a pool of threads.
+    """
+    name = 'chunked'
+
+    def __init__(self, chunk_size=2 ** 14, parallel=True):
+        """
+        :param chunk_size: Number of data points per chunk.
+        :param parallel: If ``True``, the chunks are divided over all cores.
+        """
+        self.chunk_size = chunk_size
+        self.parallel = parallel
+
+    def source(self, assignments, args, single=False, hoist=()):
+        """
+        :return: dict of the ``numpy`` source code, and whether the
+            expressions are ``elementwise``. Matrix expressions and sums over
+            indices cannot be evaluated in chunks.
+        """
+        return {
+            'numpy': sympy_to_py_source(assignments, args, single=single,
+                                        hoist=hoist),
+            'elementwise': not any(expr.atoms(Idx, MatrixExpr)
+                                   for expr in assignments.values()),
+            'single': single,
+        }
+
+    def function(self, source):
+        func = py_from_source(source['numpy'])
+        if not source['elementwise']:
+            return func
+        return ChunkedFunction(func, source['single'],
+                               chunk_size=self.chunk_size,
+                               parallel=self.parallel)
+
+
+class ChunkedFunction(object):
+    """
+    Function evaluating a function generated by
+    :func:`~symfit.core.support.sympy_to_py_source` on chunks of the data.
+    The outputs which are arrays are allocated once, and every chunk is
+    written into them. Data which has to be broadcast is evaluated in one go
+    instead.
+    """
+    def __init__(self, func, single, chunk_size=2 ** 14, parallel=True):
+        """
+        :param func: function generated by
+            :func:`~symfit.core.support.sympy_to_py_source`.
+        :param single: ``True`` if ``func`` returns a single value instead of
+            a tuple.
+        :param chunk_size: Number of data points per chunk.
+        :param parallel: If ``True``, the chunks are divided over all cores.
+        """
+        self.func = func
+        self.single = single
+        self.chunk_size = chunk_size
+        self.parallel = parallel
+        if hasattr(func, 'hoisted'):
+            self.hoisted = func.hoisted
+        # Models call their components positionally when the signature
+        # allows it.
+        self.__signature__ = inspect_sig.signature(func)
+
+    def __call__(self, *args, **kwargs):
+        hoisted = kwargs.get('_hoisted')
+        arrays = [np.asarray(arg) for arg in args]
+        if hoisted is not None:
+            hoisted = [np.asarray(value) for value in hoisted]
+        shapes = set(array.shape for array in arrays + (hoisted or [])
+                     if array.ndim)
+        if (len(shapes) != 1 or
+                np.prod(next(iter(shapes))) <= self.chunk_size):
+            # Nothing to divide, or the data has to be broadcast.
+            return self.func(*args, **kwargs)
+        shape = shapes.pop()
+        size = int(np.prod(shape))
+        arrays = [array.ravel() if array.ndim else array for array in arrays]
+        if hoisted is not None:
+            hoisted = [value.ravel() if value.ndim else value
+                       for value in hoisted]
+
+        def evaluate(start):
+            chunk = slice(start, start + self.chunk_size)
+            chunk_kwargs = {}
+            if hoisted is not None:
+                chunk_kwargs['_hoisted'] = tuple(
+                    value[chunk] if value.ndim else value for value in hoisted
+                )
+            values = self.func(*[array[chunk] if array.ndim else array
+                                 for array in arrays], **chunk_kwargs)
+            return [values] if self.single else values
+
+        # The first chunk shows which outputs are arrays.
+        first = evaluate(0)
+        outputs = [np.empty(size, dtype=np.result_type(value))
+                   if np.ndim(value) else None for value in first]
+
+        def store(start):
+            values = first if start == 0 else evaluate(start)
+            chunk = slice(start, start + self.chunk_size)
+            for output, value in zip(outputs, values):
+                if output is not None:
+                    output[chunk] = value
+
+        starts = range(0, size, self.chunk_size)
+        if self.parallel:
+            list(_thread_pool().map(store, starts))
+        else:
+            for start in starts:
+                store(start)
+        values = [value if output is None else output.reshape(shape)
+                  for value, output in zip(first, outputs)]
+        return values[0] if self.single else tuple(values)
+
+
+@add_metaclass(abc.ABCMeta)
+class KernelBackend(NumPyBackend):
+    """
+    Base class of the backends which evaluate models with a single compiled
+    loop over the data, see :class:`KernelFunction`. This does not make any
+    temporary arrays, which saves memory bandwidth on large datasets.
+    Everything which only depends on the parameters is computed once, before
+    the loop. The loop releases the GIL, so with ``parallel=True`` large
+    datasets are divided into chunks which are evaluated by a pool of
+    threads.
+
+    The data has to be arrays of real numbers which all have the same shape.
+    Otherwise, or when the expressions cannot be compiled, the model is
+    evaluated with NumPy instead, as it would be by :class:`NumPyBackend`.
+    Subexpressions which only depend on the data are not hoisted, see
+    :class:`~symfit.core.models.HoistedData`, since recomputing them in the
+    loop is typically cheaper than reading them from memory.
+    """
+    def __init__(self, parallel=False):
+        """
+        :param parallel: If ``True``, the loop over the data is divided over
+            all cores.
+        """
+        self.parallel = parallel
+
+    def source(self, assignments, args, single=False, hoist=()):
+        """
+        :return: dict of the source code of the ``kernel``, see
+            :func:`~symfit.core.support.sympy_to_kernel_source`, and the
+            ``numpy`` source code to fall back on.
+        """
+        return {
+            'kernel': self._kernel_source(assignments, args, single),
+            'numpy': sympy_to_py_source(assignments, args, single=single),
+        }
+
+    def _kernel_source(self, assignments, args, single):
+        return sympy_to_kernel_source(assignments, args, single=single)
+
+    def function(self, source):
+        fallback = py_from_source(source['numpy'])
+        if source['kernel'] is None:
+            return fallback
+        return self._kernel_function(source['kernel'], fallback)
+
+    @abc.abstractmethod
+    def _kernel_function(self, kernel, fallback):
+        """
+        :return: :class:`KernelFunction` evaluating ``kernel``.
+        """
+
+
+@add_metaclass(abc.ABCMeta)
+class KernelFunction(object):
+    """
+    Base class of functions evaluating the code generated by
+    :func:`~symfit.core.support.sympy_to_kernel_source` in a compiled loop. A
+    loop is compiled for every combination of array and scalar arguments the
+    function is called with, which computes everything that only depends on
+    the scalars before the loop.
+    """
+    #: Minimum number of data points per thread when evaluating in parallel.
+    min_chunk_size = 2 ** 16
+
+    def __init__(self, kernel, fallback, parallel=False):
+        """
+        :param kernel: dict generated by
+            :func:`~symfit.core.support.sympy_to_kernel_source`.
+        :param fallback: function with the same signature, which is called
+            instead when the arguments cannot be evaluated in a loop.
+        :param parallel: If ``True``, the loop is divided over all cores,
+            see :attr:`min_chunk_size`.
+        """
+        self.kernel = kernel
+        self.fallback = fallback
+        self.parallel = parallel
+        self._compiled = {}
+        # Models call their components positionally when the signature
+        # allows it.
+        self.__signature__ = inspect_sig.signature(fallback)
+
+    def __call__(self, *args):
+        arrays = [np.asarray(arg) for arg in args]
+        shapes = set(array.shape for array in arrays if array.ndim)
+        if (len(shapes) != 1 or
+                any(array.dtype.kind not in 'biuf' for array in arrays)):
+            # Nothing to loop over, or the data has to be broadcast.
+            return self.fallback(*args)
+        shape = shapes.pop()
+        is_array = tuple(bool(array.ndim) for array in arrays)
+        if is_array not in self._compiled:
+            self._compiled[is_array] = self._compile(is_array)
+        loop, array_outputs = self._compiled[is_array]
+        if loop is None:
+            return self.fallback(*args)
+
+        size = int(np.prod(shape))
+        inputs = [
+            np.ascontiguousarray(array, dtype=float).ravel() if array.ndim
+            else float(array) for array in arrays
+        ]
+        outputs = [np.empty(size) for _ in array_outputs]
+        n_chunks = min(cpu_count(), size // self.min_chunk_size)
+        if self.parallel and n_chunks > 1:
+            bounds = np.linspace(0, size, n_chunks + 1).astype(int)
+            scalars = list(_thread_pool().map(
+                lambda start, stop: loop(start, stop, inputs, outputs),
+                bounds[:-1], bounds[1:]
+            ))[0]
+        else:
+            scalars = loop(0, size, inputs, outputs)
+        outputs = iter(output.reshape(shape) for output in outputs)
+        scalars = iter(scalars)
+        values = [next(outputs) if index in array_outputs else next(scalars)
+                  for index in range(len(self.kernel['outputs']))]
+        return values[0] if self.kernel['single'] else tuple(values)
+
+    @abc.abstractmethod
+    def _compile(self, is_array):
+        """
+        :param is_array: tuple of bools, ``True`` for the arguments which are
+            arrays.
+        :return: tuple of the compiled loop and the indices of the outputs
+            which are arrays, or ``(None, None)`` if the loop cannot be
+            compiled. The loop is a function of the first and last index of
+            the data to evaluate, the list of arguments as 1D arrays and
+            floats, and the list of arrays to store the outputs which are
+            arrays in. It returns the other outputs.
+        """
+
+    def _split_lines(self, is_array):
+        """
+        Divide the lines of the kernel into those before and those inside the
+        loop over the data.
+
+        :param is_array: tuple of bools, ``True`` for the arguments which are
+            arrays.
+        :return: tuple of the lines before the loop, the lines inside the
+            loop, and the indices of the outputs which are arrays. Lines are
+            pairs of the name assigned to and the expression.
+        """
+        arrays = set(index for index, array in enumerate(is_array) if array)
+        varying = set()
+        invariant_lines, loop_lines = [], []
+        for name, expr, dependencies in self.kernel['lines']:
+            if arrays.intersection(dependencies):
+                varying.add(name)
+                loop_lines.append((name, expr))
+            else:
+                invariant_lines.append((name, expr))
+        array_outputs = [index for index, name
+                         in enumerate(self.kernel['outputs'])
+                         if name in varying]
+        return invariant_lines, loop_lines, array_outputs
+
+
+class NumbaBackend(KernelBackend):
+    """
+    Compiles the loop over the data with Numba, see :class:`KernelBackend`.
+    When Numba is not installed, models are evaluated with NumPy instead.
+    """
+    name = 'numba'
+
+    def __init__(self, parallel=False):
+        """
+        :param parallel: If ``True``, the loop over the data is divided over
+            all cores. This uses threads rather than Numba's own parallel
+            loops, whose threading layers do not survive the forking of
+            processes such as the workers of a
+            :class:`concurrent.futures.ProcessPoolExecutor`.
+        """
+        if numba is None:
+            warnings.warn('Numba is not installed, so models are evaluated '
+                          'with NumPy instead.')
+        super(NumbaBackend, self).__init__(parallel=parallel)
+
+    def _kernel_function(self, kernel, fallback):
+        if numba is None:
+            return fallback
+        return NumbaFunction(kernel, fallback, parallel=self.parallel)
+
+
+class NumbaFunction(KernelFunction):
+    """
+    Evaluates a kernel in a loop compiled with Numba.
+    """
+    def _compile(self, is_array):
+        args = self.kernel['args']
+        invariant_lines, loop_lines, array_outputs = self._split_lines(
+            is_array
+        )
+        arg_list = ['_start', '_stop'] + [
+            '_array{}'.format(index) if array else arg
+            for index, (arg, array) in enumerate(zip(args, is_array))
+        ] + ['_output{}'.format(index) for index in array_outputs]
+        lines = ['def _symfit_kernel({}):'.format(', '.join(arg_list))]
+        lines.extend('    {} = {}'.format(*line) for line in invariant_lines)
+        lines.append('    for _i in range(_start, _stop):')
+        lines.extend('        {} = _array{}[_i]'.format(arg, index)
+                     for index, (arg, array) in enumerate(zip(args, is_array))
+                     if array)
+        lines.extend('        {} = {}'.format(*line) for line in loop_lines)
+        lines.extend('        _output{0}[_i] = {1}'.format(
+            index, self.kernel['outputs'][index]
+        ) for index in array_outputs)
+        lines.append('    return ({})'.format(''.join(
+            name + ', ' for index, name in enumerate(self.kernel['outputs'])
+            if index not in array_outputs
+        )))
+        source = '\n'.join(self.kernel['imports'] + lines)
+
+        namespace = dict(self.fallback.__globals__)
+        exec(source, namespace)
+        signature = tuple(
+            [numba.int64, numba.int64]
+            + [numba.float64[::1] if array else numba.float64
+               for array in is_array]
+            + [numba.float64[::1]] * len(array_outputs)
+        )
+        try:
+            # Division by zero results in inf or nan, as it does in NumPy.
+            kernel = numba.njit(signature, nogil=True, error_model='numpy')(
+                namespace['_symfit_kernel']
+            )
+        except Exception as error:
+            # Numba raises many kinds of errors for code it does not support.
+            warnings.warn('Numba could not compile a model, so it is '
+                          'evaluated with NumPy instead: {}'.format(error))
+            return None, None
+
+        def loop(start, stop, inputs, outputs):
+            return kernel(start, stop, *(inputs + outputs))
+        return loop, array_outputs
+
+
+class CBackend(KernelBackend):
+    """
+    Prints the loop over the data as C code, which is compiled into a shared
+    library with the C compiler of the system and called through
+    :mod:`ctypes`, see :class:`KernelBackend`. Libraries are stored in
+    ``directory``, named after the hash of their source code and of the
+    compiler command, so a model is only compiled once for every version of
+    its expressions. Expressions which cannot be printed as C, and failures to
+    compile, make the model fall back on NumPy.
+
+    The compiler has to accept the command line options of ``cc``.
+    """
+    name = 'c'
+
+    def __init__(self, directory=None, compiler=None,
+                 flags=('-O3', '-fno-math-errno', '-fPIC', '-shared'),
+                 parallel=False):
+        """
+        :param directory: Directory to store the compiled libraries in.
+            Defaults to the directory given by the environment variable
+            ``SYMFIT_CACHE_DIR``, or else ``~/.cache/symfit``.
+        :param compiler: C compiler. Defaults to the environment variable
+            ``CC``, or else ``cc``.
+        :param flags: Sequence of options passed to the compiler, which have
+            to make it build a shared library. Not setting ``errno`` in math
+            functions allows the compiler to move them out of the loop.
+        :param parallel: If ``True``, the loop over the data is divided over
+            all cores.
+        """
+        super(CBackend, self).__init__(parallel=parallel)
+        if directory is None:
+            directory = os.environ.get('SYMFIT_CACHE_DIR', '~/.cache/symfit')
+        self.directory = os.path.expanduser(directory)
+        self.compiler = compiler or os.environ.get('CC', 'cc')
+        self.flags = list(flags)
+        self._libraries = {}
+
+    def __getstate__(self):
+        # Loaded libraries can not be pickled.
+        state = self.__dict__.copy()
+        state['_libraries'] = {}
+        return state
+
+    def _kernel_source(self, assignments, args, single):
+        try:
+            return sympy_to_kernel_source(assignments, args, single=single,
+                                          printer=_CCodePrinter())
+        except ValueError:
+            return None
+
+    def _kernel_function(self, kernel, fallback):
+        return CFunction(kernel, fallback, self.library,
+                         parallel=self.parallel)
+
+    def library(self, source):
+        """
+        Compile C source code into a shared library, unless that has been
+        done before.
+
+        :param source: str of C source code.
+        :return: the library, as a :class:`ctypes.CDLL`.
+        :raises OSError: if the library could not be compiled or loaded.
+        """
+        command = [self.compiler] + self.flags
+        digest = hashlib.sha256(
+            '\0'.join([source] + command).encode('utf-8')
+        ).hexdigest()
+        path = os.path.join(self.directory, 'symfit_{}.so'.format(digest))
+        if path not in self._libraries:
+            if not os.path.exists(path):
+                self._compile(source, command, path)
+            self._libraries[path] = ctypes.CDLL(path)
+        return self._libraries[path]
+
+    def _compile(self, source, command, path):
+        """
+        Compile ``source`` with ``command`` into the library ``path``.
+        """
+        try:
+            os.makedirs(self.directory)
+        except OSError:
+            if not os.path.isdir(self.directory):
+                raise
+        build_directory = tempfile.mkdtemp(dir=self.directory)
+        try:
+            source_path = os.path.join(build_directory, 'kernel.c')
+            library_path = os.path.join(build_directory, 'kernel.so')
+            with open(source_path, 'w') as f:
+                f.write(source)
+            process = subprocess.Popen(
+                command + ['-o', library_path, source_path, '-lm'],
+                stdout=subprocess.PIPE, stderr=subprocess.STDOUT
+            )
+            output = process.communicate()[0]
+            if process.returncode != 0:
+                raise OSError('Compiling failed: {}'.format(
+                    output.decode('utf-8', 'replace')
+                ))
+            # Other processes never load a partially written library.
+            getattr(os, 'replace', os.rename)(library_path, path)
+        finally:
+            shutil.rmtree(build_directory, ignore_errors=True)
+
+
+class CFunction(KernelFunction):
+    """
+    Evaluates a kernel in a loop compiled from C code.
+    """
+    def __init__(self, kernel, fallback, library, parallel=False):
+        """
+        :param library: function compiling C source code into a
+            :class:`ctypes.CDLL`, see :meth:`CBackend.library`.
+        """
+        super(CFunction, self).__init__(kernel, fallback, parallel=parallel)
+        self.library = library
+
+    def _compile(self, is_array):
+        args, outputs = self.kernel['args'], self.kernel['outputs']
+        invariant_lines, loop_lines, array_outputs = self._split_lines(
+            is_array
+        )
+        lines = [
+            '#include <math.h>',
+            '',
+            'void symfit_kernel(long long _start, long long _stop, '
+            'double **_arrays, const double *_scalars, double **_outputs, '
+            'double *_results)',
+            '{',
+        ]
+        for index, (arg, array) in enumerate(zip(args, is_array)):
+            if array:
+                lines.append('    const double *_array{0} = _arrays[{0}];'
+                             .format(index))
+            else:
+                lines.append('    const double {} = _scalars[{}];'.format(
+                    arg, index
+                ))
+        lines.extend('    double *_output{0} = _outputs[{0}];'.format(index)
+                     for index in array_outputs)
+        lines.extend('    const double {} = {};'.format(*line)
+                     for line in invariant_lines)
+        lines.extend('    _results[{}] = {};'.format(index, name)
+                     for index, name in enumerate(outputs)
+                     if index not in array_outputs)
+        lines.append('    for (long long _i = _start; _i < _stop; _i++) {')
+        lines.extend('        const double {} = _array{}[_i];'.format(
+            arg, index
+        ) for index, (arg, array) in enumerate(zip(args, is_array)) if array)
+        lines.extend('        const double {} = {};'.format(*line)
+                     for line in loop_lines)
+        lines.extend('        _output{0}[_i] = {1};'.format(
+            index, outputs[index]
+        ) for index in array_outputs)
+        lines.extend(['    }', '}', ''])
+        try:
+            kernel = self.library('\n'.join(lines)).symfit_kernel
+        except OSError as error:
+            warnings.warn('A model could not be compiled, so it is '
+                          'evaluated with NumPy instead: {}'.format(error))
+            return None, None
+        kernel.restype = None
+        kernel.argtypes = ([ctypes.c_longlong, ctypes.c_longlong]
+                           + [ctypes.c_void_p] * 4)
+
+        def loop(start, stop, inputs, output_arrays):
+            pointers = (ctypes.c_void_p * len(args))(*[
+                value.ctypes.data if array else None
+                for value, array in zip(inputs, is_array)
+            ])
+            scalars = np.array([0.0 if array else value
+                                for value, array in zip(inputs, is_array)])
+            output_pointers = (ctypes.c_void_p * len(outputs))()
+            for index, output in zip(array_outputs, output_arrays):
+                output_pointers[index] = output.ctypes.data
+            results = np.zeros(len(outputs))
+            kernel(start, stop, pointers, scalars.ctypes.data,
+                   output_pointers, results.ctypes.data)
+            return [value for index, value in enumerate(results)
+                    if index not in array_outputs]
+        return loop, array_outputs
+
+
+class _CCodePrinter(C99CodePrinter):
+    """
+    C99 code printer which refuses to print expressions it does not know how
+    to print, instead of printing them with a comment.
+    """
+    def _print_not_supported(self, expr):
+        raise ValueError('{} cannot be printed as C.'.format(expr))
+
+
+#: Thread pools of :func:`_thread_pool`, by process id.
+_thread_pools = {}
+
+def _thread_pool():
+    """
+    :return: :class:`concurrent.futures.ThreadPoolExecutor` with a thread per
+        core, shared by all parallel :class:`KernelFunction`'s. Forked
+        processes make their own, since the threads of their parent do not
+        exist in them.
+    """
+    pid = os.getpid()
+    if pid not in _thread_pools:
+        from concurrent.futures import ThreadPoolExecutor
+        _thread_pools[pid] = ThreadPoolExecutor(max_workers=cpu_count())
+    return _thread_pools[pid]
@@ -0,0 +1,156 @@
+"""
+Persistent cache for the source code generated to evaluate models
+numerically. Turning the symbolic expressions of a model, its Jacobian and
+its Hessian into Python code takes a lot of symbolic work, which would
+otherwise be repeated in every new process using the same model.
+
+The cache is off by default. It can be turned on for all models by setting
+the environment variable ``SYMFIT_CACHE_DIR`` to a directory, or by assigning
+a :class:`SourceCache` to the ``source_cache`` attribute of a model (class)::
+
+    from symfit.core.cache import SourceCache
+
+    Model.source_cache = SourceCache('~/.cache/symfit')
+"""
+import errno
+import hashlib
+import json
+import os
+import tempfile
+
+import sympy
+
+
+class SourceCache(object):
+    """
+    Content-addressed cache of generated source code on disk. Every entry is
+    stored as a JSON file in ``directory``, named after the hash of everything
+    that determines its content. Entries are never invalidated, since a
+    change of the model changes its key. Instead, the least recently used
+    entries are evicted whenever the total size of the cache exceeds
+    ``max_size``.
+    """
+    #: Version of the layout of the entries, part of every key.
+    layout_version = 1
+
+    def __init__(self, directory, max_size=50 * 2 ** 20):
+        """
+        :param directory: Directory to store the entries in. It is created
+            when the first entry is stored.
+        :param max_size: Maximum total size of the entries in bytes.
+        """
+        self.directory = os.path.expanduser(directory)
+        self.max_size = max_size
+
+    @classmethod
+    def from_environment(cls):
+        """
+        :return: :class:`SourceCache` in the directory given by the
+            environment variable ``SYMFIT_CACHE_DIR``, or ``None`` if it is
+            not set.
+        """
+        directory = os.environ.get('SYMFIT_CACHE_DIR')
+        return cls(directory) if directory else None
+
+    def key(self, *parts):
+        """
+        Make the key of an entry from its canonical description, which also
+        includes the versions of symfit and sympy because both affect the
+        generated source.
+
+        :param parts: sympy objects, or (nested) sequences of them, which
+            together identify the entry.
+        :return: str of hexadecimal digits.
+        """
+        import symfit
+
+        digest = hashlib.sha256()
+        for part in (self.layout_version, symfit.__version__,
+                     sympy.__version__) + parts:
+            digest.update(sympy.srepr(part).encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.json')
+
+    def get(self, key):
+        """
+        :param key: key of the entry, as made by :meth:`key`.
+        :return: The stored entry, or ``None`` if there is none.
+        """
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+            # Mark the entry as recently used.
+            os.utime(path, None)
+        except (IOError, OSError, ValueError):
+            return None
+        return entry
+
+    def set(self, key, entry):
+        """
+        Store an entry, and evict the least recently used entries if the
+        cache has grown too large. Failing to write is not an error, the
+        cache is simply not used in that case.
+
+        :param key: key of the entry, as made by :meth:`key`.
+        :param entry: JSON serializable entry.
+        """
+        try:
+            try:
+                os.makedirs(self.directory)
+            except OSError as error:
+                if error.errno != errno.EEXIST:
+                    raise
+            # Write to a temporary file first, such that other processes
+            # never read a partially written entry.
+            fd, temp_path = tempfile.mkstemp(dir=self.directory,
+                                             suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(entry, f)
+            getattr(os, 'replace', os.rename)(temp_path, self._path(key))
+        except (IOError, OSError):
+            return
+        self.evict()
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the total size of the
+        cache is at most ``max_size``.
+        """
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:  # Removed by another process
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total_size -= size
+
+    def clear(self):
+        """
+        Remove all entries from the cache.
+        """
+        max_size, self.max_size = self.max_size, -1
+        try:
+            self.evict()
+        finally:
+            self.max_size = max_size
@@ -1,20 +1,26 @@
 from collections import OrderedDict, Sequence
+from multiprocessing import cpu_count
+import pickle
 import sys
+import threading
+import uuid
 
 import sympy
 import numpy as np
 
 from symfit.core.argument import Variable
-from .support import keywordonly, key2str
+from .support import keywordonly, key2str, partial
 from .minimizers import (
     BFGS, SLSQP, LBFGSB, BaseMinimizer, GradientMinimizer, HessianMinimizer,
-    ConstrainedMinimizer, MINPACK, ChainedMinimizer, BasinHopping
+    ConstrainedMinimizer, MINPACK, ChainedMinimizer, BasinHopping,
+    TrustRegionReflective, LinearLeastSquares
 )
 from .objectives import (
     LeastSquares, BaseObjective, MinimizeModel, VectorLeastSquares,
-    LogLikelihood, HessianObjectiveJacApprox
+    LogLikelihood, HessianObjectiveJacApprox, VariableProjection
 )
 from .models import BaseModel, Model, BaseNumericalModel, CallableModel
+from .fit_results import BatchFitResults
 
 if sys.version_info >= (3,0):
     import inspect as inspect_sig
@@ -231,22 +237,16 @@ class HasCovarianceMatrix(TakesData):
     those, just variances. Therefore, take the result with a grain of salt for
     vector models.
     """
-    def _covariance_matrix(self, best_fit_params, objective):
+    def _covariance_matrix(self, best_fit_params, objective, hess_inv=None):
         # Helper function for self.covariance_matrix.
-        try:
-            hess = objective.eval_hessian(**key2str(best_fit_params))
-        except AttributeError:
-            # Some models do not have an eval_hessian, in which case we give up
-            return None
-        else:
-            if hess is None:
-                return hess
-
-        try:
-            # The squeezing to a matrix is required for MinimizeModel objectives
-            hess_inv = np.linalg.inv(np.atleast_2d(np.squeeze(hess)))
-        except np.linalg.LinAlgError:
-            return None
+        # The objective can be of a model with the fixed parameters
+        # substituted, which only accepts the free ones.
+        params = [p for p in self.model.params if p in objective.model.params]
+        best_fit_params = {p: best_fit_params[p] for p in params}
+        if hess_inv is None or np.shape(hess_inv) != (len(params),) * 2:
+            hess_inv = self._inverse_hessian(best_fit_params, objective)
+            if hess_inv is None:
+                return None
 
         if isinstance(objective, LeastSquares):
             # Calculate the covariance for a least squares method.
@@ -262,22 +262,59 @@ class HasCovarianceMatrix(TakesData):
             else:
                 s2 = rss / dof
             cov_mat = s2 * hess_inv
-            return cov_mat
         else:
             # The inverse hessian is the covariance matrix for Loglikelihood and
             # also for objectives in general.
-            return hess_inv
+            cov_mat = hess_inv
 
-    def covariance_matrix(self, best_fit_params):
+        if len(params) < len(self.model.params):
+            # Substituted parameters have no (co)variance.
+            indices = [self.model.params.index(p) for p in params]
+            full_cov_mat = np.zeros((len(self.model.params),) * 2)
+            full_cov_mat[np.ix_(indices, indices)] = cov_mat
+            return full_cov_mat
+        return cov_mat
+
+    def _inverse_hessian(self, best_fit_params, objective):
+        """
+        :return: inverse of the Hessian of ``objective`` at
+            ``best_fit_params``, or ``None`` if it can not be computed.
+        """
+        try:
+            hess = objective.eval_hessian(**key2str(best_fit_params))
+        except AttributeError:
+            # Some models do not have an eval_hessian, in which case we give up
+            return None
+        else:
+            if hess is None:
+                return hess
+
+        # The squeezing to a matrix is required for MinimizeModel objectives
+        hess = np.atleast_2d(np.squeeze(hess))
+        blocks = None
+        if isinstance(objective, LeastSquares):
+            blocks = _parameter_blocks(objective)
+        try:
+            if blocks is None:
+                return np.linalg.inv(hess)
+            else:
+                return _inverse_block_arrowhead(hess, *blocks)
+        except np.linalg.LinAlgError:
+            return None
+
+    def covariance_matrix(self, best_fit_params, hess_inv=None):
         """
         Given best fit parameters, this function finds the covariance matrix.
         This matrix gives the (co)variance in the parameters.
 
         :param best_fit_params: ``dict`` of best fit parameters as given by .best_fit_params()
+        :param hess_inv: The inverse of the Hessian of the objective at
+            ``best_fit_params``, if it is known already.
         :return: covariance matrix.
         """
         cov_matrix = self._covariance_matrix(best_fit_params,
-                                             objective=self.objective)
+                                             objective=self.objective,
+                                             hess_inv=hess_inv)
         if cov_matrix is None:
             # If the covariance matrix could not be computed we try again by
             # approximating the hessian with the jacobian.
@@ -400,7 +437,17 @@ class Fit(HasCovarianceMatrix):
 
         # Initialise the objective with data if it's not initialised already
         if not isinstance(self.objective, BaseObjective):
-            self.objective = self.objective(self.model, self.data)
+            # Fixed parameters are substituted by their values before any code
+            # is generated, so only derivatives to free parameters are made.
+            model = self.model
+            if hasattr(model, 'substitute_fixed'):
+                model = model.substitute_fixed()
+            self.objective = self.objective(model, self.data)
+        if (self.constraints and
+                getattr(self.objective, 'projected_params', None)):
+            raise TypeError('{} does not support constraints.'.format(
+                self.objective.__class__.__name__
+            ))
 
         # Select the minimizer on the basis of the provided information.
         if minimizer is None:
@@ -436,20 +483,39 @@ class Fit(HasCovarianceMatrix):
         parameters = sorted(unique_parameters, key=lambda p: p.default is None)
         return inspect_sig.Signature(parameters=parameters)
 
-    def _determine_minimizer(self):
+    def _determine_minimizer(self, scalar=False):
         """
         Determine the most suitable minimizer by the presence of bounds or
         constraints.
+
+        :param scalar: If ``True``, only minimizers which treat the objective
+            as a scalar function are considered.
         :return: a subclass of `BaseMinimizer`.
         """
         if self.constraints:
             return SLSQP
+        elif (not scalar and isinstance(self.objective, LeastSquares) and
+                self._is_linear()):
+            # Ordinary weighted least squares, which is solved exactly.
+            return LinearLeastSquares
         elif any([bound is not None for pair in self.model.bounds for bound in pair]):
             # If any bound is set
             return LBFGSB
         else:
             return BFGS
 
+    def _is_linear(self):
+        """
+        :return: ``True`` if the model of the objective is linear in all its
+            free parameters, none of which has bounds.
+        """
+        model = self.objective.model
+        linear = getattr(model, 'linear_params', None)
+        if linear is None:
+            return False
+        return all(p in linear and p.min is None and p.max is None
+                   for p in model.free_params)
+
     @staticmethod
     def _determine_objective(model, objective, minimizer, bound_arguments):
         """
@@ -509,7 +575,7 @@ class Fit(HasCovarianceMatrix):
             return minimizer
         if issubclass(minimizer, BasinHopping):
             minimizer_options['local_minimizer'] = self._init_minimizer(
-                self._determine_minimizer()
+                self._determine_minimizer(scalar=True)
             )
         if issubclass(minimizer, GradientMinimizer):
             # If an analytical version of the Jacobian exists we should use
@@ -518,6 +584,18 @@ class Fit(HasCovarianceMatrix):
             # py function version of the analytical jacobian.
             if hasattr(self.model, 'eval_jacobian') and hasattr(self.objective, 'eval_jacobian'):
                 minimizer_options['jacobian'] = self.objective.eval_jacobian
+            if (issubclass(minimizer, TrustRegionReflective) and
+                    hasattr(self.model, 'eval_jacobian') and
+                    hasattr(self.objective, 'eval_residual_jacobian')):
+                # Needs the Jacobian of the residuals instead, which is only
+                # evaluated where it is not structurally zero if the model
+                # allows it.
+                if (hasattr(self.model, 'eval_sparse_jacobian') and
+                        not isinstance(self.objective, VariableProjection) and
+                        minimizer.is_sparse(self.model.jacobian_sparsity)):
+                    minimizer_options['jacobian'] = self.objective.eval_sparse_residual_jacobian
+                else:
+                    minimizer_options['jacobian'] = self.objective.eval_residual_jacobian
         if issubclass(minimizer, HessianMinimizer):
             # If an analytical version of the Hessian exists we should use
             # that, otherwise we let the minimizer estimate it itself.
@@ -534,7 +612,11 @@ class Fit(HasCovarianceMatrix):
                 data = self.data  # No copy, share state
                 constraint_objectives.append(MinimizeModel(constraint, data))
             minimizer_options['constraints'] = constraint_objectives
-        return minimizer(self.objective, self.model.params, **minimizer_options)
+        # Parameters which the objective solves for itself are not seen by
+        # the minimizer.
+        projected = getattr(self.objective, 'projected_params', [])
+        parameters = [p for p in self.model.params if p not in projected]
+        return minimizer(self.objective, parameters, **minimizer_options)
 
     def _init_constraints(self, constraints, model):
         """
@@ -577,10 +659,466 @@ class Fit(HasCovarianceMatrix):
         :return: FitResults instance
         """
         minimizer_ans = self.minimizer.execute(**minimize_options)
+        hess_inv = None
+        if isinstance(self.minimizer, LinearLeastSquares):
+            # The exact inverse Hessian is known already.
+            hess_inv = minimizer_ans.minimizer_output['hess_inv']
         minimizer_ans.covariance_matrix = self.covariance_matrix(
-            dict(zip(self.model.params, minimizer_ans._popt))
+            dict(zip(self.model.params, minimizer_ans._popt)),
+            hess_inv=hess_inv
         )
         # Overwrite the DummyModel with the current model
         minimizer_ans.model = self.model
         minimizer_ans.minimizer = self.minimizer
         return minimizer_ans
+
+    @keywordonly(n_starts=10, sampling='lhs', executor=None, n_workers=None,
+                 n_converged=None, basin_tol=1e-4, seed=None)
+    def execute_multistart(self, **minimize_options):
+        """
+        Execute the fit from many starting points, for problems with several
+        local minima. The starting points are spread over the box spanned by
+        the ``min`` and ``max`` of the free parameters, which therefore all
+        need to have both bounds. From every starting point, the minimizer
+        of this fit is used to find the nearest minimum.
+
+        Example usage::
+
+            fit = Fit(model, x=xdata, y=ydata)
+            with ProcessPoolExecutor() as executor:
+                fit_results = fit.execute_multistart(
+                    n_starts=50, executor=executor, n_converged=5
+                )
+            best_result = fit_results[0]
+
+        :param n_starts: Number of starting points.
+        :param sampling: How to pick the starting points, either ``'lhs'``
+            for Latin hypercube sampling or ``'sobol'`` for a scrambled Sobol
+            sequence, which requires :mod:`scipy.stats.qmc`.
+        :param executor: Optional executor such as a
+            :class:`concurrent.futures.ProcessPoolExecutor`, whose ``map`` is
+            used to fit from several starting points concurrently. Every
+            worker unpickles this fit only once, and then reuses it for all
+            starting points it is given.
+        :param n_workers: Number of workers of ``executor``. Defaults to the
+            number of CPUs.
+        :param n_converged: If given, stop as soon as this many fits ended
+            up in the minimum of the best fit so far. Starting points are
+            handed out in rounds of one per worker, so a round which has
+            started is always completed.
+        :param basin_tol: Relative and absolute tolerance on the best fit
+            parameters for two fits to have ended up in the same minimum.
+        :param seed: Seed for the random generation of the starting points.
+        :param minimize_options: keyword arguments to be passed to
+            :meth:`execute`.
+        :return: list of :class:`~symfit.core.fit_results.FitResults`, one for
+            every executed starting point, ranked by objective value with the
+            best result first.
+        """
+        n_starts = minimize_options.pop('n_starts')
+        sampling = minimize_options.pop('sampling')
+        executor = minimize_options.pop('executor')
+        n_workers = minimize_options.pop('n_workers')
+        n_converged = minimize_options.pop('n_converged')
+        basin_tol = minimize_options.pop('basin_tol')
+        seed = minimize_options.pop('seed')
+
+        params = self.minimizer.params
+        for param in params:
+            if param.min is None or param.max is None:
+                raise ValueError('Parameter {} needs both a min and a max to '
+                                 'generate starting points.'.format(param))
+        lower = np.array([param.min for param in params], dtype=float)
+        upper = np.array([param.max for param in params], dtype=float)
+        samples = _sample_unit_cube(n_starts, len(params), sampling,
+                                    np.random.RandomState(seed))
+        starts = [list(start) for start in lower + samples * (upper - lower)]
+
+        if executor is None:
+            func = lambda starts: [self._execute_from(start, **minimize_options)
+                                   for start in starts]
+            round_size = 1
+        else:
+            task = partial(_execute_pickled_fit, uuid.uuid4().hex,
+                           pickle.dumps(self, protocol=2), minimize_options)
+            func = lambda starts: list(executor.map(task, starts))
+            round_size = n_workers or cpu_count()
+
+        results = []
+        for round_start in range(0, n_starts, round_size):
+            results.extend(func(starts[round_start:round_start + round_size]))
+            results.sort(key=_ranking_value)
+            if n_converged is not None:
+                best_popt = results[0]._popt
+                n_best = sum(np.allclose(result._popt, best_popt,
+                                         rtol=basin_tol, atol=basin_tol)
+                             for result in results)
+                if n_best >= n_converged:
+                    break
+        return results
+
+    def _execute_from(self, initial_guesses, **minimize_options):
+        """
+        Execute the fit starting from ``initial_guesses`` instead of the
+        values of the parameters.
+
+        :return: FitResults instance
+        """
+        self.minimizer.initial_guesses = initial_guesses
+        try:
+            return self.execute(**minimize_options)
+        finally:
+            del self.minimizer._initial_guesses
+
+
+class BatchFit(TakesData):
+    """
+    Fit the same model to many independent datasets at once. Instead of
+    making a :class:`Fit` for every dataset, the data of the dependent
+    variables (and their sigma) is stacked, with the datasets along the first
+    axis. Data of the independent variables is either shared by all datasets,
+    or stacked in the same way.
+
+    The model and its Jacobian are evaluated for all datasets at once by
+    giving every parameter as a column of values, after which a
+    Levenberg-Marquardt step is taken for every dataset simultaneously.
+    Datasets which have converged are left out of subsequent iterations.
+    Bounds on the parameters are respected by clipping every step.
+
+    Example usage::
+
+        # ydata has shape (n_datasets, n_points)
+        fit = BatchFit(model, x=xdata, y=ydata)
+        fit_results = fit.execute()
+        fit_results.value(a)  # array of shape (n_datasets,)
+
+    This only supports least squares fitting, without constraints, of models
+    which have an ``eval_jacobian``.
+    """
+    def __init__(self, model, *ordered_data, **named_data):
+        """
+        :param model: (dict of) sympy expression(s) or ``Model`` object.
+        :param ordered_data: data for dependent, independent and sigma
+            variables, as with :class:`Fit`.
+        :param named_data: assign dependent, independent and sigma variables
+            data by name.
+        """
+        super(BatchFit, self).__init__(model, *ordered_data, **named_data)
+        if not hasattr(self.model, 'eval_jacobian'):
+            raise TypeError('BatchFit requires a model with an '
+                            '`eval_jacobian` method.')
+        shapes = set(data.shape for data in self.dependent_data.values()
+                     if data is not None)
+        if len(shapes) != 1 or len(next(iter(shapes))) < 2:
+            raise ValueError('The data of all dependent variables should be '
+                             'stacked into arrays of the same shape, with the '
+                             'datasets along the first axis.')
+        self._data_shape = shapes.pop()
+
+    def _independent_kwargs(self, rows):
+        """
+        :return: dict of the data of the independent variables for the
+            datasets ``rows``, by name.
+        """
+        kwargs = {}
+        for var, data in self.independent_data.items():
+            # Stacked data has the same dimensionality as the dependent data.
+            if np.ndim(data) == len(self._data_shape):
+                data = data[rows]
+            kwargs[var.name] = data
+        return kwargs
+
+    def _evaluate(self, params, rows, jacobian=True):
+        """
+        Evaluate the weighted residuals, and optionally their Jacobian, for
+        the datasets ``rows``.
+
+        :param params: array of shape (len(rows), n_params).
+        :param rows: array of indices of the datasets.
+        :return: array of residuals of shape (len(rows), n_points), and if
+            ``jacobian`` the Jacobian with shape
+            (len(rows), n_points, n_params), where n_points are all the
+            points of all components.
+        """
+        kwargs = self._independent_kwargs(rows)
+        param_shape = (len(rows),) + (1,) * (len(self._data_shape) - 1)
+        for idx, param in enumerate(self.model.params):
+            kwargs[param.name] = params[:, idx].reshape(param_shape)
+
+        outputs = self.model(**kwargs)._asdict()
+        if jacobian:
+            jacobians = self.model.eval_jacobian(**kwargs)._asdict()
+        residuals, jacs = [], []
+        for var, data in self.dependent_data.items():
+            if data is None:
+                continue
+            sigma = self.data[self.model.sigmas[var]][rows]
+            shape = (len(rows),) + self._data_shape[1:]
+            residual = (np.broadcast_to(outputs[var], shape) - data[rows]) / sigma
+            residuals.append(residual.reshape(len(rows), -1))
+            if jacobian:
+                jac = np.broadcast_to(jacobians[var],
+                                      (len(self.model.params),) + shape) / sigma
+                jacs.append(np.moveaxis(jac, 0, -1).reshape(
+                    len(rows), -1, len(self.model.params))
+                )
+        if jacobian:
+            return np.concatenate(residuals, axis=1), np.concatenate(jacs, axis=1)
+        return np.concatenate(residuals, axis=1)
+
+    @keywordonly(initial_params=None, max_iterations=100, ftol=1e-10,
+                 xtol=1e-10, gtol=1e-10, damping=1e-3)
+    def execute(self, **options):
+        """
+        Execute the fit for all datasets.
+
+        :param initial_params: Optional array of shape
+            (n_datasets, n_params) with the starting point for every dataset.
+            By default, the values of the parameters are used.
+        :param max_iterations: Maximum number of iterations per dataset.
+        :param ftol: A dataset has converged when an iteration reduces its
+            chi squared by a relative amount smaller than this.
+        :param xtol: A dataset has converged when an iteration changes its
+            parameters by a relative amount smaller than this.
+        :param gtol: A dataset has converged when every component of the
+            gradient of its chi squared is at most this. This includes
+            datasets which are fit perfectly, whose chi squared cannot
+            improve from 0.
+        :param damping: Initial damping factor of the Levenberg-Marquardt
+            steps. Every accepted step divides it by ten, every rejected step
+            multiplies it by ten.
+        :return: :class:`~symfit.core.fit_results.BatchFitResults`
+        """
+        initial_params = options.pop('initial_params')
+        max_iterations = options.pop('max_iterations')
+        ftol = options.pop('ftol')
+        xtol = options.pop('xtol')
+        gtol = options.pop('gtol')
+        damping = options.pop('damping')
+
+        params = self.model.params
+        n_datasets = self._data_shape[0]
+        if initial_params is None:
+            initial_params = [param.value for param in params]
+        popt = np.array(np.broadcast_to(initial_params,
+                                        (n_datasets, len(params))), dtype=float)
+        free = np.array([not param.fixed for param in params])
+        lower = np.array([-np.inf if p.min is None else p.min for p in params])
+        upper = np.array([np.inf if p.max is None else p.max for p in params])
+
+        status = np.zeros(n_datasets, dtype=int)
+        iterations = np.zeros(n_datasets, dtype=int)
+        lambdas = np.full(n_datasets, float(damping))
+        chi_squared = np.empty(n_datasets)
+
+        active = np.arange(n_datasets)
+        residuals, jac = self._evaluate(popt, active)
+        chi_squared[active] = np.sum(residuals ** 2, axis=1)
+        n_free = np.sum(free)
+        for _ in range(max_iterations):
+            if not len(active):
+                break
+            jac_free = jac[..., free]
+            jtr = np.einsum('nmi,nm->ni', jac_free, residuals)
+            # No step can improve on a stationary point, such as a perfect
+            # fit. The gradient of chi squared is 2 J^T r.
+            stationary = np.all(2 * np.abs(jtr) <= gtol, axis=1)
+            status[active[stationary]] = 3
+            active = active[~stationary]
+            residuals, jac = residuals[~stationary], jac[~stationary]
+            jac_free, jtr = jac_free[~stationary], jtr[~stationary]
+            if not len(active):
+                break
+
+            # Solve the damped normal equations of every dataset at once.
+            jtj = np.einsum('nmi,nmj->nij', jac_free, jac_free)
+            diagonal = np.einsum('nii->ni', jtj)
+            diagonal = np.where(diagonal > 0, diagonal, 1.0)
+            damped = jtj.copy()
+            damped[:, np.arange(n_free), np.arange(n_free)] += (
+                lambdas[active, np.newaxis] * diagonal
+            )
+            step = - np.linalg.solve(damped, jtr[..., np.newaxis])[..., 0]
+
+            trial = popt[active].copy()
+            trial[:, free] = np.clip(trial[:, free] + step,
+                                     lower[free], upper[free])
+            trial_chi_squared = np.sum(
+                self._evaluate(trial, active, jacobian=False) ** 2, axis=1
+            )
+            iterations[active] += 1
+
+            # Accepted steps make the step size grow, rejected steps shrink it.
+            accepted = trial_chi_squared < chi_squared[active]
+            lambdas[active[accepted]] /= 10
+            lambdas[active[~accepted]] *= 10
+            status[active[~accepted & (lambdas[active] > 1e16)]] = -1
+
+            reduction = chi_squared[active] - trial_chi_squared
+            change = np.abs(trial - popt[active])[:, free]
+            small_change = np.all(
+                change <= xtol * (np.abs(trial[:, free]) + xtol), axis=1
+            )
+            status[active[accepted & small_change]] = 2
+            status[active[accepted & (reduction <= ftol * chi_squared[active])]] = 1
+            popt[active[accepted]] = trial[accepted]
+            chi_squared[active[accepted]] = trial_chi_squared[accepted]
+
+            # Only the datasets which moved need to be evaluated again.
+            still_active = status[active] == 0
+            moved = accepted[still_active]
+            active = active[still_active]
+            residuals, jac = residuals[still_active], jac[still_active]
+            if np.any(moved):
+                residuals[moved], jac[moved] = self._evaluate(popt[active[moved]],
+                                                              active[moved])
+
+        covariance_matrix = self._covariance_matrix(popt, chi_squared, free)
+        return BatchFitResults(self.model, popt, covariance_matrix,
+                               chi_squared, status, iterations)
+
+    def _covariance_matrix(self, popt, chi_squared, free):
+        """
+        :return: array of shape (n_datasets, n_params, n_params) with the
+            covariance matrix of every dataset, estimated as the inverse of
+            :math:`J^T W J`.
+        """
+        _, jac = self._evaluate(popt, np.arange(len(popt)))
+        jac = jac[..., free]
+        free_cov = np.linalg.pinv(np.einsum('nmi,nmj->nij', jac, jac))
+        if not self.absolute_sigma:
+            dof = jac.shape[1] - np.sum(free)
+            free_cov *= (chi_squared / dof)[:, np.newaxis, np.newaxis]
+        cov = np.zeros(popt.shape + popt.shape[1:])
+        cov[:, free[:, np.newaxis] & free] = free_cov.reshape(len(popt), -1)
+        return cov
+
+
+#: Fits unpickled by the current worker thread, see _execute_pickled_fit.
+_worker_state = threading.local()
+
+
+def _parameter_blocks(objective):
+    """
+    Split the parameters of a least squares objective into blocks of local
+    parameters, which only a single component with data depends on, and the
+    shared parameters which are left. In that case the Hessian is
+    block-arrowhead shaped: besides the rows and columns of the shared
+    parameters, it is block-diagonal.
+
+    :param objective: :class:`~symfit.core.objectives.LeastSquares` instance.
+    :return: tuple of the list of local blocks and the shared parameters,
+        all as arrays of parameter indices. ``None`` if there are less than
+        two local blocks, in which case there is nothing to gain.
+    """
+    components = [
+        indices for var, indices in objective._component_parameters.items()
+        if objective.dependent_data.get(var, None) is not None
+    ]
+    counts = np.zeros(len(objective.model.params), dtype=int)
+    for indices in components:
+        counts[indices] += 1
+    blocks = [indices[counts[indices] == 1] for indices in components]
+    blocks = [block for block in blocks if len(block)]
+    if len(blocks) < 2:
+        return None
+    shared = np.flatnonzero(counts != 1)
+    return blocks, shared
+
+
+def _inverse_block_arrowhead(matrix, blocks, shared):
+    """
+    Invert a symmetric block-arrowhead matrix using the Schur complement of
+    its block-diagonal part. Only the diagonal blocks and the Schur complement
+    of the shared part are ever inverted, which is much cheaper than inverting
+    the matrix as a whole when there are many blocks.
+
+    :param matrix: Symmetric matrix to invert.
+    :param blocks: list of index arrays of the diagonal blocks.
+    :param shared: index array of the rows and columns outside of the blocks.
+    :return: The inverse of ``matrix``.
+    :raises: :class:`numpy.linalg.LinAlgError` if any of the inverted blocks
+        is singular.
+    """
+    schur = matrix[np.ix_(shared, shared)]
+    block_invs = []
+    block_inv_couplings = []
+    for block in blocks:
+        block_inv = np.linalg.inv(matrix[np.ix_(block, block)])
+        block_inv_coupling = block_inv.dot(matrix[np.ix_(block, shared)])
+        schur = schur - matrix[np.ix_(shared, block)].dot(block_inv_coupling)
+        block_invs.append(block_inv)
+        block_inv_couplings.append(block_inv_coupling)
+    schur_inv = np.linalg.inv(schur)
+
+    local = np.concatenate(blocks)
+    coupling = np.vstack(block_inv_couplings)
+    cross = - coupling.dot(schur_inv)
+    local_inv = - cross.dot(coupling.T)
+    start = 0
+    for block_inv in block_invs:
+        end = start + len(block_inv)
+        local_inv[start:end, start:end] += block_inv
+        start = end
+
+    inverse = np.empty_like(matrix, dtype=np.result_type(matrix, float))
+    inverse[np.ix_(local, local)] = local_inv
+    inverse[np.ix_(local, shared)] = cross
+    inverse[np.ix_(shared, local)] = cross.T
+    inverse[np.ix_(shared, shared)] = schur_inv
+    return inverse
+
+
+def _execute_pickled_fit(token, pickled_fit, minimize_options, initial_guesses):
+    """
+    Execute a pickled fit from ``initial_guesses``. This is run by the
+    workers of :meth:`Fit.execute_multistart`, which unpickle every fit only
+    once such that its model does not have to be compiled again for every
+    starting point.
+
+    :param token: str identifying the pickled fit.
+    :param pickled_fit: the pickled :class:`Fit`.
+    :return: FitResults instance
+    """
+    fits = getattr(_worker_state, 'fits', None)
+    if fits is None:
+        fits = _worker_state.fits = OrderedDict()
+    if token not in fits:
+        fits[token] = pickle.loads(pickled_fit)
+        # Only the fits of the last few calls are worth remembering.
+        while len(fits) > 2:
+            fits.popitem(last=False)
+    return fits[token]._execute_from(initial_guesses, **minimize_options)
+
+
+def _sample_unit_cube(n_samples, n_dims, sampling, random_state):
+    """
+    :param sampling: ``'lhs'`` or ``'sobol'``.
+    :param random_state: :class:`numpy.random.RandomState` to use.
+    :return: array of shape (n_samples, n_dims) of points in the unit cube.
+    """
+    if sampling == 'lhs':
+        # Every dimension is divided into n_samples strata, which are each
+        # sampled once in random order.
+        strata = np.array([random_state.permutation(n_samples)
+                           for _ in range(n_dims)]).T
+        return (strata + random_state.uniform(size=strata.shape)) / n_samples
+    elif sampling == 'sobol':
+        from scipy.stats import qmc
+        sampler = qmc.Sobol(n_dims, seed=random_state.randint(2 ** 31))
+        return sampler.random(n_samples)
+    else:
+        raise ValueError("Unknown sampling method '{}', use 'lhs' or "
+                         "'sobol'.".format(sampling))
+
+
+def _ranking_value(fit_result):
+    """
+    :return: the objective value of ``fit_result`` as a scalar, where the
+        residuals of e.g. :class:`~symfit.core.objectives.VectorLeastSquares`
+        are squared and summed.
+    """
+    value = fit_result.objective_value
+    if np.ndim(value):
+        return np.sum(np.square(value))
+    return value
@@ -255,6 +255,108 @@ class FitResults(object):
         return gof_qualifiers
 
 
+class BatchFitResults(object):
+    """
+    Results of fitting one model to many datasets with
+    :class:`~symfit.core.fit.BatchFit`. Instead of one
+    :class:`FitResults` per dataset, every quantity is stored as an array
+    with the datasets along the first axis.
+
+    :ivar popt: array of shape (n_datasets, n_params) with the best fit
+        parameters, in the order of ``model.params``.
+    :ivar covariance_matrix: array of shape (n_datasets, n_params, n_params).
+        Fixed parameters have zero (co)variance.
+    :ivar chi_squared: array of shape (n_datasets,).
+    :ivar status: array of shape (n_datasets,) of ints, whose meaning is given
+        by :attr:`status_messages`.
+    :ivar iterations: array of shape (n_datasets,) with the number of
+        iterations performed for every dataset.
+    """
+    #: Meaning of the values of ``status``.
+    status_messages = {
+        0: 'Maximum number of iterations reached.',
+        1: 'Relative reduction of chi squared is at most ftol.',
+        2: 'Relative change of the parameters is at most xtol.',
+        3: 'The gradient of chi squared is at most gtol.',
+        -1: 'No step reducing chi squared could be found.',
+    }
+
+    def __init__(self, model, popt, covariance_matrix, chi_squared, status,
+                 iterations):
+        """
+        :param model: :class:`~symfit.core.models.Model` that was fit to.
+        :param popt: best fit parameters, see :attr:`popt`.
+        :param covariance_matrix: see :attr:`covariance_matrix`.
+        :param chi_squared: see :attr:`chi_squared`.
+        :param status: see :attr:`status`.
+        :param iterations: see :attr:`iterations`.
+        """
+        self.model = model
+        self.popt = popt
+        self.covariance_matrix = covariance_matrix
+        self.chi_squared = chi_squared
+        self.status = status
+        self.iterations = iterations
+        self.params = OrderedDict(
+            (p.name, popt[:, idx]) for idx, p in enumerate(self.model.params)
+        )
+
+    def __len__(self):
+        return len(self.popt)
+
+    def __str__(self):
+        res = '\nParameter Mean         Standard Deviation (over datasets)\n'
+        for p in self.model.params:
+            res += '{:10}{:e} {:e}\n'.format(p.name, np.mean(self.value(p)),
+                                             np.std(self.value(p)))
+        res += '\n{:<22} {}\n'.format('Number of datasets', len(self))
+        for code, message in sorted(self.status_messages.items()):
+            res += '{:<22} {}\n'.format(
+                'Status {}'.format(code), np.sum(self.status == code)
+            )
+        return res
+
+    @property
+    def converged(self):
+        """
+        :return: boolean array indicating which datasets converged.
+        """
+        return self.status > 0
+
+    def value(self, param):
+        """
+        :param param: ``Parameter`` Instance.
+        :return: array of the values of ``param`` for every dataset.
+        """
+        return self.params[param.name]
+
+    def variance(self, param):
+        """
+        :param param: ``Parameter`` Instance.
+        :return: array of the variances of ``param`` for every dataset.
+        """
+        param_number = self.model.params.index(param)
+        return self.covariance_matrix[:, param_number, param_number]
+
+    def stdev(self, param):
+        """
+        :param param: ``Parameter`` Instance.
+        :return: array of the standard deviations of ``param`` for every
+            dataset.
+        """
+        return np.sqrt(self.variance(param))
+
+    def covariance(self, param_1, param_2):
+        """
+        :param param_1: ``Parameter`` Instance.
+        :param param_2: ``Parameter`` Instance.
+        :return: array of the covariances of the two params for every dataset.
+        """
+        param_1_number = self.model.params.index(param_1)
+        param_2_number = self.model.params.index(param_2)
+        return self.covariance_matrix[:, param_1_number, param_2_number]
+
+
 def r_squared(model, fit_result, data):
     """
     Calculates the coefficient of determination, R^2, for the fit.
@@ -269,7 +371,9 @@ def r_squared(model, fit_result, data):
     y_is = [data[var] for var in model.dependent_vars if var in data]
     x_is = [data[var] for var in model.independent_vars if var in data]
     y_bars = [np.mean(y_i) if y_i is not None else None for y_i in y_is]
-    f_is = model(*x_is, **fit_result.params)._asdict()
+    # The model can be one with the fixed parameters substituted.
+    params = {p.name: fit_result.value(p) for p in model.params}
+    f_is = model(*x_is, **params)._asdict()
     # f_is also contains the evaluated interdependent_vars, skip those.
     f_is = [f_is[var] for var in model.dependent_vars]
     SS_res = np.sum([np.sum((y_i - f_i)**2) for y_i, f_i in zip(y_is, f_is) if y_i is not None])
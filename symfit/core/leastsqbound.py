@@ -4,7 +4,7 @@ import warnings
 
 from numpy import array, take, eye, triu, transpose, dot, finfo
 from numpy import empty_like, sqrt, cos, sin, arcsin, asarray
-from numpy import atleast_1d, shape, issubdtype, dtype, inexact
+from numpy import atleast_1d, shape, issubdtype, dtype, inexact, newaxis
 from scipy.optimize import _minpack, leastsq
 
 
@@ -300,7 +300,12 @@ def leastsqbound(func, x0, args=(), bounds=None, Dfun=None, full_output=0,
             maxfev = 100 * (n + 1)
 
         def wDfun(x, *args):  # wrapped Dfun
-            return Dfun(i2e(x), *args)
+            # Chain rule: scale the derivatives to every external parameter
+            # by the derivative of that parameter to the internal one.
+            grad = _internal2external_grad(x, bounds)
+            if col_deriv:
+                return asarray(Dfun(i2e(x), *args)) * grad[:, newaxis]
+            return asarray(Dfun(i2e(x), *args)) * grad
 
         retval = _minpack._lmder(wfunc, wDfun, i0, args, full_output,
                                  col_deriv, ftol, xtol, gtol, maxfev,
@@ -4,9 +4,11 @@ from collections import namedtuple, Counter, OrderedDict
 
 from scipy.optimize import (
     minimize, differential_evolution, basinhopping, NonlinearConstraint,
-    OptimizeResult
+    OptimizeResult, least_squares
 )
 from scipy.optimize import BFGS as soBFGS
+from scipy.linalg import solve_triangular
+from scipy import sparse
 import sympy
 import numpy as np
 
@@ -42,6 +44,32 @@ class BaseMinimizer(object):
         # Mapping which we use to track the original, to be used upon pickling
         self._pickle_kwargs = {'parameters': parameters, 'objective': objective}
         self.params = [p for p in parameters if not p.fixed]
+        # Indices of the free parameters among all parameters.
+        self._free_indices = [i for i, p in enumerate(parameters)
+                              if p not in self._fixed_params]
+
+    def _masked(self, out, axes):
+        """
+        Select the entries of ``out`` belonging to free parameters along
+        ``axes``. Objectives of a model in which the fixed parameters have
+        been substituted already return those entries only.
+
+        :param out: array with the parameters along ``axes``.
+        :param axes: tuple of the axes of ``out`` to select along.
+        :return: array with the free parameters along ``axes``.
+        """
+        n_params = len(self.parameters)
+        if (len(self._free_indices) == n_params or
+                out.shape[axes[0]] != n_params):
+            return out
+        index = [slice(None)] * out.ndim
+        if len(axes) == 1:
+            index[axes[0]] = self._free_indices
+        else:
+            free = np.ix_(*[self._free_indices] * len(axes))
+            for axis, indices in zip(axes, free):
+                index[axis] = indices
+        return out[tuple(index)]
 
     def _baseobjective_from_callable(self, func, objective_type=MinimizeModel):
         """
@@ -85,6 +113,44 @@ class BaseMinimizer(object):
         """
         pass
 
+    def _pack_output(self, ans):
+        """
+        Packs the output of a minimization in a
+        :class:`~symfit.core.fit_results.FitResults`.
+
+        :param ans: The output of a minimization as produced by
+            :func:`scipy.optimize.minimize`
+        :returns: :class:`~symfit.core.fit_results.FitResults`
+        """
+        best_vals = []
+        found = iter(np.atleast_1d(ans.x))
+        for param in self.parameters:
+            if param.fixed:
+                best_vals.append(param.value)
+            else:
+                best_vals.append(next(found))
+
+        parameters = self.parameters
+        if hasattr(self.objective, 'solve_projected'):
+            # The objective solves for some parameters itself, see
+            # VariableProjection. Add them to the results.
+            values = dict(zip(parameters, best_vals))
+            values.update(zip(self.objective.projected_params,
+                              self.objective.solve_projected(ans.x)))
+            parameters = sorted(values, key=lambda p: p.name)
+            best_vals = [values[p] for p in parameters]
+
+        fit_results = dict(
+            model=DummyModel(params=parameters),
+            popt=best_vals,
+            covariance_matrix=None,
+            objective=self.objective,
+            minimizer=self,
+            **ans
+        )
+
+        return FitResults(**fit_results)
+
     @property
     def initial_guesses(self):
         try:
@@ -157,8 +223,7 @@ class GradientMinimizer(BaseMinimizer):
             out = func(*args, **kwargs)
             # Make one dimensional, corresponding to a scalar function.
             out = np.atleast_1d(np.squeeze(out))
-            mask = [p not in self._fixed_params for p in self.parameters]
-            return out[mask]
+            return self._masked(out, (0,))
         return resized
 
 
@@ -193,8 +258,7 @@ class HessianMinimizer(GradientMinimizer):
             out = func(*args, **kwargs)
             # Make two dimensional, corresponding to a scalar function.
             out = np.atleast_2d(np.squeeze(out))
-            mask = [p not in self._fixed_params for p in self.parameters]
-            return np.atleast_2d(out[mask, mask])
+            return np.atleast_2d(self._masked(out, (0, 1)))
         return resized
 
 
@@ -270,7 +334,7 @@ class ChainedMinimizer(BaseMinimizer):
         for minimizer, kwargs in zip(self.minimizers, bound_arguments.arguments.values()):
             minimizer.initial_guesses = next_guess
             ans = minimizer.execute(**kwargs)
-            next_guess = list(ans.params.values())
+            next_guess = [ans.value(p) for p in self.params]
             answers.append(ans)
         final = answers[-1]
         # TODO: Compile all previous results in one, instead of just the
@@ -356,34 +420,6 @@ class ScipyMinimize(object):
         )
         return self._pack_output(ans)
 
-    def _pack_output(self, ans):
-        """
-        Packs the output of a minimization in a
-        :class:`~symfit.core.fit_results.FitResults`.
-
-        :param ans: The output of a minimization as produced by
-            :func:`scipy.optimize.minimize`
-        :returns: :class:`~symfit.core.fit_results.FitResults`
-        """
-        best_vals = []
-        found = iter(np.atleast_1d(ans.x))
-        for param in self.parameters:
-            if param.fixed:
-                best_vals.append(param.value)
-            else:
-                best_vals.append(next(found))
-
-        fit_results = dict(
-            model=DummyModel(params=self.parameters),
-            popt=best_vals,
-            covariance_matrix=None,
-            objective=self.objective,
-            minimizer=self,
-            **ans
-        )
-
-        return FitResults(**fit_results)
-
     @classmethod
     def method_name(cls):
         """
@@ -586,6 +622,37 @@ class TrustConstr(ScipyHessianMinimize, ScipyConstrainedMinimize, ScipyBoundedMi
             hessian = None
         return jacobian, hessian
 
+    def _objective_is_fused(self):
+        """
+        :return: bool, indicating if the jacobian and hessian are those of
+            ``self.objective``, such that they can be obtained from its
+            ``eval_fused``.
+        """
+        return (hasattr(self.objective, 'eval_fused') and
+                getattr(self.jacobian, '__self__', None) is self.objective and
+                getattr(self.hessian, '__self__', None) is self.objective)
+
+    def _fused_jacobian_hessian(self):
+        """
+        trust-constr asks for the jacobian and the hessian of the objective at
+        the same points. Therefore, compute both with a single call to the
+        ``eval_fused`` of the objective, and remember the result for the
+        second request.
+
+        :return: tuple of jacobian and hessian functions.
+        """
+        last = {}
+        def fused(x):
+            key = np.asarray(x, dtype=float).tobytes()
+            if last.get('key') != key:
+                last['key'] = key
+                last['ans'] = self.objective.eval_fused(x)
+            return last['ans']
+
+        jacobian = self.resize_jac(lambda x: fused(x)[1])
+        hessian = self.resize_hess(lambda x: fused(x)[2])
+        return jacobian, hessian
+
     def scipy_constraints(self, constraints):
         cons = super(TrustConstr, self).scipy_constraints(constraints)
         out = []
@@ -631,6 +698,8 @@ class TrustConstr(ScipyHessianMinimize, ScipyConstrainedMinimize, ScipyBoundedMi
         if hessian is None:
             hessian = auto_hessian
 
+        if jacobian is None and hessian is None and self._objective_is_fused():
+            jacobian, hessian = self._fused_jacobian_hessian()
         if jacobian is None:
             jacobian = self.wrapped_jacobian
         if hessian is None:
@@ -768,20 +837,48 @@ class MINPACK(ScipyBoundedMinimizer, GradientMinimizer):
     """
     Wrapper to scipy's implementation of MINPACK, since it is the industry
     standard.
+
+    If a ``jacobian`` is provided, it should return the Jacobian of the
+    residuals returned by the objective, such as
+    :meth:`~symfit.core.objectives.VectorLeastSquares.eval_jacobian` does,
+    with shape (n_residuals, n_params). MINPACK then uses it instead of
+    estimating the Jacobian by finite differences.
     """
     def __init__(self, *args, **kwargs):
         self.jacobian = None
         super(MINPACK, self).__init__(*args, **kwargs)
 
+    def resize_jac(self, func):
+        """
+        Removes the columns belonging to fixed parameters from the Jacobian of
+        the residuals returned by func, and returns it with the parameters
+        along the first axis. This is the layout MINPACK uses internally, so
+        with ``col_deriv`` it does not have to be transposed.
+
+        :param func: Jacobian function to be wrapped, returning an array of
+            shape (n_residuals, n_params).
+        :return: Jacobian function returning an array of shape
+            (n_free_params, n_residuals).
+        """
+        if func is None:
+            return None
+        @wraps(func)
+        def resized(*args, **kwargs):
+            out = np.atleast_2d(func(*args, **kwargs)).T
+            return self._masked(out, (0,))
+        return resized
+
     def execute(self, **minpack_options):
         """
         :param \*\*minpack_options: Any named arguments to be passed to leastsqbound
         """
+        if self.wrapped_jacobian is not None:
+            minpack_options.setdefault('Dfun', self.wrapped_jacobian)
+            minpack_options.setdefault('col_deriv', True)
         # These are the corresponding names for OptimizeResult
         output_names = ['x', 'hess_inv', 'infodic', 'message', 'status']
         full_output = leastsqbound(
             self.objective,
-            # Dfun=self.jacobian,
             x0=self.initial_guesses,
             bounds=self.bounds,
             full_output=True,
@@ -795,3 +892,206 @@ class MINPACK(ScipyBoundedMinimizer, GradientMinimizer):
         ans['nit'] = ans.infodic['nfev']  # Nearest indication of nit.
 
         return self._pack_output(ans)
+
+
+class TrustRegionReflective(ScipyBoundedMinimizer, GradientMinimizer):
+    """
+    Wrapper around :func:`scipy.optimize.least_squares`, which uses the
+    Gauss-Newton structure of least-squares problems and supports bounds
+    natively. By default its Trust Region Reflective algorithm is used, but
+    ``method='dogbox'`` or ``method='lm'`` can be passed to
+    :meth:`execute` as well.
+
+    The objective has to provide the residuals through ``eval_residuals``,
+    like :class:`~symfit.core.objectives.LeastSquares` does. If a
+    ``jacobian`` is provided, it should return the Jacobian of the residuals,
+    such as :meth:`~symfit.core.objectives.LeastSquares.eval_residual_jacobian`
+    does, with shape (n_residuals, n_params).
+    """
+    #: Maximum fraction of the Jacobian which can be structurally nonzero for
+    #: it to be treated as a sparse matrix.
+    max_sparse_density = 0.5
+
+    def __init__(self, *args, **kwargs):
+        super(TrustRegionReflective, self).__init__(*args, **kwargs)
+        if not hasattr(self.objective, 'eval_residuals'):
+            raise TypeError('{} requires an objective which provides its '
+                            'residuals, such as LeastSquares.'
+                            ''.format(self.__class__.__name__))
+
+    def resize_jac(self, func):
+        """
+        Removes the columns belonging to fixed parameters from the Jacobian of
+        the residuals returned by func.
+
+        :param func: Jacobian function to be wrapped, returning an array of
+            shape (n_residuals, n_params).
+        :return: Jacobian function returning an array of shape
+            (n_residuals, n_free_params).
+        """
+        if func is None:
+            return None
+        @wraps(func)
+        def resized(*args, **kwargs):
+            out = func(*args, **kwargs)
+            if not sparse.issparse(out):
+                out = np.atleast_2d(out)
+            return self._masked(out, (1,))
+        return resized
+
+    @classmethod
+    def is_sparse(cls, pattern):
+        """
+        :param pattern: sparsity pattern of a Jacobian, as a
+            :mod:`scipy.sparse` matrix.
+        :return: ``True`` if the Jacobian is sparse enough to be treated as a
+            sparse matrix.
+        """
+        size = np.prod(pattern.shape)
+        return size > 0 and pattern.nnz <= cls.max_sparse_density * size
+
+    @keywordonly(method='trf', jac_sparsity=None, tol=1e-9)
+    def execute(self, **least_squares_options):
+        """
+        :param method: ``'trf'``, ``'dogbox'`` or ``'lm'``.
+        :param tol: Default for the ``ftol``, ``xtol`` and ``gtol`` tolerances
+            of :func:`scipy.optimize.least_squares`.
+        :param jac_sparsity: Sparsity structure of the Jacobian of the
+            residuals with respect to the free parameters, with shape
+            (n_residuals, n_free_params). With an analytical Jacobian, it is
+            then returned as a :mod:`scipy.sparse` matrix and the
+            trust-region subproblems are solved with ``lsmr``. Otherwise it
+            is used to estimate the Jacobian with fewer function evaluations.
+            By default, the sparsity pattern of the objective is used for the
+            latter if it is sparse enough.
+        :param \*\*least_squares_options: Any named arguments to be passed
+            to :func:`scipy.optimize.least_squares`.
+        """
+        jac_sparsity = least_squares_options.pop('jac_sparsity')
+        tol = least_squares_options.pop('tol')
+        for name in ['ftol', 'xtol', 'gtol']:
+            least_squares_options.setdefault(name, tol)
+        jacobian = self.wrapped_jacobian
+        if jacobian is None:
+            jacobian = '2-point'
+            if (jac_sparsity is None and least_squares_options['method'] != 'lm'
+                    and hasattr(self.objective, 'residual_jacobian_sparsity')):
+                pattern = self._masked(
+                    self.objective.residual_jacobian_sparsity, (1,)
+                )
+                if self.is_sparse(pattern):
+                    jac_sparsity = pattern
+            least_squares_options['jac_sparsity'] = jac_sparsity
+        elif least_squares_options['method'] == 'lm':
+            # lm only handles dense Jacobians.
+            sparse_jacobian = jacobian
+            def jacobian(x):
+                jac = sparse_jacobian(x)
+                return jac.toarray() if sparse.issparse(jac) else jac
+        elif jac_sparsity is not None:
+            pattern = sparse.csr_matrix(jac_sparsity, dtype=bool)
+            dense_jacobian = jacobian
+            def jacobian(x):
+                return pattern.multiply(dense_jacobian(x)).tocsr()
+            least_squares_options.setdefault('tr_solver', 'lsmr')
+        least_squares_options.setdefault('jac', jacobian)
+
+        lower = np.array([-np.inf if bound[0] is None else bound[0]
+                          for bound in self.bounds], dtype=float)
+        upper = np.array([np.inf if bound[1] is None else bound[1]
+                          for bound in self.bounds], dtype=float)
+        # least_squares needs every lower bound to be below its upper bound,
+        # so equal bounds are widened as for fixed parameters.
+        upper = np.where(lower < upper, upper, np.nextafter(lower, np.inf))
+        # It also refuses initial guesses outside of the bounds.
+        initial_guesses = np.clip(self.initial_guesses, lower, upper)
+
+        residuals = self.objective.eval_residuals(initial_guesses)
+        if not np.all(np.isfinite(residuals)):
+            # E.g. NaN in the data. Fail like the other minimizers do.
+            ans = OptimizeResult(
+                x=initial_guesses, fun=self.objective(initial_guesses),
+                nfev=1, nit=0, status=3, success=False,
+                message='NaN result encountered.'
+            )
+            return self._pack_output(ans)
+
+        ans = least_squares(
+            self.objective.eval_residuals,
+            initial_guesses,
+            bounds=(lower, upper),
+            **least_squares_options
+        )
+        # least_squares calls the residuals fun, and their cost is the value
+        # of the objective.
+        ans['residuals'], ans['fun'] = ans.fun, ans.cost
+        ans['nit'] = ans.nfev  # Nearest indication of nit.
+        return self._pack_output(ans)
+
+
+class LinearLeastSquares(BaseMinimizer):
+    """
+    Solves least squares problems of models which are linear in all their
+    free parameters in closed form, instead of iteratively. The design
+    matrix is the Jacobian of the weighted residuals, which does not depend
+    on the parameters. It is evaluated once and the problem is solved by a
+    QR decomposition of it, which also gives the exact inverse of the
+    Hessian of the objective as ``hess_inv``.
+
+    The objective has to provide its residuals like
+    :class:`~symfit.core.objectives.LeastSquares` does, and its model needs
+    ``linear_params``, like :class:`~symfit.core.models.CallableModel`.
+    Bounds are not supported.
+    """
+    def __init__(self, *args, **kwargs):
+        super(LinearLeastSquares, self).__init__(*args, **kwargs)
+        if not hasattr(self.objective, 'eval_residual_jacobian'):
+            raise TypeError('{} requires an objective which provides its '
+                            'residuals, such as LeastSquares.'
+                            ''.format(self.__class__.__name__))
+        linear = getattr(self.objective.model, 'linear_params', [])
+        if any(p not in linear for p in self.objective.model.free_params):
+            raise TypeError('{} requires a model which is linear in all its '
+                            'free parameters.'
+                            ''.format(self.__class__.__name__))
+
+    def execute(self, **options):
+        """
+        :param options: Not used, no options are needed to find the exact
+            solution.
+        """
+        # The residuals are linear in the parameters, so evaluating them and
+        # the design matrix at the initial guesses gives the complete problem.
+        x0 = np.array(self.initial_guesses, dtype=float)
+        residuals = self.objective.eval_residuals(x0)
+        design = self._masked(
+            np.atleast_2d(self.objective.eval_residual_jacobian(x0)), (1,)
+        )
+        if not (np.all(np.isfinite(residuals)) and
+                np.all(np.isfinite(design))):
+            # E.g. NaN in the data. Fail like the iterative minimizers do.
+            ans = OptimizeResult(
+                x=x0, fun=self.objective(x0), hess_inv=None, nfev=2, nit=0,
+                status=3, success=False, message='NaN result encountered.'
+            )
+            return self._pack_output(ans)
+        q, r = np.linalg.qr(design)
+        if np.linalg.matrix_rank(r) == len(self.params):
+            x = x0 + solve_triangular(r, - q.T.dot(residuals))
+            r_inv = solve_triangular(r, np.eye(len(self.params)))
+            hess_inv = r_inv.dot(r_inv.T)
+            status, message = 0, ('Solved the linear least squares problem '
+                                  'in closed form.')
+        else:
+            # Not all parameters can be determined, so the minimum-norm
+            # solution is returned as a failed fit.
+            x = x0 + np.linalg.lstsq(design, - residuals, rcond=None)[0]
+            hess_inv = None
+            status, message = 2, ('The design matrix is rank deficient, not '
+                                  'all parameters can be determined.')
+
+        ans = OptimizeResult(
+            x=x, fun=self.objective(x), hess_inv=hess_inv, nfev=2, nit=0,
+            status=status, success=status == 0, message=message
+        )
+        return self._pack_output(ans)
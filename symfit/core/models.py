@@ -1,17 +1,24 @@
 from collections import Mapping, OrderedDict
+from multiprocessing import cpu_count
+import keyword
 import operator
 import warnings
 import sys
+import uuid
 
 import sympy
 from sympy.core.relational import Relational
 import numpy as np
-from toposort import toposort
-from scipy.integrate import odeint
+from toposort import toposort, toposort_flatten
+from scipy.integrate import odeint, solve_ivp
+from scipy.sparse import csc_matrix, csr_matrix
 
 from .argument import Parameter, Variable
+from .backends import NumPyBackend
+from .cache import SourceCache
 from .support import (
-    seperate_symbols, keywordonly, sympy_to_py, partial, cached_property, D
+    seperate_symbols, keywordonly, sympy_to_py, sympy_to_py_cse, partial,
+    cached_property, D, isidentifier
 )
 
 if sys.version_info >= (3,0):
@@ -86,6 +93,10 @@ class ModelOutput(tuple):
     def __len__(self):
         return len(self.output_dict)
 
+    def __reduce__(self):
+        # Needed to send model output between processes.
+        return self.__class__, (list(self.variables), list(self.output))
+
 
 class ModelError(Exception):
     """
@@ -94,6 +105,52 @@ class ModelError(Exception):
     pass
 
 
+class HoistedData(dict):
+    """
+    Remembers the subexpressions of the generated code of a model which only
+    depend on its independent variables and fixed parameters. Objectives keep
+    one for their data, and pass it to the model as the keyword
+    ``hoisted_data``. These subexpressions are then computed on the first
+    evaluation of the model, and reused for every other evaluation with the
+    same data.
+
+    The values are stored by the generated function they belong to. The
+    stored arrays are made read-only, and the total size of everything stored
+    is kept in :attr:`size`.
+    """
+    #: Maximum total size in bytes of the stored values. Values which do not
+    #: fit are computed again on every evaluation instead.
+    max_size = 2 ** 28
+
+    def __init__(self):
+        super(HoistedData, self).__init__()
+        #: Total size in bytes of the stored values.
+        self.size = 0
+
+    def get(self, func, args):
+        """
+        :param func: function generated by
+            :func:`~symfit.core.support.sympy_to_py_source`, which has the
+            function computing its hoisted subexpressions as the attribute
+            ``hoisted``.
+        :param args: the arguments ``func`` is called with.
+        :return: tuple of the hoisted subexpressions of ``func``.
+        """
+        try:
+            return self[func]
+        except KeyError:
+            pass
+        values = func.hoisted(*args)
+        size = sum(np.asarray(value).nbytes for value in values)
+        if self.size + size <= self.max_size:
+            for value in values:
+                if isinstance(value, np.ndarray):
+                    value.setflags(write=False)
+            self[func] = values
+            self.size += size
+        return values
+
+
 class BaseModel(Mapping):
     """
     ABC for ``Model``'s. Makes sure models are iterable.
@@ -383,23 +440,63 @@ class BaseModel(Mapping):
             connectivity[var] = set(vars + params)
         return connectivity
 
-    @property
+    @cached_property
     def ordered_symbols(self):
         """
         :return: list of all symbols in this model, topologically sorted so they
             can be evaluated in the correct order.
 
             Within each group of equal priority symbols, we sort by the order of
-            the derivative.
+            the derivative, and then by name.
         """
         key_func = lambda s: [isinstance(s, sympy.Derivative),
-                           isinstance(s, sympy.Derivative) and s.derivative_count]
+                           isinstance(s, sympy.Derivative) and s.derivative_count,
+                           str(s)]
         symbols = []
         for symbol in toposort(self.connectivity_mapping):
             symbols.extend(sorted(symbol, key=key_func))
 
         return symbols
 
+    @cached_property
+    def _parameter_dependencies(self):
+        """
+        :return: dict of every variable in this model to the set of parameters
+            it depends on, either directly or through other variables.
+        """
+        dependencies = {}
+        for symbol in self.ordered_symbols:
+            if symbol in self.connectivity_mapping:
+                found = set()
+                for dependency in self.connectivity_mapping[symbol]:
+                    if isinstance(dependency, Parameter):
+                        found.add(dependency)
+                    else:
+                        found.update(dependencies.get(dependency, ()))
+                dependencies[symbol] = found
+        return dependencies
+
+    @cached_property
+    def jacobian_sparsity(self):
+        """
+        :return: :class:`scipy.sparse.csr_matrix` of booleans with shape
+            (n_components, n_params), which is ``True`` where a component of
+            this model depends on a parameter. All other entries of the
+            Jacobian are structurally zero. In e.g. global fits, every
+            component typically depends on only a few of the parameters.
+        """
+        rows, columns = [], []
+        for row, var in enumerate(self):
+            dependencies = self._parameter_dependencies.get(var, self.params)
+            for column, param in enumerate(self.params):
+                if param in dependencies:
+                    rows.append(row)
+                    columns.append(column)
+        return csr_matrix(
+            (np.ones(len(rows), dtype=bool), (rows, columns)),
+            shape=(len(self), len(self.params))
+        )
+
     @cached_property
     def vars(self):
         """
@@ -602,18 +699,71 @@ class BaseCallableModel(BaseModel):
         :return: evaluated lambda functions of each of the components in
             model_dict, to be used in numerical calculation.
         """
+        hoisted_data = kwargs.pop('hoisted_data', None)
+        n_slots, steps, output_slots = self._evaluation_plan
+        values = self._positional_arguments(args, kwargs)
+        values.extend([None] * (n_slots - len(values)))
+        # Evaluate the variables in topological order.
+        for slot, component, arg_slots, arg_names in steps:
+            if arg_names is None:
+                values[slot] = _call_hoisted(
+                    component, [values[i] for i in arg_slots], hoisted_data
+                )
+            else:
+                values[slot] = component(
+                    **{name: values[i] for name, i in zip(arg_names, arg_slots)}
+                )
+
+        return [np.atleast_1d(values[slot]) for slot in output_slots]
+
+    def _positional_arguments(self, args, kwargs):
+        """
+        :return: list of the arguments to this model, in the order of its
+            signature. Binding to the signature is skipped if all arguments
+            are already provided positionally.
+        """
+        if not kwargs and len(args) == len(self.__signature__.parameters):
+            return list(args)
         bound_arguments = self.__signature__.bind(*args, **kwargs)
-        kwargs = bound_arguments.arguments  # Only work with kwargs
+        return [bound_arguments.arguments[name]
+                for name in self.__signature__.parameters]
+
+    @cached_property
+    def _evaluation_plan(self):
+        """
+        Plan to evaluate the components of this model in topological order,
+        which is made once such that calling the model does not have to
+        resolve the dependencies of every component by name each time.
+
+        All values are stored in a list of slots, starting with the arguments
+        of the model in the order of its signature, followed by the
+        components in evaluation order.
+
+        :return: tuple of the total number of slots, a list of steps, and the
+            slots corresponding to the components of the model. Every step is
+            a tuple of the slot to fill, the numerical component, the slots of
+            its arguments, and the names of those arguments if it cannot be
+            called positionally or ``None`` otherwise.
+        """
+        slots = {name: index for index, name
+                 in enumerate(self.__signature__.parameters)}
         components = dict(zip(self, self.numerical_components))
-        # Evaluate the variables in topological order.
+        steps = []
         for symbol in self.ordered_symbols:
-            if symbol.name not in kwargs:
-                dependencies = self.connectivity_mapping[symbol]
-                dependencies_kwargs = {d.name: kwargs[d.name]
-                                       for d in dependencies}
-                kwargs[symbol.name] = components[symbol](**dependencies_kwargs)
-
-        return [np.atleast_1d(kwargs[var.name]) for var in self]
+            if symbol.name in slots:
+                continue
+            dependencies = [d.name for d in self.connectivity_mapping[symbol]]
+            component = components[symbol]
+            arg_names = _positional_order(component, dependencies)
+            if arg_names is None:
+                arg_names = dependencies
+                keywords = tuple(dependencies)
+            else:
+                keywords = None
+            arg_slots = tuple(slots[name] for name in arg_names)
+            slots[symbol.name] = len(slots)
+            steps.append((slots[symbol.name], component, arg_slots, keywords))
+        return len(slots), steps, [slots[var.name] for var in self]
 
     def numerical_components(self):
         """
@@ -635,6 +785,8 @@ class BaseCallableModel(BaseModel):
     def params(self, value):
         self._params = value
         self.__signature__ = self._make_signature()
+        # The evaluation plan depends on the order of the arguments.
+        del self._evaluation_plan
 
     def _make_signature(self):
         # Handle args and kwargs according to the allowed names.
@@ -674,71 +826,140 @@ class BaseGradientModel(BaseCallableModel):
     Any subclass of this baseclass which does not implement its own
     `eval_jacobian` will inherit a finite difference gradient.
     """
-    @keywordonly(dx=1e-8)
+    #: Whether the model can be evaluated for many parameter values at once,
+    #: by providing the parameters as arrays which broadcast against the data.
+    #: If a model turns out not to support this, this is set to ``False``.
+    _broadcasts_params = True
+
+    @keywordonly(dx=1e-8, order=6, method='central', executor=None,
+                 n_workers=None)
     def finite_difference(self, *args, **kwargs):
         """
         Calculates a numerical approximation of the Jacobian of the model using
-        the sixth order central finite difference method. Accepts a `dx`
-        keyword to tune the relative stepsize used.
-        Makes 6*n_params calls to the model.
-
+        finite differences. Accepts a `dx` keyword to tune the relative
+        stepsize used.
+
+        If possible, all the points of the stencil are evaluated in a single
+        call to the model, by providing the parameters as arrays which
+        broadcast against the data. Otherwise, the model is called once per
+        point of the stencil, using ``executor`` if one is provided.
+
+        :param dx: Relative stepsize.
+        :param order: Order of accuracy of the finite difference. Central
+            differences support 2, 4 and 6 and forward differences 1, 2, 4 and
+            6. The stencil has ``order * n_params`` points, on top of the
+            point at which the Jacobian is evaluated.
+        :param method: Either ``'central'`` (default) or ``'forward'``.
+        :param executor: Optional executor such as a
+            :class:`concurrent.futures.ThreadPoolExecutor`, whose ``map`` is
+            used to evaluate the points of the stencil when the model does not
+            support broadcasting over the parameters.
+        :param n_workers: Number of workers of ``executor``, over which the
+            points of the stencil are divided. Defaults to the number of CPUs.
         :return: A numerical approximation of the Jacobian of the model as a
                  list with length n_components containing numpy arrays of shape
                  (n_params, n_datapoints)
         """
-        # See also: scipy.misc.derivative. It might be convinced to work, but
-        # it will make way too many function evaluations
         dx = kwargs.pop('dx')
+        executor = kwargs.pop('executor')
+        n_workers = kwargs.pop('n_workers')
+        weights, upper, lower = _finite_difference_stencil(
+            kwargs.pop('order'), kwargs.pop('method')
+        )
         bound_arguments = self.__signature__.bind(*args, **kwargs)
         var_vals = [bound_arguments.arguments[var.name] for var in self.independent_vars]
         param_vals = [bound_arguments.arguments[param.name] for param in self.params]
         param_vals = np.array(param_vals, dtype=float)
-        f = partial(self, *var_vals)
-        # See also: scipy.misc.central_diff_weights
-        factors = np.array((3/2., -3/5., 1/10.))
-        orders = np.arange(1, len(factors) + 1)
+        n_params = len(param_vals)
+
+        # Note: stepsize (h) depends on the parameter values, but it'd better
+        # not be (too close to) 0.
+        h = dx * np.where(np.abs(param_vals) >= 1e-7, param_vals, 1.0)
+        # All points of the stencil except the center, which is shared between
+        # the parameters. points has shape (n_params * n_offsets, n_params)
+        offsets = np.unique(np.concatenate([upper, lower]))
+        offsets = offsets[offsets != 0]
+        steps = np.eye(n_params)[:, np.newaxis, :] * h * offsets[:, np.newaxis]
+        points = (param_vals + steps).reshape(-1, n_params)
+
+        center = self(*(var_vals + list(param_vals)))
+        evaluated = None
+        if self._broadcasts_params:
+            evaluated = self._eval_broadcasted(var_vals, points, center)
+        if evaluated is None:
+            evaluated = self._eval_pointwise(var_vals, points, executor,
+                                             n_workers)
+
         out = []
-        # TODO: Dark numpy magic. Needs an extra dimension in out, and a sum
-        #       over the right axis at the end.
-
-        # We can't make the output arrays yet, since we don't know the size of
-        # the components. So put a sentinel value.
-        out = None
-
-        for param_idx, param_val in enumerate(param_vals):
-            for order, factor in zip(orders, factors):
-                h = np.zeros(len(self.params))
-                # Note: stepsize (h) depends on the parameter values...
-                h[param_idx] = dx * order
-                if abs(param_val) >= 1e-7:
-                    # ...but it'd better not be (too close to) 0.
-                    h[param_idx] *= param_val
-                up = f(*(param_vals + h))
-                down = f(*(param_vals - h))
-                if out is None:
-                    # Initialize output arrays. Now that we evaluated f, we
-                    # know the size of our data.
-                    out = []
-                    # out is a list  of length Ncomponents with numpy arrays of
-                    # shape (Nparams, Ndata). Part of our misery comes from the
-                    # fact that the length of the data may be different for all
-                    # the components. Numpy doesn't like ragged arrays, so make
-                    # a list of arrays.
-                    for comp_idx in range(len(self)):
-                        try:
-                            len(up[comp_idx])
-                        except TypeError:  # output[comp_idx] is a number
-                            data_shape = (1,)
-                        else:
-                            data_shape = up[comp_idx].shape
-                        # Initialize at 0 so we can += all the contributions
-                        param_grad = np.zeros([len(self.params)] + list(data_shape), dtype=float)
-                        out.append(param_grad)
-                for comp_idx in range(len(self)):
-                    diff = up[comp_idx] - down[comp_idx]
-                    out[comp_idx][param_idx, :] += factor * diff / (2 * h[param_idx])
+        for center_comp, comp in zip(center, evaluated):
+            comp = comp.reshape((n_params, len(offsets)) + center_comp.shape)
+            values = {0: center_comp[np.newaxis]}
+            values.update((offset, comp[:, idx])
+                          for idx, offset in enumerate(offsets))
+            grad = 0
+            for weight, up, down in zip(weights, upper, lower):
+                grad = grad + weight * (values[up] - values[down])
+            step = h.reshape((n_params,) + (1,) * center_comp.ndim)
+            out.append(np.asarray(grad / step, dtype=float))
         return out
 
+    def _eval_broadcasted(self, var_vals, points, center):
+        """
+        Evaluate the model at all ``points`` in parameter space in one call,
+        by giving every parameter an extra leading axis.
+
+        :param var_vals: values of the independent variables.
+        :param points: array of parameter values with shape
+            (n_points, n_params).
+        :param center: model output for a single point, used to verify the
+            shape of the output.
+        :return: list of arrays of shape (n_points,) + shape of the component,
+            or ``None`` if the model does not broadcast over the parameters.
+        """
+        n_points = len(points)
+        ndim = max(comp.ndim for comp in center)
+        batched_params = [column.reshape((n_points,) + (1,) * ndim)
+                          for column in points.T]
+        try:
+            output = self(*(var_vals + batched_params))
+        except Exception:
+            output = None
+        evaluated = []
+        for center_comp, comp in zip(center, output or []):
+            comp = np.asarray(comp)
+            expected = ((n_points,) + (1,) * (ndim - center_comp.ndim) +
+                        center_comp.shape)
+            if comp.shape != expected:
+                break
+            evaluated.append(comp.reshape((n_points,) + center_comp.shape))
+        else:
+            if output is not None:
+                return evaluated
+        # Don't try again next time.
+        self._broadcasts_params = False
+        return None
+
+    def _eval_pointwise(self, var_vals, points, executor=None,
+                        n_workers=None):
+        """
+        Evaluate the model at all ``points`` in parameter space, one at a time.
+
+        :param var_vals: values of the independent variables.
+        :param points: array of parameter values with shape
+            (n_points, n_params).
+        :param executor: Optional executor whose ``map`` is used to evaluate
+            the points concurrently.
+        :param n_workers: Number of workers of ``executor``.
+        :return: list of arrays of shape (n_points,) + shape of the component.
+        """
+        func = partial(_eval_at_points, self, var_vals)
+        if executor is None:
+            outputs = func(points)
+        else:
+            outputs = _map_chunked(executor, func, points, n_workers)
+        return [np.stack([output[comp_idx] for output in outputs])
+                for comp_idx in range(len(self))]
+
     def eval_jacobian(self, *args, **kwargs):
         """
         :return: The jacobian matrix of the function.
@@ -796,6 +1017,16 @@ class CallableModel(BaseCallableModel):
     * first independent variables, then dependent variables, then parameters.
     * within each of these groups they are ordered alphabetically.
     """
+    #: :class:`~symfit.core.cache.SourceCache` storing the generated code for
+    #: the numerical evaluation of models on disk, or ``None``.
+    source_cache = SourceCache.from_environment()
+    #: Attributes configuring the numerical evaluation which can be set per
+    #: model, and which :meth:`substitute_fixed` carries over.
+    _settings = ('source_cache', 'backend')
+    #: Backend generating the code for the numerical evaluation of models,
+    #: see :mod:`symfit.core.backends`.
+    backend = NumPyBackend()
+
     @cached_property
     def numerical_components(self):
         """
@@ -805,15 +1036,199 @@ class CallableModel(BaseCallableModel):
         # All components must feature the independent vars and params, that's
         # the API convention. But for those components which also contain
         # interdependence, we add those vars
-        components = []
+        arguments = []
         for var, expr in self.items():
             dependencies = self.connectivity_mapping[var]
             # vars first, then params, and alphabetically within each group
             key = lambda arg: [isinstance(arg, Parameter), str(arg)]
-            ordered = sorted(dependencies, key=key)
-            components.append(sympy_to_py(expr, ordered))
+            arguments.append(sorted(dependencies, key=key))
+
+        if not self._prints_source:
+            components = [sympy_to_py(expr, ordered)
+                          for expr, ordered in zip(self.values(), arguments)]
+        else:
+            hoist = set(self._hoisted_arguments)
+            sources = self._cached_source('numerical_components', lambda: [
+                self.backend.source(
+                    OrderedDict([(var, expr)]), ordered, single=True,
+                    hoist=[arg for arg in ordered if arg in hoist]
+                )
+                for (var, expr), ordered in zip(self.items(), arguments)
+            ])
+            components = [self.backend.function(source) for source in sources]
         return ModelOutput(self.keys(), components)
 
+    def _init_from_dict(self, model_dict):
+        super(CallableModel, self)._init_from_dict(model_dict)
+        # Generated source code is kept when pickling, such that copies of
+        # this model can be evaluated without any symbolic work.
+        self._generated_source = {}
+
+    def substitute_fixed(self):
+        """
+        Make a model of the same type in which the parameters which are
+        currently fixed are replaced by their values. Its components,
+        Jacobian and Hessian are then generated for the free parameters only.
+
+        Settings made on this model, such as its :attr:`source_cache` and
+        :attr:`backend`, apply to the new model as well.
+
+        :return: the new model, or this model itself if no parameters are
+            fixed or if substituting them would change which variables the
+            model depends on.
+        """
+        fixed = {p: sympy.sympify(p.value) for p in self.params if p.fixed}
+        if not fixed:
+            return self
+        model = self.__class__({var: sympy.sympify(expr).xreplace(fixed)
+                                for var, expr in self.items()})
+        if (model.independent_vars != self.independent_vars or
+                model.params != [p for p in self.params if p not in fixed]):
+            # E.g. a fixed parameter with a value of zero removed a variable.
+            return self
+        for name in self._settings:
+            if name in self.__dict__:
+                setattr(model, name, self.__dict__[name])
+        return model
+
+    @cached_property
+    def linear_params(self):
+        """
+        :return: list of the parameters which this model depends on linearly,
+            jointly: every dependent component is of the form
+            :math:`h + \\sum_j p_j g_j`, where :math:`h` and the :math:`g_j`
+            do not depend on any of the :math:`p_j`. Interdependent
+            components are substituted first. When two parameters are only
+            linear by themselves, such as in ``a * b * x``, the one which
+            conflicts with the most others is left out.
+        """
+        expressions = {}
+        for symbol in toposort_flatten(self.connectivity_mapping, sort=False):
+            if symbol in self:
+                expressions[symbol] = sympy.sympify(self[symbol]).xreplace(
+                    expressions
+                )
+        expressions = [expressions[var] for var in self.dependent_vars]
+        if any(expr.atoms(sympy.MatrixSymbol) for expr in expressions):
+            # Matrix expressions can not be differentiated to scalars.
+            return []
+
+        # A parameter is linear if the derivatives to it no longer depend on
+        # it, and two of them conflict if the derivatives to one depend on
+        # the other.
+        dependencies = {p: set() for p in self.params}
+        for expr in expressions:
+            for p in expr.free_symbols & set(self.params):
+                dependencies[p].update(sympy.diff(expr, p).free_symbols)
+        candidates = [p for p in self.params if p not in dependencies[p]]
+        conflicts = {p: set() for p in candidates}
+        for p in candidates:
+            for q in dependencies[p] & set(candidates):
+                conflicts[p].add(q)
+                conflicts[q].add(p)
+        while any(conflicts.values()):
+            worst = max(reversed(candidates), key=lambda p: len(conflicts[p]))
+            candidates.remove(worst)
+            for p in conflicts.pop(worst):
+                conflicts[p].discard(worst)
+        return candidates
+
+    @cached_property
+    def _hoisted_arguments(self):
+        """
+        :return: list of the arguments of this model which are typically the
+            same for every evaluation during a fit: the independent variables
+            and the parameters which are fixed when the code of this model is
+            generated. The generated code can take the subexpressions which
+            only depend on these from a :class:`HoistedData`.
+        """
+        return [arg for arg in self.independent_vars + self.params
+                if not isinstance(arg, Parameter) or arg.fixed]
+
+    @cached_property
+    def _prints_source(self):
+        """
+        :return: bool, ``True`` if the names of all symbols in this model are
+            valid Python identifiers, such that its code can be generated as
+            source. Otherwise, the components are made by
+            :func:`~symfit.core.support.sympy_to_py` instead.
+        """
+        return all(isidentifier(symbol.name) and
+                   not keyword.iskeyword(symbol.name)
+                   for symbol in self.ordered_symbols)
+
+    def _cached_source(self, name, build):
+        """
+        Look up generated source code for this model, or generate it. Source
+        code is remembered on the model, and in :attr:`source_cache` if there
+        is one.
+
+        :param name: str, naming what the source is for.
+        :param build: function without arguments, returning the JSON
+            serializable source code if it is not in the cache yet.
+        :return: the (possibly cached) output of ``build``.
+        """
+        # The arguments of the generated functions depend on the order of
+        # the parameters, which can be changed.
+        local_key = (name, self.backend.name) + tuple(
+            arg.name for arg in self.independent_vars + self.params
+        ) + tuple(arg.name for arg in self._hoisted_arguments)
+        if local_key in self._generated_source:
+            return self._generated_source[local_key]
+
+        entry = None
+        if self.source_cache is not None:
+            key = self.source_cache.key(
+                self.__class__.__name__, name, self.backend.name,
+                sorted(self.items(), key=lambda item: str(item[0])),
+                self.independent_vars, self.params, self._hoisted_arguments
+            )
+            entry = self.source_cache.get(key)
+        if entry is None:
+            entry = build()
+            if self.source_cache is not None:
+                self.source_cache.set(key, entry)
+        self._generated_source[local_key] = entry
+        return entry
+
+    def _compile_fused(self, name):
+        """
+        Compile all the components of the model in the attribute ``name`` of
+        this model into a single function of the independent variables and
+        parameters of this model, see
+        :func:`~symfit.core.support.sympy_to_py_cse`.
+        The generated code is remembered, see :meth:`_cached_source`, in which
+        case ``name`` is not accessed at all.
+
+        :return: tuple of the symbols of that model in evaluation order, and
+            the function evaluating them.
+        """
+        def build():
+            model = getattr(self, name)
+            assignments = OrderedDict(
+                (symbol, model[symbol]) for symbol in model.ordered_symbols
+                if symbol in model
+            )
+            source = self.backend.source(assignments,
+                                         self.independent_vars + self.params,
+                                         hoist=self._hoisted_arguments)
+            # Store every symbol as the names of the variable and the
+            # parameters it is differentiated to.
+            paths = [[symbol.expr.name] + [p.name for p in symbol.variables]
+                     if isinstance(symbol, sympy.Derivative) else [symbol.name]
+                     for symbol in assignments]
+            return {'source': source, 'symbols': paths}
+
+        if not self._prints_source:
+            entry = build()
+        else:
+            entry = self._cached_source(name, build)
+        by_name = {symbol.name: symbol
+                   for symbol in list(self.keys()) + self.params}
+        symbols = [D(*[by_name[name] for name in path]) if len(path) > 1
+                   else by_name[path[0]] for path in entry['symbols']]
+        return symbols, self.backend.function(entry['source'])
+
 
 class GradientModel(CallableModel, BaseGradientModel):
     """
@@ -828,6 +1243,14 @@ class GradientModel(CallableModel, BaseGradientModel):
         jac_model.params = self.params
         return jac_model
 
+    @cached_property
+    def _jacobian_components(self):
+        """
+        :return: tuple of the symbols of ``jacobian_model`` in evaluation
+            order, and a single function evaluating all of them at once.
+        """
+        return self._compile_fused('jacobian_model')
+
     @cached_property
     def jacobian(self):
         """
@@ -842,29 +1265,91 @@ class GradientModel(CallableModel, BaseGradientModel):
             jac_row = []
             for param in self.params:
                 partial_dv = D(var, param)
-                jac_row.append(self.jacobian_model[partial_dv])
+                jac_row.append(self.jacobian_model.model_dict.get(partial_dv,
+                                                                  sympy.S.Zero))
             jac.append(jac_row)
         return jac
 
+    @cached_property
+    def _jacobian_symbols(self):
+        """
+        :return: list of the symbols of ``jacobian_model`` for each
+            component, as pairs of their index in the Jacobian of that
+            component and the symbol. Structurally zero entries are left out.
+        """
+        jac_symbols = []
+        for var in self:
+            dependencies = self._parameter_dependencies.get(var, self.params)
+            jac_symbols.append([((i,), D(var, param))
+                                for i, param in enumerate(self.params)
+                                if param in dependencies])
+        return jac_symbols
+
     def eval_jacobian(self, *args, **kwargs):
         """
         :return: Jacobian evaluated at the specified point.
         """
-        eval_jac_dict = self.jacobian_model(*args, **kwargs)._asdict()
-        # Take zero for component which are not present, happens for Constraints
-        jac = [[np.broadcast_to(eval_jac_dict.get(D(var, param), 0),
-                                eval_jac_dict[var].shape)
-                for param in self.params]
-            for var in self
-        ]
-
-        # Use numpy to broadcast these arrays together and then stack them along
-        # the parameter dimension. We do not include the component direction in
-        # this, because the components can have independent shapes.
-        for idx, comp in enumerate(jac):
-            jac[idx] = np.stack(np.broadcast_arrays(*comp))
-
-        return ModelOutput(self.keys(), jac)
+        eval_jac_dict = self._eval_jacobian_dict(args, kwargs)
+        return ModelOutput(self.keys(), self._jacobian_from_dict(eval_jac_dict))
+
+    def eval_sparse_jacobian(self, *args, **kwargs):
+        """
+        Jacobian evaluated at the specified point, in which only the entries
+        which are not structurally zero according to :attr:`jacobian_sparsity`
+        are stored.
+
+        :return: :class:`ModelOutput` with for every component a
+            :class:`scipy.sparse.csr_matrix` of shape (n_params, n_values),
+            where n_values is the size of the evaluated component.
+        """
+        eval_jac_dict = self._eval_jacobian_dict(args, kwargs)
+        output = []
+        for var, symbols in zip(self, self._jacobian_symbols):
+            shape = eval_jac_dict[var].shape
+            size = int(np.prod(shape))
+            counts = np.zeros(len(self.params), dtype=int)
+            values = []
+            for (index,), symbol in symbols:
+                if symbol in eval_jac_dict:
+                    counts[index] = size
+                    values.append(
+                        np.broadcast_to(eval_jac_dict[symbol], shape).ravel()
+                    )
+            indptr = np.concatenate([[0], np.cumsum(counts)])
+            data = np.concatenate(values) if values else np.zeros(0)
+            indices = np.tile(np.arange(size), len(values))
+            output.append(csr_matrix((data, indices, indptr),
+                                     shape=(len(self.params), size)))
+        return ModelOutput(self.keys(), output)
+
+    def _eval_jacobian_dict(self, args, kwargs):
+        """
+        :return: dict of the evaluated components of ``jacobian_model``.
+        """
+        hoisted_data = kwargs.pop('hoisted_data', None)
+        if not self._prints_source:
+            return self.jacobian_model(*args, **kwargs)._asdict()
+        # Avoid building jacobian_model when its code is remembered.
+        symbols, func = self._jacobian_components
+        values = _call_hoisted(func, self._positional_arguments(args, kwargs),
+                               hoisted_data)
+        return {symbol: np.atleast_1d(value)
+                for symbol, value in zip(symbols, values)}
+
+    def _jacobian_from_dict(self, eval_jac_dict):
+        """
+        :param eval_jac_dict: Mapping of the evaluated components of
+            ``jacobian_model``.
+        :return: list of the Jacobian of each component, as arrays of shape
+            (n_params, n_datapoints).
+        """
+        # Stack along the parameter dimension. We do not include the component
+        # direction in this, because the components can have independent
+        # shapes.
+        leading_shape = (len(self.params),)
+        return [_stack_nonzero(eval_jac_dict, symbols,
+                               leading_shape + eval_jac_dict[var].shape)
+                for var, symbols in zip(self, self._jacobian_symbols)]
 
 class HessianModel(GradientModel):
     """
@@ -895,20 +1380,84 @@ class HessianModel(GradientModel):
         """
         # Evaluate the hessian model and use the resulting Ans namedtuple as a
         # dict. From this, take the relevant components.
-        eval_hess_dict = self.hessian_model(*args, **kwargs)._asdict()
-        hess = [[[np.broadcast_to(eval_hess_dict.get(D(var, p1, p2), 0),
-                                  eval_hess_dict[var].shape)
-                    for p2 in self.params]
-                for p1 in self.params]
-            for var in self
-        ]
-        # Use numpy to broadcast these arrays together and then stack them along
-        # the parameter dimension. We do not include the component direction in
-        # this, because the components can have independent shapes.
-        for idx, comp in enumerate(hess):
-            hess[idx] = np.stack(np.broadcast_arrays(*comp))
+        hoisted_data = kwargs.pop('hoisted_data', None)
+        if not self._prints_source:
+            eval_hess_dict = self.hessian_model(*args, **kwargs)._asdict()
+        else:
+            # Avoid building hessian_model when its code is remembered.
+            symbols, func = self._fused_components
+            values = _call_hoisted(func,
+                                   self._positional_arguments(args, kwargs),
+                                   hoisted_data)
+            eval_hess_dict = {symbol: np.atleast_1d(value)
+                              for symbol, value in zip(symbols, values)}
+        return ModelOutput(self.keys(), self._hessian_from_dict(eval_hess_dict))
+
+    def _hessian_from_dict(self, eval_hess_dict):
+        """
+        :param eval_hess_dict: Mapping of the evaluated components of
+            ``hessian_model``.
+        :return: list of the Hessian of each component, as arrays of shape
+            (n_params, n_params, n_datapoints).
+        """
+        # Stack along both parameter dimensions. We do not include the
+        # component direction in this, because the components can have
+        # independent shapes.
+        leading_shape = (len(self.params), len(self.params))
+        return [_stack_nonzero(eval_hess_dict, symbols,
+                               leading_shape + eval_hess_dict[var].shape)
+                for var, symbols in zip(self, self._hessian_symbols)]
 
-        return ModelOutput(self.keys(), hess)
+    @cached_property
+    def _hessian_symbols(self):
+        """
+        :return: list of the symbols of ``hessian_model`` for each component,
+            as pairs of their index in the Hessian of that component and the
+            symbol. Structurally zero entries are left out.
+        """
+        hess_symbols = []
+        for var in self:
+            dependencies = self._parameter_dependencies.get(var, self.params)
+            hess_symbols.append([
+                ((i, j), D(var, p1, p2))
+                for i, p1 in enumerate(self.params) if p1 in dependencies
+                for j, p2 in enumerate(self.params) if p2 in dependencies
+            ])
+        return hess_symbols
+
+    @cached_property
+    def _fused_components(self):
+        """
+        :return: tuple of the symbols of ``hessian_model`` in evaluation order,
+            and a single function evaluating all of them at once. Because
+            ``hessian_model`` contains the components of this model as well as
+            their first and second order derivatives, this function evaluates
+            the model, its Jacobian and its Hessian in one pass, computing the
+            subexpressions they have in common only once.
+        """
+        return self._compile_fused('hessian_model')
+
+    def eval_fused(self, *args, **kwargs):
+        """
+        Evaluate the model, its Jacobian and its Hessian at the specified point
+        in a single pass. This is cheaper than calling ``__call__``,
+        ``eval_jacobian`` and ``eval_hessian`` separately, since every
+        subexpression shared between them is only computed once.
+
+        :return: tuple of the outputs of ``__call__``, ``eval_jacobian`` and
+            ``eval_hessian`` for the same arguments.
+        """
+        hoisted_data = kwargs.pop('hoisted_data', None)
+        symbols, fused = self._fused_components
+        values = _call_hoisted(fused, self._positional_arguments(args, kwargs),
+                               hoisted_data)
+        eval_dict = {symbol: np.atleast_1d(value)
+                     for symbol, value in zip(symbols, values)}
+        return (
+            ModelOutput(self.keys(), [eval_dict[var] for var in self]),
+            ModelOutput(self.keys(), self._jacobian_from_dict(eval_dict)),
+            ModelOutput(self.keys(), self._hessian_from_dict(eval_dict)),
+        )
 
 
 class Model(HessianModel):
@@ -946,6 +1495,22 @@ class ODEModel(BaseGradientModel):
     Model build from a system of ODEs. When the model is called, the ODE is
     integrated using the LSODA package.
     """
+    # The integrator can only handle one set of parameters at a time.
+    _broadcasts_params = False
+    #: Executor used by :meth:`eval_jacobian` by default, and to integrate
+    #: the experiments of a batched model concurrently. Both ``odeint`` and
+    #: the ``LSODA`` integrator of ``solve_ivp`` can only solve one system per
+    #: process at a time, so with these this has to be a
+    #: :class:`concurrent.futures.ProcessPoolExecutor`.
+    executor = None
+    #: Number of workers of :attr:`executor`. Defaults to the number of CPUs.
+    n_workers = None
+
+    #: Number of parameter values for which the dense solution is remembered
+    #: when a ``solve_ivp`` integrator is used.
+    solution_cache_size = 4
+
+    @keywordonly(sensitivities=False, integrator='odeint')
     def __init__(self, model_dict, initial, *lsoda_args, **lsoda_kwargs):
         """
         :param model_dict: Dictionary specifying ODEs. e.g.
@@ -953,11 +1518,32 @@ class ODEModel(BaseGradientModel):
         :param initial: ``dict`` of initial conditions for the ODE.
             Must be provided! e.g.
             initial = {y: 1.0, x: 0.0}
-        :param lsoda_args: args to pass to the lsoda solver.
+            To fit many experiments which only differ in their initial
+            conditions at once, provide a list of such dicts instead. Every
+            component of the model then has an extra leading dimension over
+            the experiments.
+        :param lsoda_args: args to pass to the lsoda solver, only with the
+            ``'odeint'`` integrator.
             See `scipy's odeint <http://docs.scipy.org/doc/scipy/reference/generated/scipy.integrate.odeint.html>`_
             for more info.
-        :param lsoda_kwargs: kwargs to pass to the lsoda solver.
-        """
+        :param sensitivities: If ``True``, :meth:`eval_jacobian` integrates
+            the forward sensitivity equations along with the ODEs to obtain
+            the exact Jacobian, instead of using finite differences.
+        :param integrator: ``'odeint'`` (default) to use scipy's ``odeint``,
+            or the name of any of the methods of scipy's ``solve_ivp``, e.g.
+            ``'LSODA'``, ``'BDF'`` or ``'Radau'``. With ``solve_ivp`` the
+            dense solution is remembered, so evaluating the model for the same
+            parameters at other points only interpolates.
+        :param lsoda_kwargs: kwargs to pass to the lsoda solver, or to
+            ``solve_ivp``.
+        """
+        self.sensitivities = lsoda_kwargs.pop('sensitivities')
+        self.integrator = lsoda_kwargs.pop('integrator')
+        if lsoda_args and self.integrator != 'odeint':
+            raise TypeError('Positional lsoda_args are only supported by '
+                            'odeint, options for solve_ivp have to be given '
+                            'as keyword arguments.')
+        self._solution_cache = OrderedDict()
         self.initial = initial
         self.lsoda_args = lsoda_args
         self.lsoda_kwargs = lsoda_kwargs
@@ -991,7 +1577,8 @@ class ODEModel(BaseGradientModel):
         self.model_params = set([])
 
         # Only the ones that have a Parameter as initial parameter.
-        self.initial_params = {value for var, value in self.initial.items()
+        self.initial_params = {value for initial in self._initials
+                               for var, value in initial.items()
                                if isinstance(value, Parameter)}
 
         for expression in expressions:
@@ -1008,6 +1595,23 @@ class ODEModel(BaseGradientModel):
         self.sigmas = {var: Variable(name='sigma_{}'.format(var.name)) for var in self.dependent_vars}
 
         self.__signature__ = self._make_signature()
+        # Identifies copies of this model made by pickling.
+        self._compiled_token = uuid.uuid4().hex
+
+    @property
+    def batched(self):
+        """
+        :return: bool, indicating if this model integrates a batch of
+            experiments with different initial conditions.
+        """
+        return not isinstance(self.initial, Mapping)
+
+    @property
+    def _initials(self):
+        """
+        :return: list of the initial conditions of every experiment.
+        """
+        return list(self.initial) if self.batched else [self.initial]
 
     def __str__(self):
         """
@@ -1052,40 +1656,68 @@ class ODEModel(BaseGradientModel):
         new_model_dict = self.model_dict.copy()
         for key in new_model_dict:
             new_model_dict[key] *= -1
-        return self.__class__(new_model_dict, initial=self.initial)
+        return self.__class__(new_model_dict, initial=self.initial,
+                              sensitivities=self.sensitivities,
+                              integrator=self.integrator)
+
+    def __getstate__(self):
+        state = super(ODEModel, self).__getstate__()
+        # Executors can not be pickled.
+        state.pop('executor', None)
+        state['_solution_cache'] = OrderedDict()
+        return state
+
+    def __setstate__(self, state):
+        super(ODEModel, self).__setstate__(state)
+        # Compiling the components is expensive, so reuse those of a copy of
+        # this model which was unpickled earlier in this process. This way a
+        # worker compiles them only once, no matter how often it receives
+        # the model.
+        token = self._compiled_token
+        earlier = _unpickled_ode_models.pop(token, None)
+        if earlier is not None:
+            attr = '{}_{}'.format(cached_property.base_str, '_nsystem')
+            if attr in earlier.__dict__:
+                setattr(self, attr, earlier.__dict__[attr])
+        _unpickled_ode_models[token] = self
+        while len(_unpickled_ode_models) > 8:
+            _unpickled_ode_models.popitem(last=False)
 
     @cached_property
-    def _ncomponents(self):
+    def _parameter_dependencies(self):
         """
-        :return: The `numerical_components` for an ODEModel. This differs from
-            the traditional `numerical_components`, in that these component can
-            also contain dependent variables, not just the independent ones.
-
-            Each of these components does not correspond to e.g. `y(t) = ...`,
-            but to `D(y, t) = ...`. The system spanned by these component
-            therefore still needs to be integrated.
+        :return: dict of every dependent variable to the set of parameters it
+            depends on. Since the system is integrated as a whole, these are
+            all the parameters.
         """
-        return [sympy_to_py(expr, self.independent_vars + self.dependent_vars + self.model_params)
-                for expr in self.values()]
+        return {var: set(self.params) for var in self.dependent_vars}
 
     @cached_property
-    def _njacobian(self):
-        """
-        :return: The `numerical_jacobian` of the components of the ODEModel with
-            regards to the dependent variables. This is not to be confused with
-            the jacobian of the model as a whole, which is 2D and computed with
-            regards to the dependent vars and the fit parameters, and the
-            ODEModel still needs to integrated to compute that.
-
-            Instead, this function is used by the ODE integrator, and is not
-            meant for human consumption.
-        """
-        return [
-            [sympy_to_py(
-                    sympy.diff(expr, var), self.independent_vars + self.dependent_vars + self.model_params
-                ) for var in self.dependent_vars
-            ] for _, expr in self.items()
-        ]
+    def _nsystem(self):
+        """
+        :return: tuple of three functions ``(rhs, jac_y, jac_p)`` for the ODE
+            integrator, which take the arguments ``(ys, t, *model_params)``.
+            They return the components of the ODEModel as an array, and their
+            jacobians with regards to the dependent variables and the
+            parameters as 2D arrays. Each of them is compiled into a single
+            function, in which common subexpressions are computed only once.
+
+            These components do not correspond to e.g. `y(t) = ...`, but to
+            `D(y, t) = ...`, so the system still needs to be integrated. For the
+            same reason, these jacobians are not to be confused with the
+            jacobian of the model as a whole.
+        """
+        args = self.independent_vars + self.dependent_vars + self.model_params
+        exprs = list(self.values())
+        jac_y = [[sympy.diff(expr, var) for var in self.dependent_vars]
+                 for expr in exprs]
+        jac_p = [[sympy.diff(expr, param) for param in self.params]
+                 for expr in exprs]
+        return (_compile_ode_system(exprs, args, (len(exprs),)),
+                _compile_ode_system(sum(jac_y, []), args,
+                                    (len(exprs), len(self.dependent_vars))),
+                _compile_ode_system(sum(jac_p, []), args,
+                                    (len(exprs), len(self.params))))
 
     def eval_components(self, *args, **kwargs):
         """
@@ -1099,20 +1731,105 @@ class ODEModel(BaseGradientModel):
         """
         bound_arguments = self.__signature__.bind(*args, **kwargs)
         t_like = bound_arguments.arguments[self.independent_vars[0].name]
+        model_args = tuple(
+            bound_arguments.arguments[param.name] for param in self.model_params
+        )
+        if self.batched:
+            return self._eval_batch(bound_arguments, t_like, model_args)
 
         # System of functions to be integrated
-        f = lambda ys, t, *a: [c(t, *(list(ys) + list(a))) for c in self._ncomponents]
-        Dfun = lambda ys, t, *a: [[c(t, *(list(ys) + list(a))) for c in row] for row in self._njacobian]
+        f, Dfun, _ = self._nsystem
+
+        initial_dependent = self._initial_dependent(bound_arguments,
+                                                    self.initial)
+        return self._integrate(f, initial_dependent, t_like, model_args,
+                               Dfun=Dfun, cache=True)
+
+    def _eval_batch(self, bound_arguments, t_like, model_args):
+        """
+        Integrate the system for the initial conditions of every experiment.
+        If all experiments start at the same point, they are integrated as one
+        stacked system, whose jacobian is block diagonal. If :attr:`executor`
+        is set, the experiments are divided over its workers instead.
 
-        initial_dependent = [self.initial[var] for var in self.dependent_vars]
+        :return: list with an array of shape (n_experiments, n_points) for
+            every dependent variable.
+        """
+        t_var = self.independent_vars[0]
+        experiments = [
+            (initial[t_var], self._initial_dependent(bound_arguments, initial))
+            for initial in self._initials
+        ]
+        n_vars = len(self.dependent_vars)
+        if self.executor is not None:
+            self._check_executor(self.executor)
+            ans = _map_chunked(
+                self.executor,
+                partial(_integrate_experiments, self, t_like, model_args),
+                experiments, self.n_workers
+            )
+        elif len(set(t_initial for t_initial, _ in experiments)) == 1:
+            rhs, jac_y, _ = self._nsystem
+            n_exp = len(experiments)
+
+            # The state of experiment e is found at e * n_vars:(e + 1) * n_vars
+            def f(zs, t, *a):
+                ys = np.reshape(zs, (n_exp, n_vars)).T
+                return rhs.batched(ys, t, *a).T.ravel()
+
+            def Dfun(zs, t, *a):
+                ys = np.reshape(zs, (n_exp, n_vars)).T
+                return np.moveaxis(jac_y.batched(ys, t, *a), -1, 0)
+
+            initial_dependent = np.concatenate([init for _, init in experiments])
+            ans = self._integrate(f, initial_dependent, t_like, model_args,
+                                  Dfun=Dfun, cache=True, block_size=n_vars,
+                                  t_initial=experiments[0][0])
+            ans = np.reshape(ans, (n_exp, n_vars, -1))
+        else:
+            ans = _integrate_experiments(self, t_like, model_args, experiments)
+        ans = np.stack(ans)
+        return [ans[:, idx] for idx in range(n_vars)]
+
+    def _initial_dependent(self, bound_arguments, initial):
+        """
+        :param initial: dict of initial conditions.
+        :return: list of the initial values of the dependent variables, where
+            any parameter is substituted for the value passed to this call.
+        """
+        initial_dependent = [initial[var] for var in self.dependent_vars]
         # For the initial values, substitute any parameter for the value passed
         # to this call. Scipy doesn't really understand Parameter/Symbols
         for idx, init_var in enumerate(initial_dependent):
             if init_var in self.initial_params:
                 initial_dependent[idx] = bound_arguments.arguments[init_var.name]
-
+        return initial_dependent
+
+    def _integrate(self, f, initial_dependent, t_like, model_args, Dfun=None,
+                   cache=False, block_size=None, t_initial=None):
+        """
+        Integrate the system ``f`` starting from the initial value of the
+        independent variable, in both directions if needed, and return the
+        solution at the points in ``t_like``.
+
+        :param f: right-hand side of the system, as expected by ``odeint``.
+        :param initial_dependent: initial values of the system.
+        :param t_like: points at which the solution is requested.
+        :param model_args: extra arguments to ``f`` and ``Dfun``.
+        :param Dfun: optional jacobian of ``f``, as expected by ``odeint``.
+        :param cache: If ``True`` and a ``solve_ivp`` integrator is used,
+            remember the dense solution for these ``initial_dependent`` and
+            ``model_args``.
+        :param block_size: If given, the jacobian of the system is block
+            diagonal with blocks of this size, and ``Dfun`` returns an array
+            of these blocks with shape (n_blocks, block_size, block_size).
+        :param t_initial: Initial value of the independent variable. Defaults
+            to the one in the initial conditions of this model.
+        :return: array of shape (n_states, n_points).
+        """
         assert len(self.independent_vars) == 1
-        t_initial = self.initial[self.independent_vars[0]] # Assuming there's only one
+        if t_initial is None:
+            t_initial = self._initials[0][self.independent_vars[0]]
 
         # Check if the time-like data includes the initial value, because integration should start there.
         try:
@@ -1120,6 +1837,20 @@ class ODEModel(BaseGradientModel):
         except (TypeError, IndexError): # Python scalar gives TypeError, numpy scalars IndexError
             t_like = np.array([t_like]) # Allow evaluation at one point.
 
+        if self.integrator != 'odeint':
+            return self._integrate_dense(f, initial_dependent, t_like,
+                                         model_args, Dfun=Dfun, cache=cache,
+                                         block_size=block_size,
+                                         t_initial=t_initial)
+
+        lsoda_kwargs = self.lsoda_kwargs
+        if block_size is not None and Dfun is not None:
+            # Hand the block diagonal jacobian to LSODA as a banded matrix.
+            blocks_Dfun = Dfun
+            Dfun = lambda ys, t, *a: _banded_from_blocks(blocks_Dfun(ys, t, *a))
+            lsoda_kwargs = dict(lsoda_kwargs, ml=block_size - 1,
+                                mu=block_size - 1)
+
         # The strategy is to split the time axis in a part above and below the
         # initial value, and to integrate those seperately. At the end we rejoin them.
         # np.flip is needed because odeint wants the first point to be t_initial
@@ -1139,27 +1870,20 @@ class ODEModel(BaseGradientModel):
 
         # Call the numerical integrator. Note that we only pass the
         # model_params, which will be used by sympy_to_py to create something we
-        # can evaluate numerically.
-        ans_bigger = odeint(
-            f,
-            initial_dependent,
-            t_bigger,
-            args=tuple(
-                bound_arguments.arguments[param.name] for param in self.model_params
-            ),
-            Dfun=Dfun,
-            *self.lsoda_args, **self.lsoda_kwargs
-        )
-        ans_smaller = odeint(
-            f,
-            initial_dependent,
-            t_smaller,
-            args=tuple(
-                bound_arguments.arguments[param.name] for param in self.model_params
-            ),
-            Dfun=Dfun,
-            *self.lsoda_args, **self.lsoda_kwargs
-        )
+        # can evaluate numerically. A direction without any points besides
+        # t_initial does not need to be integrated.
+        ans_bigger, ans_smaller = [
+            odeint(
+                f,
+                initial_dependent,
+                t_part,
+                args=model_args,
+                Dfun=Dfun,
+                *self.lsoda_args, **lsoda_kwargs
+            ) if len(t_part) > 1 else
+            np.array([initial_dependent], dtype=float)
+            for t_part in (t_bigger, t_smaller)
+        ]
 
         ans = np.concatenate((ans_smaller[1:][::-1], ans_bigger))
         if t_initial in t_like:
@@ -1171,6 +1895,177 @@ class ODEModel(BaseGradientModel):
             # and so is t_like with t_initial inserted at the right position).
             return ans[t_total != t_initial].T
 
+    def _integrate_dense(self, f, initial_dependent, t_like, model_args,
+                         Dfun=None, cache=False, block_size=None,
+                         t_initial=None):
+        """
+        Integrate the system using ``solve_ivp`` with dense output, once in
+        each direction from the initial value of the independent variable,
+        and evaluate the resulting interpolants at ``t_like``. See
+        :meth:`_integrate` for the arguments.
+        """
+        t_like = np.asarray(t_like, dtype=float)
+        initial_dependent = np.asarray(initial_dependent, dtype=float)
+
+        solutions = {}
+        if cache:
+            key = (t_initial, initial_dependent.tobytes(),
+                   np.asarray(model_args, dtype=float).tobytes())
+            solutions = self._solution_cache.pop(key, {})
+            self._solution_cache[key] = solutions
+            while len(self._solution_cache) > self.solution_cache_size:
+                self._solution_cache.popitem(last=False)
+
+        fun = lambda t, ys: f(ys, t, *model_args)
+        jac = None
+        jac_kwargs = {}
+        if Dfun is not None and self.integrator in ('BDF', 'Radau', 'LSODA'):
+            if block_size is not None and self.integrator == 'LSODA':
+                jac = lambda t, ys: _banded_from_blocks(Dfun(ys, t, *model_args))
+                jac_kwargs = {'lband': block_size - 1, 'uband': block_size - 1}
+            elif block_size is not None:
+                jac = lambda t, ys: _sparse_from_blocks(Dfun(ys, t, *model_args))
+            elif self.integrator != 'LSODA' and self._sparse_jacobian:
+                jac = lambda t, ys: csc_matrix(Dfun(ys, t, *model_args))
+            else:
+                jac = lambda t, ys: Dfun(ys, t, *model_args)
+
+        ans = np.empty((len(initial_dependent), len(t_like)))
+        ans[:, t_like == t_initial] = initial_dependent[:, np.newaxis]
+        for direction, mask in [(1, t_like > t_initial), (-1, t_like < t_initial)]:
+            if not mask.any():
+                continue
+            t_end = t_like[mask].max() if direction > 0 else t_like[mask].min()
+            t_done, solution = solutions.get(direction, (t_initial, None))
+            if direction * (t_end - t_done) > 0:
+                kwargs = {} if jac is None else dict(jac_kwargs, jac=jac)
+                kwargs.update(self.lsoda_kwargs)
+                result = solve_ivp(fun, (t_initial, t_end), initial_dependent,
+                                   method=self.integrator, dense_output=True,
+                                   **kwargs)
+                if not result.success:
+                    warnings.warn(result.message, RuntimeWarning)
+                solution = result.sol
+                solutions[direction] = (t_end, solution)
+            ans[:, mask] = solution(t_like[mask])
+        return ans
+
+    @cached_property
+    def _sparse_jacobian(self):
+        """
+        :return: bool, indicating if the jacobian of the components with
+            regards to the dependent variables has few enough nonzero elements
+            to be worth handing to the integrator as a sparse matrix.
+        """
+        jac = sympy.Matrix([[sympy.diff(expr, var) for var in self.dependent_vars]
+                            for expr in self.values()])
+        n_nonzero = sum(1 for elem in jac if elem != 0)
+        return n_nonzero <= 0.25 * len(jac)
+
+    def eval_sensitivities(self, *args, **kwargs):
+        """
+        Jacobian of the model with respect to the parameters, obtained by
+        integrating the forward sensitivity equations
+
+        .. math::
+
+            \\frac{d}{dt} \\frac{\\partial y}{\\partial p} =
+            \\frac{\\partial f}{\\partial y} \\frac{\\partial y}{\\partial p}
+            + \\frac{\\partial f}{\\partial p}
+
+        together with the ODEs themselves. The sensitivity to a parameter in
+        the initial values starts at one for the corresponding variable. This
+        requires a single integration, regardless of the number of parameters.
+
+        :return: The jacobian matrix of the model, as a list with length
+            n_components containing arrays of shape (n_params, n_datapoints).
+        """
+        bound_arguments = self.__signature__.bind(*args, **kwargs)
+        t_like = bound_arguments.arguments[self.independent_vars[0].name]
+        sens = [self._sensitivities(bound_arguments, t_like, initial)
+                for initial in self._initials]
+        if self.batched:
+            # Experiments go after the parameter dimension.
+            return list(np.stack(sens, axis=2))
+        return list(sens[0])
+
+    def _sensitivities(self, bound_arguments, t_like, initial):
+        """
+        Integrate the sensitivity equations for one set of initial conditions.
+
+        :return: array of shape (n_vars, n_params, n_points).
+        """
+        n_vars, n_params = len(self.dependent_vars), len(self.params)
+        rhs, jac_y, jac_p = self._nsystem
+
+        def f(zs, t, *a):
+            ys = zs[:n_vars]
+            sens = np.reshape(zs[n_vars:], (n_vars, n_params))
+            dsens = jac_y(ys, t, *a).dot(sens) + jac_p(ys, t, *a)
+            return np.concatenate([rhs(ys, t, *a), dsens.ravel()])
+
+        initial_sens = np.zeros((n_vars, n_params))
+        for var_idx, var in enumerate(self.dependent_vars):
+            if initial[var] in self.params:
+                initial_sens[var_idx, self.params.index(initial[var])] = 1
+        initial_values = np.concatenate(
+            [self._initial_dependent(bound_arguments, initial),
+             initial_sens.ravel()]
+        )
+        model_args = tuple(
+            bound_arguments.arguments[param.name] for param in self.model_params
+        )
+        ans = self._integrate(f, initial_values, t_like, model_args,
+                              t_initial=initial[self.independent_vars[0]])
+        return ans[n_vars:].reshape((n_vars, n_params, -1))
+
+    def eval_jacobian(self, *args, **kwargs):
+        """
+        Jacobian of the model with respect to the parameters, computed by
+        finite differences of the integrated system. See
+        :meth:`~symfit.core.models.BaseGradientModel.finite_difference` for
+        the supported keywords.
+
+        Every point of the stencil requires its own integration. These can be
+        performed concurrently by providing an ``executor``, or by setting
+        :attr:`executor` on the model. Since LSODA is neither thread safe nor
+        releases the GIL, this has to be a
+        :class:`concurrent.futures.ProcessPoolExecutor`, whose number of
+        workers can be given as ``n_workers`` or set as :attr:`n_workers`.
+        The result is identical to that of the serial computation.
+
+        If the model was made with ``sensitivities=True``, the Jacobian is
+        computed with :meth:`eval_sensitivities` instead.
+
+        :return: The jacobian matrix of the model.
+        """
+        if self.sensitivities:
+            kwargs.pop('executor', None)
+            kwargs.pop('n_workers', None)
+            return ModelOutput(self.keys(),
+                               self.eval_sensitivities(*args, **kwargs))
+        kwargs.setdefault('executor', self.executor)
+        kwargs.setdefault('n_workers', self.n_workers)
+        if kwargs['executor'] is not None:
+            self._check_executor(kwargs['executor'])
+        return super(ODEModel, self).eval_jacobian(*args, **kwargs)
+
+    def _check_executor(self, executor):
+        """
+        Raise a :class:`TypeError` if ``executor`` cannot be used to integrate
+        concurrently with the integrator of this model. ``odeint`` and the
+        ``LSODA`` integrator of ``solve_ivp`` are not thread safe, so these
+        need a :class:`concurrent.futures.ProcessPoolExecutor`.
+        """
+        from concurrent.futures import ProcessPoolExecutor
+        if (self.integrator in ('odeint', 'LSODA') and
+                not isinstance(executor, ProcessPoolExecutor)):
+            raise TypeError(
+                'The {} integrator is not thread safe, so the executor has '
+                'to be a ProcessPoolExecutor, not {}.'.format(
+                    self.integrator, executor.__class__.__name__)
+            )
+
     def __call__(self, *args, **kwargs):
         """
         Evaluate the model for a certain value of the independent vars and parameters.
@@ -1188,6 +2083,214 @@ class ODEModel(BaseGradientModel):
         """
         return ModelOutput(self.keys(), self.eval_components(*args, **kwargs))
 
+def _positional_order(func, names):
+    """
+    Determine in which order ``func`` expects the arguments with the given
+    names, such that it can be called positionally instead of by keyword.
+
+    :param func: callable component of a model.
+    :param names: names of the arguments ``func`` should be called with.
+    :return: list of ``names`` in the order of the signature of ``func``, or
+        ``None`` if ``func`` has to be called by keyword.
+    """
+    try:
+        signature = inspect_sig.signature(func)
+    except (TypeError, ValueError):
+        return None
+    positional = (inspect_sig.Parameter.POSITIONAL_ONLY,
+                  inspect_sig.Parameter.POSITIONAL_OR_KEYWORD)
+    # Optional arguments can be left out.
+    parameters = [param for param in signature.parameters.values()
+                  if param.default is param.empty]
+    if (len(parameters) != len(names) or
+            any(param.kind not in positional for param in parameters) or
+            set(param.name for param in parameters) != set(names)):
+        return None
+    return [param.name for param in parameters]
+
+
+def _map_chunked(executor, func, items, n_workers=None):
+    """
+    Apply ``func`` to ``items`` using ``executor``, sending the items in one
+    chunk per worker such that everything else ``func`` needs only has to be
+    sent to every worker once.
+
+    :param func: function taking a list of items and returning a list with a
+        result for each of them.
+    :param n_workers: Number of workers of ``executor``. Defaults to the
+        number of CPUs.
+    :return: list of results, in the order of ``items``.
+    """
+    n_workers = n_workers or cpu_count()
+    n_chunks = min(n_workers, len(items))
+    bounds = np.linspace(0, len(items), n_chunks + 1).astype(int)
+    chunks = [items[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+    return [result for chunk_results in executor.map(func, chunks)
+            for result in chunk_results]
+
+
+def _integrate_experiments(model, t_like, model_args, experiments):
+    """
+    Integrate the ODEs of ``model`` for every experiment separately. Defined
+    at module level such that it can be sent to other processes.
+
+    :param experiments: list of tuples of the initial value of the
+        independent variable and those of the dependent variables.
+    :return: list of arrays of shape (n_vars, n_points).
+    """
+    f, Dfun, _ = model._nsystem
+    return [model._integrate(f, initial_dependent, t_like, model_args,
+                             Dfun=Dfun, t_initial=t_initial)
+            for t_initial, initial_dependent in experiments]
+
+
+def _banded_from_blocks(blocks):
+    """
+    :param blocks: array of shape (n_blocks, size, size) with the blocks of a
+        block diagonal matrix.
+    :return: the matrix in the banded format used by LSODA, with
+        ``size - 1`` bands on either side of the diagonal.
+    """
+    n_blocks, size, _ = blocks.shape
+    banded = np.zeros((2 * size - 1, n_blocks * size))
+    for i in range(size):
+        for j in range(size):
+            banded[i - j + size - 1, j::size] = blocks[:, i, j]
+    return banded
+
+
+def _sparse_from_blocks(blocks):
+    """
+    :param blocks: array of shape (n_blocks, size, size) with the blocks of a
+        block diagonal matrix.
+    :return: the matrix as a :class:`scipy.sparse.csc_matrix`.
+    """
+    n_blocks, size, _ = blocks.shape
+    offsets = size * np.arange(n_blocks)[:, np.newaxis, np.newaxis]
+    rows = np.broadcast_to(offsets + np.arange(size)[:, np.newaxis], blocks.shape)
+    cols = np.broadcast_to(offsets + np.arange(size), blocks.shape)
+    return csc_matrix((blocks.ravel(), (rows.ravel(), cols.ravel())),
+                      shape=(n_blocks * size, n_blocks * size))
+
+
+def _compile_ode_system(exprs, args, shape):
+    """
+    Compile ``exprs`` into a single function for the ODE integrator.
+
+    :param exprs: list of expressions.
+    :param args: arguments of the expressions, with the independent variable
+        first, then the dependent variables and then the parameters.
+    :param shape: shape of the array returned by the function.
+    :return: function of ``(ys, t, *params)``, returning the evaluated
+        ``exprs`` as an array of ``shape``. Its ``batched`` attribute is the
+        same function for many systems at once, which takes ``ys`` with shape
+        (n_vars, n_systems) and returns an array of ``shape + (n_systems,)``.
+    """
+    assignments = OrderedDict((sympy.Dummy(), expr) for expr in exprs)
+    func = sympy_to_py_cse(assignments, args)
+
+    def evaluate(ys, t, *params):
+        ans = func(*((t,) + tuple(ys) + params))
+        return np.array(ans, dtype=float).reshape(shape)
+
+    def batched(ys, t, *params):
+        ans = func(*((t,) + tuple(ys) + params))
+        n_systems = np.shape(ys)[1]
+        return np.array([np.broadcast_to(elem, (n_systems,)) for elem in ans],
+                        dtype=float).reshape(shape + (n_systems,))
+    evaluate.batched = batched
+    return evaluate
+
+
+# ODEModels unpickled in this process, by their ``_compiled_token``.
+_unpickled_ode_models = OrderedDict()
+
+
+def _eval_at_points(model, var_vals, points):
+    """
+    Evaluate ``model`` for the given values of its variables, at every point
+    in parameter space in ``points``. Defined at module level such that it can
+    be sent to other processes.
+
+    :return: list of the output of ``model`` for every point.
+    """
+    return [model(*(list(var_vals) + list(param_vals))) for param_vals in points]
+
+
+def _call_hoisted(func, args, hoisted_data):
+    """
+    Call a function generated for a model, taking its subexpressions which
+    only depend on the data and fixed parameters from ``hoisted_data`` if it
+    has any.
+
+    :param func: function generated for a model.
+    :param args: list of positional arguments to ``func``.
+    :param hoisted_data: :class:`HoistedData` or ``None``.
+    :return: the output of ``func``.
+    """
+    if hoisted_data is None or not hasattr(func, 'hoisted'):
+        return func(*args)
+    return func(*args, _hoisted=hoisted_data.get(func, args))
+
+
+def _stack_nonzero(eval_dict, symbols, shape):
+    """
+    Stack the evaluated derivatives of a component into a single array. Only
+    the entries which are not structurally zero are filled in, the others are
+    left at zero rather than being broadcast and copied.
+
+    :param eval_dict: Mapping of the evaluated derivatives.
+    :param symbols: list of pairs of the index of a derivative in the result,
+        and its symbol in ``eval_dict``. Symbols missing from ``eval_dict``
+        are zero as well.
+    :param shape: shape of the result.
+    :return: array of shape ``shape``.
+    """
+    present = [(index, eval_dict[symbol]) for index, symbol in symbols
+               if symbol in eval_dict]
+    dtype = np.result_type(*[value for _, value in present]) if present else float
+    stacked = np.zeros(shape, dtype=dtype)
+    for index, value in present:
+        stacked[index] = value
+    return stacked
+
+
+def _finite_difference_stencil(order, method):
+    """
+    Determine the stencil of a finite difference approximation of the first
+    derivative, written as a sum of differences
+    :math:`f'(x) \\approx \\sum_k w_k (f(x + u_k h) - f(x + l_k h)) / h`.
+    Written this way, the approximation is exactly zero when :math:`f` does
+    not change.
+
+    :param order: Order of accuracy of the stencil.
+    :param method: ``'central'`` or ``'forward'``.
+    :return: tuple of arrays of weights :math:`w_k`, and the offsets
+        :math:`u_k` and :math:`l_k`.
+    """
+    if method == 'central':
+        if order not in (2, 4, 6):
+            raise ValueError('Central differences support orders 2, 4 and 6, '
+                             'not {}.'.format(order))
+        upper = list(range(1, order // 2 + 1))
+        lower = [- offset for offset in upper]
+        offsets = lower[::-1] + upper
+    elif method == 'forward':
+        if order not in (1, 2, 4, 6):
+            raise ValueError('Forward differences support orders 1, 2, 4 and '
+                             '6, not {}.'.format(order))
+        upper = list(range(1, order + 1))
+        lower = [0] * order
+        offsets = [0] + upper
+    else:
+        raise ValueError("method should be 'central' or 'forward', "
+                         "not {}.".format(method))
+    weights = sympy.finite_diff_weights(1, offsets, 0)[1][-1]
+    weights = dict(zip(offsets, weights))
+    return (np.array([float(weights[offset]) for offset in upper]),
+            np.array(upper), np.array(lower))
+
+
 def _partial_diff(var, *params):
     """
     Sympy does not handle repeated partial derivation correctly, e.g.
@@ -1235,7 +2338,11 @@ def jacobian_from_model(model, as_functions=False):
     # functions instead of vars depending on the value of `as_functions`.
     jac = {}
     for func, expr in model.function_dict.items():
+        free_symbols = expr.free_symbols
         for param in model.params:
+            if param not in free_symbols:
+                # Structurally zero, which the evaluation fills in itself.
+                continue
             target = D(func, param)
             dfdp = expr.diff(param)
             if as_functions:
@@ -1244,6 +2351,13 @@ def jacobian_from_model(model, as_functions=False):
                 # Turn Function objects back into Variables.
                 dfdp = dfdp.subs(functions_as_vars, evaluate=False)
                 jac[_partial_subs(target, functions_as_vars)] = dfdp
+    # The chain rule can refer to derivatives which were skipped because they
+    # are structurally zero, so those have to be provided after all.
+    for expr in list(jac.values()):
+        for derivative in expr.atoms(sympy.Derivative):
+            target = _partial_subs(derivative, functions_as_vars)
+            if target not in jac and target.expr in model:
+                jac[target] = sympy.S.Zero
     # Next lines are needed for the Hessian, where the components of model still
     # contain functions instead of vars.
     if as_functions:
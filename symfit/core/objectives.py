@@ -18,14 +18,32 @@ from collections import OrderedDict
 from six import add_metaclass
 
 import numpy as np
+from scipy import sparse
 
 from .support import cached_property, keywordonly, key2str
+from .models import HoistedData
 
 @add_metaclass(abc.ABCMeta)
 class BaseObjective(object):
     """
     ABC for objective functions. Implements basic data handling.
+
+    Minimizers typically ask for the value, jacobian and hessian of an
+    objective at the same parameter values. Therefore, the evaluated model is
+    remembered for the last :attr:`cache_size` vectors of free parameters
+    provided as ``ordered_parameters``, such that these calls share a single
+    evaluation of the model. The number of cache hits and misses are recorded
+    in :attr:`cache_hits` and :attr:`cache_misses` respectively.
+
+    The subexpressions of the model which only depend on the data and the
+    fixed parameters are computed once, and kept in :attr:`hoisted_data`
+    (a :class:`~symfit.core.models.HoistedData`) for every evaluation of the
+    model after that.
     """
+    #: Maximum number of parameter vectors for which the evaluated model is
+    #: remembered. Set to 0 to disable caching.
+    cache_size = 4
+
     def __init__(self, model, data):
         """
         :param model: `symfit` style model.
@@ -33,9 +51,64 @@ class BaseObjective(object):
         """
         self.model = model
         self.data = data
+        self.clear_cache()
         # Compares the model with the data to see if they are compatible.
         self._sanity_checking()
 
+    def clear_cache(self):
+        """
+        Forget all remembered model evaluations and hoisted subexpressions,
+        and reset the cache counters.
+        """
+        self._model_cache = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.hoisted_data = HoistedData()
+
+    def _cached_model_eval(self, ordered_parameters, parameters, param_levels,
+                           evaluate):
+        """
+        Look up the evaluated model in the cache, or evaluate it and store the
+        result. Only calls where all parameters are provided positionally
+        through ``ordered_parameters`` are cached, since only then the key
+        describes the call completely.
+
+        :param ordered_parameters: List of free parameter values.
+        :param parameters: Parameters provided as keyword arguments.
+        :param param_levels: Tuple of the requested outputs: 0 for the model,
+            1 for its jacobian and 2 for its hessian.
+        :param evaluate: Callable without arguments, returning a tuple with
+            the outputs corresponding to ``param_levels``.
+        :return: tuple with the outputs corresponding to ``param_levels``.
+        """
+        if parameters or not self.cache_size:
+            return evaluate()
+        values = np.asarray(ordered_parameters)
+        if values.dtype == object:
+            return evaluate()
+        # The dtype is part of the key, e.g. complex steps should not be
+        # confused with real parameter values.
+        key = (values.dtype.str, values.tobytes())
+
+        entry = self._model_cache.get(key)
+        if entry is not None and all(level in entry for level in param_levels):
+            self.cache_hits += 1
+            # Mark as most recently used.
+            self._model_cache[key] = self._model_cache.pop(key)
+            return tuple(entry[level] for level in param_levels)
+
+        self.cache_misses += 1
+        results = evaluate()
+        if entry is None:
+            entry = {}
+            while len(self._model_cache) >= self.cache_size:
+                self._model_cache.popitem(last=False)
+        else:
+            del self._model_cache[key]
+        entry.update(zip(param_levels, results))
+        self._model_cache[key] = entry
+        return results
+
     @cached_property
     def dependent_data(self):
         """
@@ -48,6 +121,14 @@ class BaseObjective(object):
         return OrderedDict((var, self.data[var])
                            for var in self.model.dependent_vars)
 
+    @cached_property
+    def _dependent_var_set(self):
+        """
+        :return: set of the dependent variables of the model, for fast
+            membership tests.
+        """
+        return set(self.model.dependent_vars)
+
     @cached_property
     def independent_data(self):
         """
@@ -84,15 +165,17 @@ class BaseObjective(object):
         :param parameters: parameters as keyword arguments.
         :return: evaluated model.
         """
-        # zip will stop when the shortest of the two is exhausted
-        parameters.update(dict(zip(self.model.free_params, ordered_parameters)))
-        parameters.update(self._invariant_kwargs)
-        result = self.model(**key2str(parameters))._asdict()
-        # Return only the components corresponding to the dependent data.
-        return self._shape_of_dependent_data(
-            [comp for var, comp in result.items()
-             if var in self.model.dependent_vars]
-        )
+        def evaluate():
+            args, kwargs = self._model_arguments(ordered_parameters, parameters)
+            result = self.model(*args, **kwargs)._asdict()
+            # Return only the components corresponding to the dependent data.
+            return (self._shape_of_dependent_data(
+                [comp for var, comp in result.items()
+                 if var in self._dependent_var_set]
+            ),)
+        return self._cached_model_eval(
+            ordered_parameters, parameters, (0,), evaluate
+        )[0]
 
     def _shape_of_dependent_data(self, model_output, param_level=0):
         """
@@ -142,6 +225,65 @@ class BaseObjective(object):
         )
         return kwargs
 
+    @cached_property
+    def _positional_template(self):
+        """
+        Prepares calling ``self.model`` positionally, which avoids binding
+        keyword arguments to its signature on every iteration.
+
+        :return: tuple of the positions of the free parameters in the signature
+            of ``self.model``, and a list of arguments to the model with the
+            invariant kwargs already filled in. The latter is ``None`` if the
+            invariant kwargs and free parameters do not cover the signature.
+        """
+        names = list(self.model.__signature__.parameters)
+        invariant = key2str(self._invariant_kwargs)
+        free_names = [p.name for p in self.model.free_params]
+        if set(names) != set(invariant) | set(free_names):
+            return [], None
+        positions = [names.index(name) for name in free_names]
+        return positions, [invariant.get(name) for name in names]
+
+    def _model_arguments(self, ordered_parameters, parameters):
+        """
+        Combine the parameters provided to the objective with the invariant
+        kwargs into the arguments for ``self.model``. If all free parameters
+        are given as ``ordered_parameters``, the model is called positionally.
+
+        :param ordered_parameters: List of parameter, in alphabetical order.
+        :param parameters: parameters as keyword arguments.
+        :return: tuple of args and kwargs to call ``self.model`` with.
+        """
+        hoisted = {'hoisted_data': self.hoisted_data} if self._hoists else {}
+        positions, template = self._positional_template
+        if (template is not None and not parameters and
+                len(ordered_parameters) == len(positions)):
+            args = list(template)
+            for position, value in zip(positions, ordered_parameters):
+                args[position] = value
+            return args, hoisted
+        # zip will stop when the shortest of the two is exhausted
+        kwargs = dict(parameters)
+        kwargs.update(dict(zip(self.model.free_params, ordered_parameters)))
+        kwargs.update(self._invariant_kwargs)
+        kwargs = key2str(kwargs)
+        kwargs.update(hoisted)
+        return (), kwargs
+
+    @cached_property
+    def _hoists(self):
+        """
+        :return: ``True`` if the model can take the subexpressions which only
+            depend on its data and fixed parameters from :attr:`hoisted_data`.
+            This requires all of those arguments to be among the invariant
+            kwargs of this objective.
+        """
+        hoisted_arguments = getattr(self.model, '_hoisted_arguments', None)
+        if hoisted_arguments is None:
+            return False
+        invariant = key2str(self._invariant_kwargs)
+        return all(arg.name in invariant for arg in hoisted_arguments)
+
     def __eq__(self, other):
         """
         Objectives are considered equal if they are of the same type, have the
@@ -176,6 +318,13 @@ class BaseObjective(object):
         self.independent_data
         self.sigma_data
 
+    def __getstate__(self):
+        # Remembered evaluations are not worth sending along.
+        state = self.__dict__.copy()
+        state['_model_cache'] = OrderedDict()
+        state['hoisted_data'] = HoistedData()
+        return state
+
 
 @add_metaclass(abc.ABCMeta)
 class GradientObjective(BaseObjective):
@@ -192,15 +341,18 @@ class GradientObjective(BaseObjective):
         :param parameters: parameters as keyword arguments.
         :return: evaluated jacobian
         """
-        parameters.update(dict(zip(self.model.free_params, ordered_parameters)))
-        parameters.update(self._invariant_kwargs)
-        result = self.model.eval_jacobian(**key2str(parameters))._asdict()
-        # Return only the components corresponding to the dependent data.
-        return self._shape_of_dependent_data(
-            [comp for var, comp in result.items()
-             if var in self.model.dependent_vars],
-            param_level=1
-        )
+        def evaluate():
+            args, kwargs = self._model_arguments(ordered_parameters, parameters)
+            result = self.model.eval_jacobian(*args, **kwargs)._asdict()
+            # Return only the components corresponding to the dependent data.
+            return (self._shape_of_dependent_data(
+                [comp for var, comp in result.items()
+                 if var in self._dependent_var_set],
+                param_level=1
+            ),)
+        return self._cached_model_eval(
+            ordered_parameters, parameters, (1,), evaluate
+        )[0]
 
 
 @add_metaclass(abc.ABCMeta)
@@ -208,6 +360,11 @@ class HessianObjective(GradientObjective):
     """
     ABC for objectives that support hessian methods.
     """
+    #: Number of data points which are reduced at a time when combining the
+    #: jacobian and hessian of the model into the hessian of the objective.
+    #: This bounds the size of the temporary arrays needed for the reduction.
+    chunk_size = 2 ** 16
+
     @abc.abstractmethod
     def eval_hessian(self, ordered_parameters=[], **parameters):
         """
@@ -218,14 +375,65 @@ class HessianObjective(GradientObjective):
         :param parameters: parameters as keyword arguments.
         :return: evaluated hessian
         """
-        parameters.update(dict(zip(self.model.free_params, ordered_parameters)))
-        parameters.update(self._invariant_kwargs)
-        result = self.model.eval_hessian(**key2str(parameters))._asdict()
-        # Return only the components corresponding to the dependent data.
-        return self._shape_of_dependent_data(
-            [comp for var, comp in result.items()
-             if var in self.model.dependent_vars],
-            param_level=2
+        def evaluate():
+            args, kwargs = self._model_arguments(ordered_parameters, parameters)
+            result = self.model.eval_hessian(*args, **kwargs)._asdict()
+            # Return only the components corresponding to the dependent data.
+            return (self._shape_of_dependent_data(
+                [comp for var, comp in result.items()
+                 if var in self._dependent_var_set],
+                param_level=2
+            ),)
+        return self._cached_model_eval(
+            ordered_parameters, parameters, (2,), evaluate
+        )[0]
+
+    def eval_fused(self, ordered_parameters=[], **parameters):
+        """
+        Evaluate the objective, its jacobian and its hessian for the same
+        parameter values. Objectives which can compute all three from a single
+        evaluation of the model should override this, by default they are
+        simply evaluated one after the other.
+
+        :param ordered_parameters: List of parameter, in alphabetical order.
+            Typically provided by the minimizer.
+        :param parameters: parameters as keyword arguments.
+        :return: tuple of the evaluated objective, jacobian and hessian.
+        """
+        return (self(ordered_parameters, **parameters),
+                self.eval_jacobian(ordered_parameters, **parameters),
+                self.eval_hessian(ordered_parameters, **parameters))
+
+    def _eval_model_fused(self, ordered_parameters=[], **parameters):
+        """
+        Evaluate the model, its jacobian and its hessian for given parameter
+        values. Models which implement ``eval_fused`` do this in a single pass.
+
+        :param ordered_parameters: List of parameter, in alphabetical order.
+            Typically provided by the minimizer.
+        :param parameters: parameters as keyword arguments.
+        :return: tuple of evaluated model, jacobian and hessian, identical to
+            what ``__call__``, ``eval_jacobian`` and ``eval_hessian`` of this
+            class return.
+        """
+        def evaluate():
+            args, kwargs = self._model_arguments(ordered_parameters, parameters)
+            if hasattr(self.model, 'eval_fused'):
+                results = self.model.eval_fused(*args, **kwargs)
+            else:
+                results = (self.model(*args, **kwargs),
+                           self.model.eval_jacobian(*args, **kwargs),
+                           self.model.eval_hessian(*args, **kwargs))
+            # Return only the components corresponding to the dependent data.
+            return tuple(
+                self._shape_of_dependent_data(
+                    [comp for var, comp in result._asdict().items()
+                     if var in self._dependent_var_set],
+                    param_level=param_level
+                ) for param_level, result in enumerate(results)
+            )
+        return self._cached_model_eval(
+            ordered_parameters, parameters, (0, 1, 2), evaluate
         )
 
 
@@ -268,19 +476,19 @@ class VectorLeastSquares(GradientObjective):
             ordered_parameters, **parameters
         )
 
-        result = len(self.model.params) * [0.0]
+        result = 0.0
         for ans, y, row in zip(evaluated_func, self.model.dependent_vars,
                                evaluated_jac):
             dep_data = self.dependent_data.get(y, None)
             if dep_data is not None:
-                for index, component in enumerate(row):
-                    result[index] += component * (
-                        (self.dependent_data[y] - ans) / self.sigma_data[self.model.sigmas[y]] ** 2
-                    )
-        result *= (1 / chi)
-        result = np.nan_to_num(result)
-        result = [item.flatten() for item in result]
-        return - np.array(result).T
+                result = result + np.asarray(row) * (
+                    (self.dependent_data[y] - ans) / self.sigma_data[self.model.sigmas[y]] ** 2
+                )
+        # The derivative of chi is taken to be zero where chi itself is zero.
+        result = np.divide(result, chi, out=np.zeros(np.shape(result)),
+                           where=chi != 0)
+        result = result.reshape(len(self.model.params), -1)
+        return - result.T
 
 
 class LeastSquares(HessianObjective):
@@ -311,17 +519,7 @@ class LeastSquares(HessianObjective):
         evaluated_func = super(LeastSquares, self).__call__(
             ordered_parameters, **parameters
         )
-
-        chi2 = [0 for _ in evaluated_func]
-        for index, (dep_var, dep_var_value) in enumerate(zip(self.model.dependent_vars, evaluated_func)):
-            dep_data = self.dependent_data.get(dep_var, None)
-            if dep_data is not None:
-                sigma = self.sigma_data[self.model.sigmas[dep_var]]
-                chi2[index] += np.sum(
-                    (dep_var_value - dep_data) ** 2 / sigma ** 2
-                )
-        chi2 = np.sum(chi2) if flatten_components else chi2
-        return chi2 / 2
+        return self._value(evaluated_func, flatten_components)
 
     def eval_jacobian(self, ordered_parameters=[], **parameters):
         """
@@ -338,18 +536,7 @@ class LeastSquares(HessianObjective):
         evaluated_jac = super(LeastSquares, self).eval_jacobian(
             ordered_parameters, **parameters
         )
-
-        result = 0
-        for var, f, jac_comp in zip(self.model.dependent_vars, evaluated_func,
-                                    evaluated_jac):
-            y = self.dependent_data.get(var, None)
-            sigma_var = self.model.sigmas[var]
-            if y is not None:
-                sigma = self.sigma_data[sigma_var]
-                pre_sum = jac_comp * ((y - f) / sigma**2)[np.newaxis, ...]
-                axes = tuple(range(1, len(pre_sum.shape)))
-                result -= np.sum(pre_sum, axis=axes, keepdims=False)
-        return np.atleast_1d(np.squeeze(np.array(result)))
+        return self._jacobian(evaluated_func, evaluated_jac)
 
     def eval_hessian(self, ordered_parameters=[], **parameters):
         """
@@ -360,17 +547,169 @@ class LeastSquares(HessianObjective):
             :class:`~symfit.core.argument.Parameter`'s to evaluate :math:`\\nabla_\\vec{p} S` at.
         :return: ``np.array`` of length equal to the number of parameters..
         """
+        evaluated_func, evaluated_jac, evaluated_hess = self._eval_model_fused(
+            ordered_parameters, **parameters
+        )
+        return self._hessian(evaluated_func, evaluated_jac, evaluated_hess)
+
+    def eval_fused(self, ordered_parameters=[], **parameters):
+        """
+        :math:`S`, :math:`\\nabla_\\vec{p} S` and :math:`\\nabla_\\vec{p}^2 S`,
+        computed from a single evaluation of the model, its jacobian and its
+        hessian.
+
+        :param parameters: values of the
+            :class:`~symfit.core.argument.Parameter`'s to evaluate at.
+        :return: tuple of the value, jacobian and hessian of :math:`S`.
+        """
+        evaluated_func, evaluated_jac, evaluated_hess = self._eval_model_fused(
+            ordered_parameters, **parameters
+        )
+        return (self._value(evaluated_func),
+                self._jacobian(evaluated_func, evaluated_jac),
+                self._hessian(evaluated_func, evaluated_jac, evaluated_hess))
+
+    def eval_residuals(self, ordered_parameters=[], **parameters):
+        """
+        Weighted residuals :math:`r_i(x_i, \\vec{p}) / \\sigma_i(x_i)` of all
+        components with data, flattened and concatenated, such that :math:`S`
+        is half of their sum of squares.
+
+        :param parameters: values of the
+            :class:`~symfit.core.argument.Parameter`'s to evaluate at.
+        :return: one dimensional ``np.array``.
+        """
+        evaluated_func = super(LeastSquares, self).__call__(
+            ordered_parameters, **parameters
+        )
+        residuals = [np.ravel(residual) for residual
+                     in self._residuals(evaluated_func) if residual is not None]
+        return np.concatenate(residuals)
+
+    def eval_residual_jacobian(self, ordered_parameters=[], **parameters):
+        """
+        Jacobian of :meth:`eval_residuals` in the
+        :class:`~symfit.core.argument.Parameter`'s.
+
+        :param parameters: values of the
+            :class:`~symfit.core.argument.Parameter`'s to evaluate at.
+        :return: ``np.array`` of shape (n_residuals, n_params).
+        """
         evaluated_func = super(LeastSquares, self).__call__(
             ordered_parameters, **parameters
         )
         evaluated_jac = super(LeastSquares, self).eval_jacobian(
             ordered_parameters, **parameters
         )
-        evaluated_hess = super(LeastSquares, self).eval_hessian(
+        n_params = len(self.model.params)
+        blocks = []
+        for var, residual, jac_comp in zip(self.model.dependent_vars,
+                                           self._residuals(evaluated_func),
+                                           evaluated_jac):
+            if residual is not None:
+                sigma = self.sigma_data[self.model.sigmas[var]]
+                jac_comp = np.broadcast_to(jac_comp / sigma,
+                                           (n_params,) + residual.shape)
+                blocks.append(jac_comp.reshape(n_params, -1))
+        return np.concatenate(blocks, axis=1).T
+
+    def eval_sparse_residual_jacobian(self, ordered_parameters=[], **parameters):
+        """
+        Jacobian of :meth:`eval_residuals` as a sparse matrix, which skips the
+        entries which are structurally zero according to the
+        ``jacobian_sparsity`` of the model. This requires a model with an
+        ``eval_sparse_jacobian``.
+
+        :param parameters: values of the
+            :class:`~symfit.core.argument.Parameter`'s to evaluate at.
+        :return: :class:`scipy.sparse.csr_matrix` of shape
+            (n_residuals, n_params).
+        """
+        evaluated_func = super(LeastSquares, self).__call__(
             ordered_parameters, **parameters
         )
+        args, kwargs = self._model_arguments(ordered_parameters, parameters)
+        sparse_jac = self.model.eval_sparse_jacobian(*args, **kwargs)._asdict()
+        blocks = []
+        for var, residual in zip(self.model.dependent_vars,
+                                 self._residuals(evaluated_func)):
+            if residual is None:
+                continue
+            block = sparse_jac[var]
+            if block.shape[1] != residual.size:
+                # The component is broadcast to the shape of the data.
+                if block.shape[1] != 1:
+                    raise ValueError(
+                        'The component {} can not be broadcast to the shape '
+                        'of its data {}.'.format(var, residual.shape)
+                    )
+                block = block[:, np.zeros(residual.size, dtype=int)]
+            sigma = self.sigma_data[self.model.sigmas[var]]
+            weights = np.broadcast_to(1 / np.asarray(sigma), residual.shape)
+            blocks.append(block.multiply(weights.reshape(1, -1)))
+        return sparse.hstack(blocks).T.tocsr()
+
+    @cached_property
+    def residual_jacobian_sparsity(self):
+        """
+        :return: :class:`scipy.sparse.csr_matrix` of booleans with shape
+            (n_residuals, n_params), indicating which entries of the Jacobian
+            of :meth:`eval_residuals` are not structurally zero.
+        """
+        rows = []
+        for var, pattern in zip(self.model, self.model.jacobian_sparsity):
+            if var not in self.model.dependent_vars:
+                continue
+            y = self.dependent_data.get(var, None)
+            if y is not None:
+                sigma = self.sigma_data[self.model.sigmas[var]]
+                size = np.broadcast(y, sigma).size
+                rows.append(sparse.kron(np.ones((size, 1), dtype=bool), pattern))
+        return sparse.vstack(rows, format='csr', dtype=bool)
+
+    def _residuals(self, evaluated_func):
+        """
+        :return: list of the weighted residuals of every component, or
+            ``None`` for components without data.
+        """
+        residuals = []
+        for var, f in zip(self.model.dependent_vars, evaluated_func):
+            y = self.dependent_data.get(var, None)
+            if y is None:
+                residuals.append(None)
+            else:
+                sigma = self.sigma_data[self.model.sigmas[var]]
+                residuals.append(np.asarray((f - y) / sigma))
+        return residuals
+
+    def _value(self, evaluated_func, flatten_components=True):
+        chi2 = [0 for _ in evaluated_func]
+        for index, (dep_var, dep_var_value) in enumerate(zip(self.model.dependent_vars, evaluated_func)):
+            dep_data = self.dependent_data.get(dep_var, None)
+            if dep_data is not None:
+                sigma = self.sigma_data[self.model.sigmas[dep_var]]
+                chi2[index] += np.sum(
+                    (dep_var_value - dep_data) ** 2 / sigma ** 2
+                )
+        chi2 = np.sum(chi2) if flatten_components else chi2
+        return chi2 / 2
 
+    def _jacobian(self, evaluated_func, evaluated_jac):
         result = 0
+        for var, f, jac_comp in zip(self.model.dependent_vars, evaluated_func,
+                                    evaluated_jac):
+            y = self.dependent_data.get(var, None)
+            sigma_var = self.model.sigmas[var]
+            if y is not None:
+                sigma = self.sigma_data[sigma_var]
+                pre_sum = jac_comp * ((y - f) / sigma**2)[np.newaxis, ...]
+                axes = tuple(range(1, len(pre_sum.shape)))
+                result -= np.sum(pre_sum, axis=axes, keepdims=False)
+        return np.atleast_1d(np.squeeze(np.array(result)))
+
+    def _hessian(self, evaluated_func, evaluated_jac, evaluated_hess):
+        n_params = len(self.model.params)
+        result = np.zeros((n_params, n_params))
         for var, f, jac_comp, hess_comp in zip(self.model.dependent_vars,
                                                evaluated_func, evaluated_jac,
                                                evaluated_hess):
@@ -378,14 +717,232 @@ class LeastSquares(HessianObjective):
             sigma_var = self.model.sigmas[var]
             if y is not None:
                 sigma = self.sigma_data[sigma_var]
-                p1 = hess_comp * ((y - f) / sigma**2)[np.newaxis, np.newaxis, ...]
-                # Outer product
-                p2 = np.einsum('i...,j...->ij...', jac_comp, jac_comp)
-                p2 = p2 / sigma[np.newaxis, np.newaxis, ...]**2
-                # We sum away everything except the matrices in the axes 0 & 1.
-                axes = tuple(range(2, len(p2.shape)))
-                result += np.sum(p2 - p1, axis=axes, keepdims=False)
-        return np.atleast_2d(np.squeeze(np.array(result)))
+                # Every component only contributes to the block of the
+                # parameters it depends on.
+                block = self._component_parameters[var]
+                contribution = _reduce_hessian(
+                    block, jac_comp, 1 / sigma**2,
+                    hess_comp, (y - f) / sigma**2, chunk_size=self.chunk_size
+                )
+                result = result.astype(np.result_type(result, contribution),
+                                       copy=False)
+                result[np.ix_(block, block)] += contribution
+        return np.atleast_2d(np.squeeze(result))
+
+    @cached_property
+    def _component_parameters(self):
+        """
+        :return: dict of every dependent variable to the indices of the
+            parameters it depends on, according to the ``jacobian_sparsity``
+            of the model.
+        """
+        pattern = self.model.jacobian_sparsity.toarray()
+        return {var: np.flatnonzero(row) for var, row in zip(self.model, pattern)
+                if var in self._dependent_var_set}
+
+
+class VariableProjection(LeastSquares):
+    """
+    :class:`LeastSquares` in which the parameters that enter the model
+    linearly are eliminated by variable projection. For given values of the
+    other, nonlinear parameters, the best values of the linear parameters
+    follow from a weighted linear least squares problem, which is solved in
+    every evaluation. Minimizers therefore only have to search the space of
+    the nonlinear parameters, which usually takes far fewer iterations::
+
+        fit = Fit(model, x=xdata, y=ydata, objective=VariableProjection)
+
+    The linear parameters are the free parameters in the ``linear_params`` of
+    the model which have no bounds, see :attr:`projected_params`. Their values
+    are solved for whenever they are not provided, in which case the
+    parameters given positionally are those in :attr:`nonlinear_params`, and
+    the jacobian and hessian are those of the projected objective with
+    respect to these parameters. If all of them are provided, this objective
+    is identical to :class:`LeastSquares`.
+    """
+    def clear_cache(self):
+        super(VariableProjection, self).clear_cache()
+        self._last_projection = (None, None)
+
+    @cached_property
+    def projected_params(self):
+        """
+        :return: list of the free parameters which are solved for, because
+            the model depends on them linearly and they are unbounded. If
+            that would leave no parameters for the minimizer, none are
+            projected: such fits are solved in closed form by
+            :class:`~symfit.core.minimizers.LinearLeastSquares` instead.
+        """
+        linear = getattr(self.model, 'linear_params', [])
+        projected = [p for p in self.model.free_params
+                     if p in linear and p.min is None and p.max is None]
+        if len(projected) == len(self.model.free_params):
+            return []
+        return projected
+
+    @cached_property
+    def nonlinear_params(self):
+        """
+        :return: list of the free parameters which are not projected, to be
+            provided by the minimizer.
+        """
+        return [p for p in self.model.free_params
+                if p not in self.projected_params]
+
+    @cached_property
+    def _projected_indices(self):
+        """
+        :return: tuple of the indices of the projected and of the nonlinear
+            parameters among the free parameters of the model.
+        """
+        free = self.model.free_params
+        return ([free.index(p) for p in self.projected_params],
+                [free.index(p) for p in self.nonlinear_params])
+
+    def solve_projected(self, ordered_parameters=[], **parameters):
+        """
+        Solve for the projected parameters.
+
+        :param ordered_parameters: values of the nonlinear parameters.
+        :param parameters: parameters as keyword arguments.
+        :return: list of the best values of :attr:`projected_params`.
+        """
+        values = self._project(ordered_parameters, parameters)
+        projected, _ = self._projected_indices
+        return [values[index] for index in projected]
+
+    def _project(self, ordered_parameters, parameters):
+        """
+        Solve for the projected parameters, given the other free parameters.
+
+        :return: ``np.array`` of the values of all free parameters of the
+            model, or ``None`` if the projected parameters are provided in
+            ``parameters`` already.
+        """
+        if all(p.name in parameters for p in self.projected_params):
+            return None
+        values = np.asarray(ordered_parameters)
+        key = None
+        if not parameters and values.dtype != object:
+            key = (values.dtype.str, values.tobytes())
+            if self._last_projection[0] == key:
+                return self._last_projection[1]
+
+        named = dict(zip([p.name for p in self.nonlinear_params], values))
+        named.update(parameters)
+        projected, nonlinear = self._projected_indices
+        free = np.zeros(len(self.model.free_params),
+                        dtype=np.result_type(values, float))
+        free[nonlinear] = [named[p.name] for p in self.nonlinear_params]
+        # The residuals are linear in the projected parameters, so evaluating
+        # them and their jacobian with all projected parameters at zero gives
+        # the linear least squares problem to solve.
+        residuals = super(VariableProjection, self).eval_residuals(free)
+        jac = super(VariableProjection, self).eval_residual_jacobian(free)
+        free[projected] = np.linalg.lstsq(jac[:, projected], - residuals,
+                                          rcond=None)[0]
+        if key is not None:
+            self._last_projection = (key, free)
+        return free
+
+    @keywordonly(flatten_components=True)
+    def __call__(self, ordered_parameters=[], **parameters):
+        flatten_components = parameters.pop('flatten_components')
+        free = self._project(ordered_parameters, parameters)
+        if free is None:
+            return super(VariableProjection, self).__call__(
+                ordered_parameters, flatten_components=flatten_components,
+                **parameters
+            )
+        return super(VariableProjection, self).__call__(
+            free, flatten_components=flatten_components
+        )
+
+    def eval_jacobian(self, ordered_parameters=[], **parameters):
+        """
+        Jacobian of the projected objective. Since the projected parameters
+        are optimal, it is the jacobian of :class:`LeastSquares` with
+        respect to the nonlinear parameters.
+        """
+        free = self._project(ordered_parameters, parameters)
+        if free is None:
+            return super(VariableProjection, self).eval_jacobian(
+                ordered_parameters, **parameters
+            )
+        jac = super(VariableProjection, self).eval_jacobian(free)
+        return jac[self._projected_indices[1]]
+
+    def eval_hessian(self, ordered_parameters=[], **parameters):
+        """
+        Hessian of the projected objective, the Schur complement of the
+        block of the projected parameters in the hessian of
+        :class:`LeastSquares`.
+        """
+        free = self._project(ordered_parameters, parameters)
+        if free is None:
+            return super(VariableProjection, self).eval_hessian(
+                ordered_parameters, **parameters
+            )
+        hess = super(VariableProjection, self).eval_hessian(free)
+        return self._projected_hessian(hess)
+
+    def eval_fused(self, ordered_parameters=[], **parameters):
+        free = self._project(ordered_parameters, parameters)
+        if free is None:
+            return super(VariableProjection, self).eval_fused(
+                ordered_parameters, **parameters
+            )
+        value, jac, hess = super(VariableProjection, self).eval_fused(free)
+        return (value, jac[self._projected_indices[1]],
+                self._projected_hessian(hess))
+
+    def eval_residuals(self, ordered_parameters=[], **parameters):
+        free = self._project(ordered_parameters, parameters)
+        if free is None:
+            return super(VariableProjection, self).eval_residuals(
+                ordered_parameters, **parameters
+            )
+        return super(VariableProjection, self).eval_residuals(free)
+
+    def eval_residual_jacobian(self, ordered_parameters=[], **parameters):
+        """
+        Jacobian of the projected residuals with respect to the nonlinear
+        parameters, in the approximation of Kaufman: the jacobian of the
+        residuals projected onto the orthogonal complement of the columns of
+        the projected parameters.
+        """
+        free = self._project(ordered_parameters, parameters)
+        if free is None:
+            return super(VariableProjection, self).eval_residual_jacobian(
+                ordered_parameters, **parameters
+            )
+        jac = super(VariableProjection, self).eval_residual_jacobian(free)
+        projected, nonlinear = self._projected_indices
+        q, _ = np.linalg.qr(jac[:, projected])
+        jac_nonlinear = jac[:, nonlinear]
+        return jac_nonlinear - q.dot(q.T.dot(jac_nonlinear))
+
+    def eval_sparse_residual_jacobian(self, ordered_parameters=[], **parameters):
+        # The projection makes the jacobian dense.
+        return sparse.csr_matrix(
+            self.eval_residual_jacobian(ordered_parameters, **parameters)
+        )
+
+    @cached_property
+    def residual_jacobian_sparsity(self):
+        # The projection makes the jacobian dense.
+        n_residuals = super(VariableProjection, self).residual_jacobian_sparsity.shape[0]
+        return sparse.csr_matrix(
+            np.ones((n_residuals, len(self.nonlinear_params)), dtype=bool)
+        )
+
+    def _projected_hessian(self, hess):
+        projected, nonlinear = self._projected_indices
+        hess = np.atleast_2d(hess)
+        h_nn = hess[np.ix_(nonlinear, nonlinear)]
+        h_pn = hess[np.ix_(projected, nonlinear)]
+        h_pp = hess[np.ix_(projected, projected)]
+        return h_nn - h_pn.T.dot(np.linalg.lstsq(h_pp, h_pn, rcond=None)[0])
 
 
 class HessianObjectiveJacApprox(HessianObjective):
@@ -414,11 +971,29 @@ class HessianObjectiveJacApprox(HessianObjective):
         result = super(HessianObjectiveJacApprox, self).__call__(
             ordered_parameters, **parameters
         )
+        return self._zero_hessian(result)
+
+    def _eval_model_fused(self, ordered_parameters=[], **parameters):
+        """
+        :return: The evaluated model and jacobian, together with ``None`` for
+            the Hessian of every component of the model.
+        """
+        evaluated_func = super(HessianObjectiveJacApprox, self).__call__(
+            ordered_parameters, **parameters
+        )
+        evaluated_jac = super(HessianObjectiveJacApprox, self).eval_jacobian(
+            ordered_parameters, **parameters
+        )
+        # The hessian of the model is left out altogether, rather than
+        # reduced as zeros.
+        return evaluated_func, evaluated_jac, [None] * len(evaluated_func)
+
+    def _zero_hessian(self, evaluated_func):
         num_params = len(self.model.params)
         return [np.broadcast_to(
                     np.zeros_like(comp),
                     (num_params, num_params) + comp.shape
-                ) for comp in result]
+                ) for comp in evaluated_func]
 
 
 class BaseIndependentObjective(BaseObjective):
@@ -457,11 +1032,7 @@ class LogLikelihood(HessianObjective, BaseIndependentObjective):
         evaluated_func = super(LogLikelihood, self).__call__(
             ordered_parameters, **parameters
         )
-
-        ans = - np.nansum(
-            [np.nansum(np.log(component)) for component in evaluated_func]
-        )
-        return ans
+        return self._value(evaluated_func)
 
     @keywordonly(apply_func=np.nansum)
     def eval_jacobian(self, ordered_parameters=[], **parameters):
@@ -480,19 +1051,7 @@ class LogLikelihood(HessianObjective, BaseIndependentObjective):
         evaluated_jac = super(LogLikelihood, self).eval_jacobian(
             ordered_parameters, **parameters
         )
-
-        result = []
-        for component, jac_comp in zip(evaluated_func, evaluated_jac):
-            component_sums = []
-            for df in jac_comp:
-                component_sums.append(
-                    - apply_func(
-                        df / component
-                    )
-                )
-            result.append(component_sums)
-        result = np.sum(result, axis=0)
-        return np.atleast_1d(np.squeeze(np.array(result)))
+        return self._jacobian(evaluated_func, evaluated_jac, apply_func)
 
     def eval_hessian(self, ordered_parameters=[], **parameters):
         """
@@ -502,25 +1061,53 @@ class LogLikelihood(HessianObjective, BaseIndependentObjective):
         :param parameters: values for the fit parameters.
         :return: array of length number of ``Parameter``'s in the model, with all partial derivatives evaluated at p, data.
         """
-        evaluated_func = super(LogLikelihood, self).__call__(
+        evaluated_func, evaluated_jac, evaluated_hess = self._eval_model_fused(
             ordered_parameters, **parameters
         )
-        evaluated_jac = super(LogLikelihood, self).eval_jacobian(
+        return self._hessian(evaluated_func, evaluated_jac, evaluated_hess)
+
+    def eval_fused(self, ordered_parameters=[], **parameters):
+        """
+        Log-likelihood, its jacobian and its hessian, computed from a single
+        evaluation of the model, its jacobian and its hessian.
+
+        :param parameters: values for the fit parameters.
+        :return: tuple of the value, jacobian and hessian of the
+            log-likelihood.
+        """
+        evaluated_func, evaluated_jac, evaluated_hess = self._eval_model_fused(
             ordered_parameters, **parameters
         )
-        evaluated_hess = super(LogLikelihood, self).eval_hessian(
-            ordered_parameters, **parameters
+        return (self._value(evaluated_func),
+                self._jacobian(evaluated_func, evaluated_jac),
+                self._hessian(evaluated_func, evaluated_jac, evaluated_hess))
+
+    def _value(self, evaluated_func):
+        return - np.nansum(
+            [np.nansum(np.log(component)) for component in evaluated_func]
         )
 
+    def _jacobian(self, evaluated_func, evaluated_jac, apply_func=np.nansum):
+        result = []
+        for component, jac_comp in zip(evaluated_func, evaluated_jac):
+            component_sums = []
+            for df in jac_comp:
+                component_sums.append(
+                    - apply_func(
+                        df / component
+                    )
+                )
+            result.append(component_sums)
+        result = np.sum(result, axis=0)
+        return np.atleast_1d(np.squeeze(np.array(result)))
+
+    def _hessian(self, evaluated_func, evaluated_jac, evaluated_hess):
         result = 0
+        block = np.arange(len(self.model.params))
         for f, jac_comp, hess_comp in zip(evaluated_func, evaluated_jac, evaluated_hess):
-            # Outer product
-            jac_outer_jac = np.einsum('i...,j...->ij...', jac_comp, jac_comp)
-            dd_logf = - hess_comp / f[np.newaxis, np.newaxis, ...] + \
-                      (1 / f**2)[np.newaxis, np.newaxis, ...] * jac_outer_jac
-            # We sum away everything except the matrices in the axes 0 & 1.
-            axes = tuple(range(2, len(dd_logf.shape)))
-            result += np.sum(dd_logf, axis=axes, keepdims=False)
+            result += _reduce_hessian(block, jac_comp, 1 / f**2,
+                                      hess_comp, 1 / f,
+                                      chunk_size=self.chunk_size)
 
         return np.atleast_2d(np.squeeze(np.array(result)))
 
@@ -557,4 +1144,54 @@ class MinimizeModel(HessianObjective, BaseIndependentObjective):
             )
             return np.array(evaluated_hess[0])
         else:
-            return None
\ No newline at end of file
+            return None
+
+
+def _reduce_hessian(block, jac, jac_weights, hess=None, hess_weights=None,
+                    chunk_size=HessianObjective.chunk_size):
+    """
+    Reduce the jacobian :math:`J` and hessian :math:`H` of a component of a
+    model to the matrix
+    :math:`\\sum_k w_k J_{ik} J_{jk} - \\sum_k v_k H_{ijk}`, where :math:`k`
+    runs over all data points. The products are summed in chunks of at most
+    ``chunk_size`` data points, such that the outer product of the jacobian is
+    never stored for all data points at once.
+
+    :param block: indices of the parameters :math:`i, j` to reduce.
+    :param jac: Jacobian of the component, of shape (n_params, ...).
+    :param jac_weights: the weights :math:`w`, broadcastable to the shape of
+        the data.
+    :param hess: Hessian of the component, of shape (n_params, n_params, ...),
+        or ``None`` to leave out the second term altogether.
+    :param hess_weights: the weights :math:`v`, broadcastable to the shape of
+        the data.
+    :param chunk_size: maximum number of data points per chunk.
+    :return: array of shape (len(block), len(block)).
+    """
+    n_block = len(block)
+    shape = jac.shape[1:]
+    if not shape:
+        jac, shape = jac[:, np.newaxis], (1,)
+        if hess is not None:
+            hess = hess[..., np.newaxis]
+    jac_weights = np.broadcast_to(jac_weights, shape)
+    dtypes = [jac, jac_weights]
+    if hess is not None:
+        hess_weights = np.broadcast_to(hess_weights, shape)
+        dtypes += [hess, hess_weights]
+    result = np.zeros((n_block, n_block), dtype=np.result_type(*dtypes))
+
+    # Chunk along the first axis of the data, which keeps slices of
+    # broadcasted arrays as views.
+    rows = max(1, chunk_size // max(1, int(np.prod(shape[1:]))))
+    for start in range(0, shape[0], rows):
+        chunk = slice(start, start + rows)
+        jac_chunk = jac[:, chunk][block].reshape(n_block, -1)
+        weighted = jac_chunk * jac_weights[chunk].reshape(-1)
+        result += jac_chunk.dot(weighted.T)
+        if hess is not None:
+            hess_chunk = hess[:, :, chunk][np.ix_(block, block)]
+            result -= hess_chunk.reshape(n_block, n_block, -1).dot(
+                hess_weights[chunk].reshape(-1)
+            )
+    return result
@@ -158,6 +158,252 @@ def sympy_to_py(func, args):
     )
     return wrapped_lambdafunc
 
+def _lambdify_printer():
+    """
+    :return: A code printer configured the way :func:`sympy.lambdify` does by
+        default, together with the namespace lambdified functions live in.
+        Code printed with the former can be executed in the latter.
+    """
+    try:
+        import scipy
+    except ImportError:
+        from sympy.printing.pycode import NumPyPrinter as Printer
+    else:
+        from sympy.printing.pycode import SciPyPrinter as Printer
+    printer = Printer({'fully_qualified_modules': False, 'inline': True,
+                       'allow_unknown_functions': True})
+    namespace = dict(lambdify((), 0).__globals__)
+    return printer, namespace
+
+def sympy_to_py_cse(assignments, args):
+    """
+    Turn an ordered mapping of symbols to expressions into a single Python
+    function, which evaluates all of the expressions in one pass. Common
+    subexpressions are searched for across all expressions using
+    :func:`sympy.cse`, so each of them is only computed once.
+
+    Expressions are allowed to depend on the symbols of earlier entries in
+    ``assignments``, which is how interdependent components are dealt with.
+
+    :param assignments: ``OrderedDict`` of symbol: expression pairs, in the
+        order in which they should be evaluated.
+    :param args: variables and parameters which are the arguments of the
+        resulting function.
+    :return: function which takes ``args`` positionally, and returns a tuple of
+        the evaluated expressions, in the order of ``assignments``.
+    """
+    return py_from_source(sympy_to_py_source(assignments, args))
+
+def sympy_to_py_source(assignments, args, single=False, hoist=()):
+    """
+    Generate the source code of the function made by :func:`sympy_to_py_cse`.
+    The source is self-contained apart from the namespace
+    :func:`sympy.lambdify` uses, so it can be stored and compiled again later
+    using :func:`py_from_source` without any symbolic work.
+
+    The subexpressions which only depend on the arguments in ``hoist`` can be
+    computed once and passed to the function as the keyword ``_hoisted``.
+    The source then also defines the function ``_symfit_hoisted``, which
+    takes the same arguments and returns the tuple to pass. Without
+    ``_hoisted``, these subexpressions are computed in place.
+
+    :param assignments: ``OrderedDict`` of symbol: expression pairs, in the
+        order in which they should be evaluated.
+    :param args: variables and parameters which are the arguments of the
+        function.
+    :param single: If ``True``, ``assignments`` has only one entry and the
+        function returns its value instead of a tuple.
+    :param hoist: arguments which are the same for many calls, typically the
+        data and fixed parameters.
+    :return: str of source code, defining the function ``_symfit_cse``.
+    """
+    args, replacements, reduced, hoisted = _cse_assignments(assignments, args,
+                                                            hoist=hoist)
+    printer, namespace = _lambdify_printer()
+    arg_list = ', '.join(printer.doprint(arg) for arg in args)
+    lines = []
+    if hoisted:
+        hoisted_replacements, hoisted_reduced = sympy.cse(
+            list(hoisted), symbols=sympy.numbered_symbols('_hoisted_cse')
+        )
+        lines.append('def _symfit_hoisted({}):'.format(arg_list))
+        for symbol, expr in hoisted_replacements:
+            lines.append('    {} = {}'.format(printer.doprint(symbol),
+                                              printer.doprint(expr)))
+        lines.append('    return ({})'.format(
+            ''.join(printer.doprint(expr) + ', ' for expr in hoisted_reduced)
+        ))
+        lines.append('def _symfit_cse({}, _hoisted=None):'.format(arg_list))
+        lines.append('    if _hoisted is None:')
+        lines.append('        _hoisted = _symfit_hoisted({})'.format(arg_list))
+        lines.append('    ({}) = _hoisted'.format(
+            ''.join(printer.doprint(symbol) + ', '
+                    for symbol in hoisted.values())
+        ))
+    else:
+        lines.append('def _symfit_cse({}):'.format(arg_list))
+    for symbol, expr in replacements:
+        lines.append('    {} = {}'.format(printer.doprint(symbol),
+                                          printer.doprint(expr)))
+    if single:
+        lines.append('    return {}'.format(printer.doprint(reduced[0])))
+    else:
+        lines.append('    return ({})'.format(
+            ''.join(printer.doprint(expr) + ', ' for expr in reduced)
+        ))
+    return '\n'.join(_printed_imports(printer, namespace) + lines)
+
+def sympy_to_kernel_source(assignments, args, single=False, printer=None):
+    """
+    Generate the code evaluating ``assignments`` for a single element of the
+    data, with common subexpressions eliminated like
+    :func:`sympy_to_py_source` does. This is the body of the loop over the
+    data used by the backends in :mod:`symfit.core.backends`. For every line
+    of code the arguments it depends on are recorded, such that the lines
+    which do not depend on the data can be moved out of that loop.
+
+    In the code, the arguments are named after their position, e.g.
+    ``_arg0``, such that their names never clash with those of the language
+    the code is printed in.
+
+    :param assignments: ``OrderedDict`` of symbol: expression pairs, in the
+        order in which they should be evaluated.
+    :param args: variables and parameters which are the arguments of the
+        code.
+    :param single: If ``True``, ``assignments`` has only one entry and the
+        code evaluates to its value instead of a tuple.
+    :param printer: :class:`~sympy.printing.codeprinter.CodePrinter` printing
+        the expressions. Defaults to Python code which is evaluated in the
+        namespace of :func:`sympy.lambdify`.
+    :return: JSON serializable dict with the names of the ``args``, the
+        ``lines`` of code as lists of the name assigned to, the expression and
+        the indices of the arguments it depends on, the names of the
+        ``outputs`` in the order of ``assignments``, the ``imports`` needed by
+        the code, and ``single``. ``None`` if the expressions can not be
+        evaluated element by element, such as matrix expressions and sums
+        over indices.
+    """
+    args, replacements, reduced, _ = _cse_assignments(assignments, args)
+    if any(expr.atoms(Idx, MatrixExpr) for expr in reduced):
+        return None
+    namespace = _lambdify_printer()[1]
+    if printer is None:
+        printer = _lambdify_printer()[0]
+
+    positional = [sympy.Symbol('_arg{}'.format(index))
+                  for index in range(len(args))]
+    renamed = dict(zip(args, positional))
+    dependencies = {arg: {index} for index, arg in enumerate(positional)}
+    lines = []
+    outputs = ['_value{}'.format(index) for index in range(len(reduced))]
+    assigned = list(replacements) + list(zip(
+        [sympy.Symbol(name) for name in outputs], reduced
+    ))
+    for symbol, expr in assigned:
+        expr = expr.xreplace(renamed)
+        dependencies[symbol] = set().union(*[
+            dependencies.get(free_symbol, set())
+            for free_symbol in expr.free_symbols
+        ])
+        lines.append([printer.doprint(symbol), printer.doprint(expr),
+                      sorted(dependencies[symbol])])
+    return {'args': [printer.doprint(arg) for arg in positional],
+            'lines': lines, 'outputs': outputs,
+            'imports': _printed_imports(printer, namespace), 'single': single}
+
+def _cse_assignments(assignments, args, hoist=()):
+    """
+    Prepare ``assignments`` for printing by eliminating their common
+    subexpressions, see :func:`sympy_to_py_source`.
+
+    :return: tuple of ``args`` with derivatives replaced by printable
+        variables, the list of symbol, expression pairs replacing the common
+        subexpressions, the list of reduced expressions in the order of
+        ``assignments``, and the ``OrderedDict`` of hoisted subexpressions.
+    """
+    # Inline the earlier entries, such that cse sees the complete structure of
+    # every expression and can pull out everything that is shared.
+    inlined = OrderedDict()
+    for symbol, expr in assignments.items():
+        inlined[symbol] = expr.xreplace(inlined)
+    # Replace the derivatives with printable variables, like sympy_to_py
+    derivatives = {var: Variable(var.name) for var in list(args) + list(inlined)
+                   if isinstance(var, sympy.Derivative)}
+    args = [derivatives.get(var, var) for var in args]
+    exprs = [expr.xreplace(derivatives) for expr in inlined.values()]
+
+    # cse does not respect the scope of summation indices, and does not play
+    # nice with matrix expressions, so those are printed as they are.
+    hoisted = OrderedDict()
+    if any(expr.atoms(Idx, MatrixExpr) for expr in exprs):
+        return args, [], exprs, hoisted
+    if hoist:
+        exprs = [_hoist_subexpressions(expr, set(hoist), hoisted)
+                 for expr in exprs]
+    replacements, reduced = sympy.cse(
+        exprs, symbols=sympy.numbered_symbols('_cse')
+    )
+    return args, replacements, reduced, hoisted
+
+def _printed_imports(printer, namespace):
+    """
+    :return: list of the import statements for the modules needed by the code
+        printed with ``printer``, as lambdify does.
+    """
+    return ['from {} import {}'.format(module, name)
+            for module, names in getattr(printer, 'module_imports', {}).items()
+            for name in sorted(names) if name not in namespace]
+
+def _hoist_subexpressions(expr, symbols, hoisted):
+    """
+    Replace the largest subexpressions of ``expr`` which only depend on
+    ``symbols`` by new symbols. The terms of a sum and the factors of a
+    product which only depend on ``symbols`` are taken together.
+
+    :param expr: sympy expression.
+    :param symbols: set of symbols.
+    :param hoisted: ``OrderedDict`` mapping the replaced subexpressions to the
+        symbols replacing them. New replacements are added to it.
+    :return: ``expr`` with the replacements made.
+    """
+    def depends_only_on_symbols(arg):
+        return arg.free_symbols <= symbols and (
+            isinstance(arg, Expr) or arg.is_Atom
+        )
+
+    if expr.is_Atom:
+        return expr
+    if depends_only_on_symbols(expr) and expr.free_symbols:
+        if expr not in hoisted:
+            hoisted[expr] = sympy.Symbol('_hoisted{}'.format(len(hoisted)))
+        return hoisted[expr]
+
+    args = list(expr.args)
+    if isinstance(expr, (sympy.Add, sympy.Mul)):
+        data_args = [arg for arg in args if depends_only_on_symbols(arg)]
+        if (1 < len(data_args) < len(args) and
+                any(arg.free_symbols for arg in data_args)):
+            args = [expr.func(*data_args)] + [arg for arg in args
+                                              if arg not in data_args]
+    return expr.func(*[_hoist_subexpressions(arg, symbols, hoisted)
+                       for arg in args])
+
+def py_from_source(source):
+    """
+    Compile source code generated by :func:`sympy_to_py_source`.
+
+    :param source: str of source code.
+    :return: the function defined by ``source``. If its source defines
+        ``_symfit_hoisted`` too, that is available as its attribute
+        ``hoisted``.
+    """
+    namespace = _lambdify_printer()[1]
+    exec(source, namespace)
+    func = namespace['_symfit_cse']
+    if '_symfit_hoisted' in namespace:
+        func.hoisted = namespace['_symfit_hoisted']
+    return func
+
 def sympy_to_scipy(func, vars, params):
     """
     Convert a symbolic expression to one scipy digs. Not used by ``symfit`` any more.
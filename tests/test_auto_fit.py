@@ -5,7 +5,7 @@ from symfit import (
     variables, parameters, Fit, Parameter, Variable,
     Equality, Model, GradientModel
 )
-from symfit.core.minimizers import BFGS, MINPACK, SLSQP, LBFGSB
+from symfit.core.minimizers import MINPACK, SLSQP, LBFGSB, LinearLeastSquares
 from symfit.distributions import Gaussian
 
 
@@ -65,7 +65,7 @@ def test_vector_fitting():
         b_i=xdata[1],
         c_i=xdata[2],
     )
-    assert isinstance(simple_fit.minimizer, BFGS)
+    assert isinstance(simple_fit.minimizer, LinearLeastSquares)
 
     constrained_fit = Fit(
         model=model,
@@ -199,7 +199,7 @@ def test_global_fitting():
     fit = Fit(
         model, x_1=xdata[0], x_2=xdata[1], y_1=ydata[0], y_2=ydata[1]
     )
-    assert isinstance(fit.minimizer, BFGS)
+    assert isinstance(fit.minimizer, LinearLeastSquares)
 
     # The next model does not share parameters, but is still a vector
     model = Model({
@@ -210,15 +210,15 @@ def test_global_fitting():
         model, x_1=xdata[0], x_2=xdata[1], y_1=ydata[0], y_2=ydata[1]
     )
     assert not model.shared_parameters
-    assert isinstance(fit.minimizer, BFGS)
+    assert isinstance(fit.minimizer, LinearLeastSquares)
 
-    # Scalar model, still use bfgs.
+    # Scalar model, still a linear least-squares problem.
     model = Model({
         y_1: a_1 * x_1**2 + b_1 * x_1,
     })
     fit = Fit(model, x_1=xdata[0], y_1=ydata[0])
     assert model.shared_parameters is False
-    assert isinstance(fit.minimizer, BFGS)
+    assert isinstance(fit.minimizer, LinearLeastSquares)
 
 
 def test_gaussian_2d_fitting():
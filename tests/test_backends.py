@@ -0,0 +1,217 @@
+"""
+This module contains tests for the :mod:`symfit.core.backends` module.
+"""
+
+from __future__ import division, print_function
+import os
+import shutil
+import warnings
+
+import pytest
+import numpy as np
+from scipy.special import jv
+from sympy import besselj
+
+from symfit import Model, Fit, Parameter, variables, parameters, exp, sin, erf, Piecewise
+from symfit.core import backends
+from symfit.core.backends import (
+    NumbaBackend, NumbaFunction, CBackend, CFunction, ChunkedBackend,
+    ChunkedFunction
+)
+
+@pytest.mark.parametrize('parallel', [False, True])
+def test_chunked_backend(parallel, monkeypatch):
+    """
+    The chunked backend evaluates the components, Jacobian and Hessian of a
+    model to the same values and shapes as the NumPy backend, also for data
+    with more than one dimension, and keeps hoisting fixed parameters.
+    """
+    monkeypatch.setattr(backends, 'cpu_count', lambda: 4)
+    x, y, z = variables('x, y, z')
+    a, b, c = parameters('a, b, c')
+    model_dict = {z: a * exp(- b * y) + c, y: a * x ** 2 + sin(b * x)}
+    model = Model(model_dict)
+    chunked_model = Model(model_dict)
+    chunked_model.backend = ChunkedBackend(chunk_size=7, parallel=parallel)
+    xdata = np.linspace(0, 1, 50).reshape(5, 10)
+
+    for method in ['__call__', 'eval_jacobian', 'eval_hessian']:
+        expected = getattr(model, method)(x=xdata, a=1, b=2, c=3)
+        ans = getattr(chunked_model, method)(x=xdata, a=1, b=2, c=3)
+        for output, expected_output in zip(ans, expected):
+            assert output.shape == expected_output.shape
+            assert output == pytest.approx(expected_output)
+    assert isinstance(chunked_model._fused_components[1], ChunkedFunction)
+
+    xdata = np.linspace(0, 1, 50)
+    ydata = Model({y: a * exp(- b * x) + c})(x=xdata, a=2, b=3, c=1).y
+    b = Parameter('b', value=3, fixed=True)
+    chunked_model = Model({y: a * exp(- b * x) + c})
+    chunked_model.backend = ChunkedBackend(chunk_size=7, parallel=parallel)
+    fit = Fit(chunked_model, x=xdata, y=ydata)
+    assert fit.objective.model.backend is chunked_model.backend
+    fit_result = fit.execute()
+    assert fit.objective.hoisted_data.size > 0
+    assert fit_result.value(a) == pytest.approx(2)
+    assert fit_result.value(c) == pytest.approx(1)
+
+def test_chunked_fallback():
+    """
+    Data which has to be broadcast, or fits in a single chunk, is evaluated
+    in one go.
+    """
+    x, y, t, z = variables('x, y, t, z')
+    a, b = parameters('a, b')
+    xdata, tdata = np.linspace(-1, 1, 50), np.linspace(0, 1, 30)
+
+    model = Model({y: a * x, z: b * t})
+    model.backend = ChunkedBackend(chunk_size=7)
+    ans = model(x=xdata, t=tdata, a=2, b=3)
+    assert ans.y == pytest.approx(2 * xdata)
+    assert ans.z == pytest.approx(3 * tdata)
+
+    model.backend = ChunkedBackend()
+    ans = model(x=xdata[:5], t=tdata[:5], a=2, b=3)
+    assert ans.y == pytest.approx(2 * xdata[:5])
+
+needs_numba = pytest.mark.skipif(backends.numba is None,
+                                 reason='Numba is not installed')
+needs_compiler = pytest.mark.skipif(
+    shutil.which(os.environ.get('CC', 'cc')) is None,
+    reason='No C compiler available'
+)
+
+
+@needs_numba
+@pytest.mark.parametrize('parallel', [False, True])
+def test_numba_backend(parallel, monkeypatch):
+    """
+    The Numba backend evaluates the components, Jacobian and Hessian of a
+    model to the same values and shapes as the NumPy backend, and fits give
+    the same result.
+    """
+    # Divide even this small dataset over several threads.
+    monkeypatch.setattr(backends, 'cpu_count', lambda: 4)
+    monkeypatch.setattr(NumbaFunction, 'min_chunk_size', 2)
+    x, y, z = variables('x, y, z')
+    a, b, c = parameters('a, b, c')
+    model_dict = {z: a * exp(- b * y) + c, y: a * x ** 2 + sin(b * x)}
+    model = Model(model_dict)
+    numba_model = Model(model_dict)
+    numba_model.backend = NumbaBackend(parallel=parallel)
+    xdata = np.linspace(0, 1, 11)
+
+    for method in ['__call__', 'eval_jacobian', 'eval_hessian']:
+        expected = getattr(model, method)(x=xdata, a=1, b=2, c=3)
+        ans = getattr(numba_model, method)(x=xdata, a=1, b=2, c=3)
+        for output, expected_output in zip(ans, expected):
+            assert output.shape == expected_output.shape
+            assert output == pytest.approx(expected_output)
+    assert isinstance(numba_model._fused_components[1], NumbaFunction)
+
+    ydata = model(x=xdata, a=1, b=2, c=3).z
+    fit_result = Fit(model, x=xdata, z=ydata).execute()
+    numba_result = Fit(numba_model, x=xdata, z=ydata).execute()
+    for param in model.params:
+        assert numba_result.value(param) == pytest.approx(
+            fit_result.value(param)
+        )
+
+    # Fixed parameters are substituted into a new model, which keeps the
+    # backend.
+    b.value, b.fixed = 2, True
+    try:
+        numba_fit = Fit(numba_model, x=xdata, z=ydata)
+        assert numba_fit.objective.model is not numba_model
+        assert numba_fit.objective.model.backend is numba_model.backend
+        numba_result = numba_fit.execute()
+        assert isinstance(numba_fit.objective.model._fused_components[1],
+                          NumbaFunction)
+    finally:
+        b.fixed = False
+    assert numba_result.value(b) == 2
+    assert numba_result.value(a) == pytest.approx(1)
+    assert numba_result.value(c) == pytest.approx(3)
+
+@needs_numba
+def test_numba_fallback():
+    """
+    Models which Numba cannot compile, or data which has to be broadcast, are
+    evaluated with NumPy instead.
+    """
+    x, y, t, z = variables('x, y, t, z')
+    a, b = parameters('a, b')
+    xdata, tdata = np.linspace(-1, 1, 5), np.linspace(0, 1, 3)
+
+    model = Model({y: Piecewise((a * x, x > 0), (b, True))})
+    model.backend = NumbaBackend()
+    with pytest.warns(UserWarning):
+        ans = model(x=xdata, a=2, b=3)
+    assert ans.y == pytest.approx(np.where(xdata > 0, 2 * xdata, 3))
+
+    model = Model({y: a * x, z: b * t})
+    model.backend = NumbaBackend()
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        ans = model(x=xdata, t=tdata, a=2, b=3)
+    assert ans.y == pytest.approx(2 * xdata)
+    assert ans.z == pytest.approx(3 * tdata)
+
+@needs_compiler
+@pytest.mark.parametrize('parallel', [False, True])
+def test_c_backend(parallel, tmpdir, monkeypatch):
+    """
+    The C backend evaluates a model to the same values and shapes as the
+    NumPy backend, and compiles every function of a model only once.
+    """
+    monkeypatch.setattr(backends, 'cpu_count', lambda: 4)
+    monkeypatch.setattr(CFunction, 'min_chunk_size', 2)
+    x, y, z = variables('x, y, z')
+    a, b, c = parameters('a, b, c')
+    model_dict = {z: a * exp(- b * y) + c,
+                  y: Piecewise((a * x ** 2, x > 0), (sin(b * x), True))
+                     + erf(c * x)}
+    model = Model(model_dict)
+    xdata = np.linspace(-1, 1, 11)
+
+    for attempt in range(2):
+        c_model = Model(model_dict)
+        c_model.backend = CBackend(directory=str(tmpdir), parallel=parallel)
+        for method in ['__call__', 'eval_jacobian', 'eval_hessian']:
+            expected = getattr(model, method)(x=xdata, a=1, b=2, c=3)
+            ans = getattr(c_model, method)(x=xdata, a=1, b=2, c=3)
+            for output, expected_output in zip(ans, expected):
+                assert output.shape == expected_output.shape
+                assert output == pytest.approx(expected_output)
+        assert isinstance(c_model._fused_components[1], CFunction)
+        if attempt == 0:
+            libraries = tmpdir.listdir()
+            # The second time round, every library is loaded from disk.
+            def compile_again(*args):
+                raise AssertionError('Compiled again.')
+            monkeypatch.setattr(CBackend, '_compile', compile_again)
+    assert tmpdir.listdir() == libraries
+
+@needs_compiler
+def test_c_fallback(tmpdir):
+    """
+    Models which cannot be printed as C, or fail to compile, are evaluated
+    with NumPy instead.
+    """
+    x, y = variables('x, y')
+    a, = parameters('a')
+    xdata = np.linspace(-1, 1, 5)
+
+    model = Model({y: besselj(0, a * x)})
+    model.backend = CBackend(directory=str(tmpdir))
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        ans = model(x=xdata, a=2)
+    assert ans.y == pytest.approx(jv(0, 2 * xdata))
+    assert not tmpdir.listdir()
+
+    model = Model({y: a * x})
+    model.backend = CBackend(directory=str(tmpdir), compiler='false')
+    with pytest.warns(UserWarning):
+        ans = model(x=xdata, a=2)
+    assert ans.y == pytest.approx(2 * xdata)
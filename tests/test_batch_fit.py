@@ -0,0 +1,109 @@
+from __future__ import division, print_function
+import pytest
+
+import numpy as np
+
+from symfit import Fit, BatchFit, Model, parameters, variables, exp
+from symfit.core.fit_results import BatchFitResults
+
+
+def gaussian_data(n_datasets):
+    x, y = variables('x, y')
+    a, x0, sig = parameters('a, x0, sig')
+    a.value, x0.value, sig.value = 1.0, 0.5, 0.2
+    model = Model({y: a * exp(- (x - x0) ** 2 / (2 * sig ** 2))})
+
+    np.random.seed(0)
+    xdata = np.linspace(0, 1, 50)
+    popt = np.column_stack([np.random.uniform(0.5, 2, n_datasets),
+                            np.random.uniform(0.1, 0.3, n_datasets),
+                            np.random.uniform(0.3, 0.7, n_datasets)])
+    ydata = model(x=xdata, **{p.name: popt[:, [idx]] for idx, p
+                              in enumerate(model.params)}).y
+    ydata += np.random.normal(0, 0.01, ydata.shape)
+    return model, xdata, ydata, popt
+
+
+def test_batch_fit():
+    """
+    Fitting many datasets at once gives the same results as fitting them one
+    by one.
+    """
+    model, xdata, ydata, popt = gaussian_data(100)
+    a, sig, x0 = model.params
+
+    fit_results = BatchFit(model, x=xdata, y=ydata).execute()
+    assert isinstance(fit_results, BatchFitResults)
+    assert len(fit_results) == 100
+    assert fit_results.popt.shape == (100, 3)
+    assert fit_results.covariance_matrix.shape == (100, 3, 3)
+    assert np.all(fit_results.converged)
+    assert fit_results.value(x0) == pytest.approx(popt[:, 2], abs=1e-2)
+
+    for idx in range(5):
+        fit_result = Fit(model, x=xdata, y=ydata[idx]).execute()
+        for param in model.params:
+            assert fit_results.value(param)[idx] == pytest.approx(
+                fit_result.value(param), 1e-6
+            )
+            # Fit uses the exact Hessian rather than J^T J.
+            assert fit_results.stdev(param)[idx] == pytest.approx(
+                fit_result.stdev(param), 1e-2
+            )
+        assert fit_results.chi_squared[idx] == pytest.approx(
+            fit_result.chi_squared, 1e-6
+        )
+
+
+def test_batch_fit_options():
+    """
+    Stacked independent data, sigma, fixed parameters and initial values per
+    dataset.
+    """
+    model, xdata, ydata, popt = gaussian_data(20)
+    a, sig, x0 = model.params
+    xdata = np.broadcast_to(xdata, ydata.shape)
+
+    fit = BatchFit(model, x=xdata, y=ydata, sigma_y=0.01 * np.ones_like(ydata))
+    fit_results = fit.execute(initial_params=popt)
+    assert fit_results.value(sig) == pytest.approx(popt[:, 1], 1e-1)
+    # Measurement errors are not rescaled
+    unit_results = BatchFit(model, x=xdata, y=ydata).execute()
+    assert fit_results.stdev(sig) != pytest.approx(unit_results.stdev(sig))
+
+    sig.fixed = True
+    try:
+        fit_results = BatchFit(model, x=xdata, y=ydata).execute()
+    finally:
+        sig.fixed = False
+    assert np.all(fit_results.value(sig) == 0.2)
+    assert np.all(fit_results.stdev(sig) == 0)
+    assert np.all(fit_results.stdev(x0) > 0)
+
+    fit_results = BatchFit(model, x=xdata, y=ydata).execute(max_iterations=1)
+    assert np.all(fit_results.status == 0)
+    assert np.all(fit_results.iterations == 1)
+
+    with pytest.raises(ValueError):
+        BatchFit(model, x=xdata[0], y=ydata[0])
+
+
+def test_batch_fit_perfect():
+    """
+    Datasets which are fit perfectly have converged, even though no step can
+    reduce their chi squared.
+    """
+    model, xdata, ydata, popt = gaussian_data(10)
+    ydata = model(x=xdata, **{p.name: popt[:, [idx]] for idx, p
+                              in enumerate(model.params)}).y
+
+    fit_results = BatchFit(model, x=xdata, y=ydata).execute(
+        initial_params=popt
+    )
+    assert np.all(fit_results.status == 3)
+    assert np.all(fit_results.chi_squared == 0)
+    assert fit_results.popt == pytest.approx(popt)
+
+    fit_results = BatchFit(model, x=xdata, y=ydata).execute()
+    assert np.all(fit_results.converged)
+    assert fit_results.popt == pytest.approx(popt)
@@ -0,0 +1,82 @@
+"""
+This module contains tests for the :mod:`symfit.core.cache` module.
+"""
+
+from __future__ import division, print_function
+import os
+
+import pytest
+import numpy as np
+
+from symfit import Fit, Model, Parameter, variables, parameters, exp, sin
+from symfit.core.cache import SourceCache
+
+
+def test_model_source_cache(tmpdir):
+    """
+    With a source cache, a new instance of a model evaluates its components,
+    Jacobian and Hessian without any symbolic differentiation.
+    """
+    x, y, z = variables('x, y, z')
+    a, b, c = parameters('a, b, c')
+    model_dict = {z: a * exp(- b * y) + c, y: a * x ** 2 + sin(b * x)}
+    model = Model(model_dict)
+    xdata = np.linspace(0, 1, 5)
+    expected = (model(x=xdata, a=1, b=2, c=3),
+                model.eval_jacobian(x=xdata, a=1, b=2, c=3),
+                model.eval_hessian(x=xdata, a=1, b=2, c=3))
+
+    for attempt in range(2):
+        new_model = Model(model_dict)
+        new_model.source_cache = SourceCache(str(tmpdir))
+        ans = (new_model(x=xdata, a=1, b=2, c=3),
+               new_model.eval_jacobian(x=xdata, a=1, b=2, c=3),
+               new_model.eval_hessian(x=xdata, a=1, b=2, c=3))
+        for outputs, expected_outputs in zip(ans, expected):
+            for output, expected_output in zip(outputs, expected_outputs):
+                assert output == pytest.approx(expected_output)
+    # The second time round everything came from the cache.
+    assert '_cached_jacobian_model' not in new_model.__dict__
+    assert '_cached_hessian_model' not in new_model.__dict__
+    assert len(tmpdir.listdir()) == 3
+
+    # A different model gets different entries
+    other_model = Model({z: a * exp(- b * y) + c, y: a * x ** 3})
+    other_model.source_cache = SourceCache(str(tmpdir))
+    assert other_model(x=xdata, a=1, b=2, c=3).z == pytest.approx(
+        np.exp(- 2 * xdata ** 3) + 3
+    )
+    assert len(tmpdir.listdir()) == 4
+
+    # Fits with fixed parameters use the cache of the model as well.
+    zdata = other_model(x=xdata, a=1, b=2, c=3).z
+    c = Parameter('c', fixed=True)
+    fixed_model = Model({z: a * exp(- b * y) + c, y: a * x ** 3})
+    fixed_model.source_cache = other_model.source_cache
+    fit = Fit(fixed_model, x=xdata, z=zdata)
+    assert fit.objective.model is not fixed_model
+    assert fit.objective.model.source_cache is other_model.source_cache
+    fit.execute()
+    assert len(tmpdir.listdir()) > 4
+
+
+def test_eviction(tmpdir):
+    """
+    The least recently used entries are evicted when the cache is too large.
+    """
+    cache = SourceCache(str(tmpdir), max_size=250)
+    keys = [cache.key(name) for name in 'abc']
+    for i, key in enumerate(keys[:2]):
+        cache.set(key, {'source': 100 * 'x'})
+        # Make sure the access times differ
+        os.utime(cache._path(key), (i, i))
+    # Reading the oldest entry marks it as recently used.
+    assert cache.get(keys[0]) == {'source': 100 * 'x'}
+    cache.set(keys[2], {'source': 100 * 'x'})
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[2]) is not None
+
+    cache.clear()
+    assert tmpdir.listdir() == []
+    assert cache.get(keys[0]) is None
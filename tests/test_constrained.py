@@ -566,10 +566,9 @@ def test_fixed_and_constrained():
     fit = Fit(model_dict, x=xdata, y=ydata,
               constraints=constraints, minimizer=SLSQP)
     fit_result_slsqp = fit.execute()
-    # The data and fixed parameters should be partialed away.
+    # The data should be partialed away, and the fixed parameters have been
+    # substituted into the model of the objective.
     objective_kwargs = {
-        phi2.name: phi2.value,
-        phi1.name: phi1.value,
         x.name: xdata,
     }
     constraint_kwargs = {
@@ -917,10 +916,9 @@ def test_fixed_and_constrained_tc():
     fit = Fit(model_dict, x=xdata, y=ydata,
               constraints=constraints, minimizer=TrustConstr)
     fit_result_tc = fit.execute()
-    # The data and fixed parameters should be partialed away.
+    # The data should be partialed away, and the fixed parameters have been
+    # substituted into the model of the objective.
     objective_kwargs = {
-        phi2.name: phi2.value,
-        phi1.name: phi1.value,
         x.name: xdata,
     }
     constraint_kwargs = {
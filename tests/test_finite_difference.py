@@ -1,8 +1,17 @@
+from concurrent.futures import ThreadPoolExecutor
+
 import symfit as sf
+from symfit.core.models import BaseGradientModel
 import numpy as np
 import pytest
 
 
+class NumericalGradientModel(sf.CallableNumericalModel, BaseGradientModel):
+    """
+    CallableNumericalModel with a finite difference jacobian.
+    """
+
+
 def setup_method():
     np.random.seed(0)
 
@@ -215,3 +224,52 @@ def _assert_equal(exact, approx, **kwargs):
     assert len(exact) == len(approx)
     for exact_comp, approx_comp in zip(exact, approx):
         assert approx_comp == pytest.approx(exact_comp, **kwargs)
+
+
+@pytest.mark.parametrize('method, order', [
+    ('central', 2), ('central', 4), ('central', 6),
+    ('forward', 1), ('forward', 2), ('forward', 4), ('forward', 6),
+])
+def test_stencils(method, order):
+    """
+    Every supported combination of method and order should approximate the
+    exact jacobian, whether the model broadcasts over the parameters or not.
+    """
+    x, y, z = sf.variables('x, y, z')
+    a, b = sf.parameters('a, b')
+    model = sf.Model({y: 3 * a * x**2 - sf.exp(b) * x, z: a * b})
+    x_data = np.arange(10)
+    exact = model.eval_jacobian(x=x_data, a=3.5, b=2)
+
+    rel = 1e-2 if order == 1 else 1e-4
+    dx = 1e-8 if method == 'central' else 1e-6
+    approx = model.finite_difference(x=x_data, a=3.5, b=2, dx=dx,
+                                     order=order, method=method)
+    # All points of the stencil are evaluated in one go.
+    assert model._broadcasts_params
+    _assert_equal(exact, approx, rel=rel)
+
+    numerical_model = NumericalGradientModel(
+        {y: lambda x, a, b: 3 * a * x**2 - np.exp(b) * x,
+         z: lambda a, b: float(a * b)},
+        connectivity_mapping={y: {x, a, b}, z: {a, b}}
+    )
+    assert numerical_model._broadcasts_params
+    with ThreadPoolExecutor(2) as executor:
+        approx = numerical_model.finite_difference(
+            x=x_data, a=3.5, b=2, dx=dx, order=order, method=method,
+            executor=executor
+        )
+    # float() does not broadcast, so this has to be done point by point.
+    assert not numerical_model._broadcasts_params
+    _assert_equal(exact, approx, rel=rel)
+
+
+def test_stencil_errors():
+    x, y = sf.variables('x, y')
+    a = sf.Parameter('a')
+    model = sf.Model({y: a * x})
+    with pytest.raises(ValueError):
+        model.finite_difference(x=1, a=2, order=3)
+    with pytest.raises(ValueError):
+        model.finite_difference(x=1, a=2, method='backward')
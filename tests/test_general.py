@@ -12,9 +12,10 @@ from symfit import (
 )
 from symfit.core.minimizers import (
     MINPACK, LBFGSB, BoundedMinimizer, DifferentialEvolution, BaseMinimizer,
-    ChainedMinimizer
+    ChainedMinimizer, TrustRegionReflective, LinearLeastSquares
 )
 from symfit.core.objectives import LogLikelihood, MinimizeModel, LeastSquares
+from symfit.core import fit as fit_module
 from symfit.distributions import Gaussian, Exp, BivariateGaussian
 from tests.test_minimizers import subclasses
 
@@ -777,6 +778,40 @@ def test_error_analytical():
 
     assert fit_result.stdev(a) == pytest.approx(sigma_mu, 1e-5)
 
+
+def test_block_covariance(monkeypatch):
+    """
+    In a global fit with local parameters the covariance matrix is found
+    from the Schur complement of the shared parameter, which should agree
+    with inverting the whole Hessian.
+    """
+    x_1, x_2, x_3, y_1, y_2, y_3 = variables('x_1, x_2, x_3, y_1, y_2, y_3')
+    a, b_1, b_2, b_3, c_3 = parameters('a, b_1, b_2, b_3, c_3', value=1.0)
+    model = Model({y_1: a * exp(- b_1 * x_1),
+                   y_2: a * exp(- b_2 * x_2),
+                   y_3: a * exp(- b_3 * x_3) + c_3})
+    xdata = np.linspace(0, 3, 25)
+    np.random.seed(2)
+    data = {'x_1': xdata, 'x_2': xdata, 'x_3': xdata}
+    for var, rate in zip(['y_1', 'y_2', 'y_3'], [0.5, 1.0, 1.5]):
+        data[var] = 2 * np.exp(- rate * xdata) + np.random.normal(0, 0.02, 25)
+
+    fit = Fit(model, **data)
+    blocks, shared = fit_module._parameter_blocks(fit.objective)
+    assert [list(block) for block in blocks] == [[1], [2], [3, 4]]
+    assert list(shared) == [0]
+    fit_result = fit.execute()
+
+    monkeypatch.setattr(fit_module, '_parameter_blocks', lambda obj: None)
+    dense_cov = fit.covariance_matrix(
+        dict(zip(fit.model.params, fit_result._popt))
+    )
+    assert fit_result.covariance_matrix == pytest.approx(dense_cov)
+    # The local parameters of different components are still correlated
+    # through the shared parameter.
+    assert fit_result.covariance(b_1, b_2) != 0
+
+
 # TODO: redudant with test_error_analytical?
 @pytest.mark.skip()
 def test_straight_line_analytical():
@@ -847,7 +882,8 @@ def test_fixed_parameters():
     ydata = model(xdata, a=2, b=3, c=2, d=2).y
 
     for minimizer in subclasses(BaseMinimizer):
-        if minimizer is ChainedMinimizer:
+        if minimizer in (ChainedMinimizer, LinearLeastSquares):
+            # LinearLeastSquares only accepts models linear in all parameters.
             continue
         else:
             fit = Fit(model, x=xdata, y=ydata, minimizer=minimizer)
@@ -856,6 +892,45 @@ def test_fixed_parameters():
             assert 4.0 == fit_result.params['c']
 
 
+def test_substitute_fixed():
+    """
+    Fit substitutes fixed parameters into the model of the objective, such
+    that only derivatives to the free parameters are generated. The results
+    are still reported for all parameters.
+    """
+    a, b, c = parameters('a, b, c')
+    x, y = variables('x, y')
+    model = Model({y: a * exp(-(x - b)**2 / (2 * c**2))})
+    xdata = np.linspace(0, 6, 50)
+    ydata = model(xdata, a=2, b=3, c=1).y
+
+    c = Parameter('c', value=1.0, fixed=True)
+    model = Model({y: a * exp(-(x - b)**2 / (2 * c**2))})
+    specialized = model.substitute_fixed()
+    assert isinstance(specialized, Model)
+    assert specialized.params == [a, b]
+    assert specialized.independent_vars == model.independent_vars
+    assert c not in specialized[y].free_symbols
+
+    for minimizer in [None, MINPACK, LBFGSB]:
+        kwargs = {} if minimizer is None else {'minimizer': minimizer}
+        fit = Fit(model, x=xdata, y=ydata, **kwargs)
+        assert fit.objective.model.params == [a, b]
+        fit_result = fit.execute()
+        assert fit_result.value(a) == pytest.approx(2)
+        assert fit_result.value(b) == pytest.approx(3)
+        assert fit_result.value(c) == 1.0
+        assert fit_result.covariance_matrix.shape == (3, 3)
+        assert fit_result.variance(c) == 0
+        assert fit_result.r_squared == pytest.approx(1)
+
+    # Substituting a value of zero would remove x from the model.
+    model = Model({y: a + Parameter('c', value=0, fixed=True) * x})
+    assert model.substitute_fixed() is model
+    model = Model({y: a + Parameter('c', value=0) * x})
+    assert model.substitute_fixed() is model
+
+
 def test_boundaries():
     """
     Make sure parameter boundaries are respected
@@ -866,8 +941,9 @@ def test_boundaries():
 
     bounded_minimizers = list(subclasses(BoundedMinimizer))
     for minimizer in bounded_minimizers:
-        if minimizer is MINPACK:
-            # Not a MINPACKable problem because it only has a param
+        if minimizer in (MINPACK, TrustRegionReflective):
+            # Not a least-squares problem because it only has a param, and
+            # these minimizers need residuals.
             continue
         fit = Fit(model, minimizer=minimizer)
         assert isinstance(fit.objective, MinimizeModel)
@@ -895,8 +971,9 @@ def test_non_boundaries():
     bounded_minimizers = [minimizer for minimizer in bounded_minimizers
                           if minimizer is not DifferentialEvolution]
     for minimizer in bounded_minimizers:
-        # Not a MINPACKable problem because it only has a param
-        if minimizer is MINPACK:
+        # Not a least-squares problem because it only has a param, and
+        # these minimizers need residuals.
+        if minimizer in (MINPACK, TrustRegionReflective):
             continue
         fit = Fit(model, minimizer=minimizer)
         fit_result = fit.execute()
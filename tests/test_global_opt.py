@@ -2,6 +2,7 @@
 from __future__ import division, print_function
 import pytest
 import sys
+from concurrent.futures import ProcessPoolExecutor
 
 import numpy as np
 
@@ -134,3 +135,48 @@ def test_mexican_hat():
 
     assert fit_result1.value(x) > 0
     assert fit_result2.value(x) < 0
+
+
+def test_multistart():
+    """
+    Starting from many points finds the global minimum of the mexican hat,
+    also when the starts are divided over a pool of workers.
+    """
+    x = Parameter('x', value=-2.5, min=-5, max=5)
+    y = Variable('y')
+    model = Model({y: x**4 - 10 * x**2 - x})
+    fit = Fit(model)
+    assert fit.execute().value(x) < 0
+
+    for sampling in ['lhs', 'sobol']:
+        fit_results = fit.execute_multistart(n_starts=8, sampling=sampling,
+                                             seed=0)
+        assert len(fit_results) == 8
+        assert fit_results[0].value(x) == pytest.approx(2.26066, 1e-4)
+        # Ranked by objective value, the local minimum comes last.
+        assert fit_results[-1].value(x) == pytest.approx(-2.21064, 1e-4)
+        objective_values = [result.objective_value for result in fit_results]
+        assert objective_values == sorted(objective_values)
+    # The parameter itself is left alone.
+    assert x.value == -2.5
+
+    fit_results = fit.execute_multistart(n_starts=20, seed=0, n_converged=2)
+    assert len(fit_results) < 20
+    assert fit_results[0].value(x) == pytest.approx(2.26066, 1e-4)
+
+    with ProcessPoolExecutor(2) as executor:
+        pooled_results = fit.execute_multistart(n_starts=20, seed=0,
+                                                executor=executor)
+        assert len(pooled_results) == 20
+        assert pooled_results[0].value(x) == pytest.approx(2.26066, 1e-4)
+        # Rounds of one start per worker stop early as well.
+        pooled_results = fit.execute_multistart(n_starts=20, seed=0,
+                                                executor=executor, n_workers=2,
+                                                n_converged=2)
+        assert len(pooled_results) < 20
+        assert len(pooled_results) % 2 == 0
+
+    with pytest.raises(ValueError):
+        fit.execute_multistart(sampling='grid')
+    with pytest.raises(ValueError):
+        Fit({y: Parameter('z') ** 2}).execute_multistart()
@@ -180,6 +180,35 @@ def test_powell():
     assert fit_result.value(b) == pytest.approx(1.0)
 
 
+def test_trustconstr_fused():
+    """
+    When the jacobian and hessian of TrustConstr both come from the objective,
+    they are computed together using the objective's eval_fused.
+    """
+    x, y = variables('x, y')
+    a, b = parameters('a, b')
+    model = Model({y: a * x ** 2 + b})
+    xdata = np.linspace(0, 10)
+    ydata = model(x=xdata, a=1.5, b=3.0).y
+
+    fit = Fit(model, x=xdata, y=ydata, minimizer=TrustConstr)
+    assert fit.minimizer._objective_is_fused()
+    jacobian, hessian = fit.minimizer._fused_jacobian_hessian()
+    value, jac, hess = fit.minimizer.objective.eval_fused([1.0, 1.0])
+    assert jacobian([1.0, 1.0]) == pytest.approx(jac)
+    assert hessian([1.0, 1.0]) == pytest.approx(hess)
+
+    fit_result = fit.execute()
+    assert fit_result.value(a) == pytest.approx(1.5)
+    assert fit_result.value(b) == pytest.approx(3.0)
+
+    # A user provided hessian should not be replaced.
+    minimizer = TrustConstr(fit.objective, [a, b],
+                            jacobian=fit.objective.eval_jacobian,
+                            hessian=lambda a, b: np.eye(2))
+    assert not minimizer._objective_is_fused()
+
+
 def test_jac_hess():
     """
     Make sure both the Jacobian and Hessian are passed to the minimizer.
@@ -389,3 +418,226 @@ def test_minimizer_constraint_compatibility():
         fit = SLSQP(MinimizeModel(model, data=data_dict),
                     parameters=[a, b, c],
                     constraints=[{'type': 'eq', 'fun': lambda a, b, c: a - c}])
+
+
+def test_minpack_jacobian():
+    """
+    MINPACK uses the analytic Jacobian of the residuals, also when the
+    parameters are bounded or fixed, instead of finite differences.
+    """
+    x, y = variables('x, y')
+    a = Parameter('a', min=0.1, max=10)
+    b = Parameter('b', min=0)
+    c = Parameter('c')
+    model = Model({y: a * x ** 2 + b * x + c})
+    xdata = np.linspace(-3, 3, 25)
+    np.random.seed(2)
+    ydata = model(x=xdata, a=2.0, b=0.5, c=-1.0).y
+    ydata += np.random.normal(0, 0.1, xdata.shape)
+
+    for fixed in [False, True]:
+        c = Parameter('c', value=-1.0 if fixed else 1.0, fixed=fixed)
+        model = Model({y: a * x ** 2 + b * x + c})
+        objective = VectorLeastSquares(model, data={x: xdata, y: ydata,
+                                                    model.sigmas[y]: np.ones_like(ydata)})
+        numerical = MINPACK(objective, parameters=[a, b, c]).execute()
+        analytical = MINPACK(objective, parameters=[a, b, c],
+                             jacobian=objective.eval_jacobian).execute()
+        for param in [a, b, c]:
+            assert analytical.value(param) == pytest.approx(numerical.value(param), rel=1e-6)
+        assert analytical.value(a) == pytest.approx(2.0, rel=1e-1)
+        assert analytical.value(b) == pytest.approx(0.5, rel=1e-1)
+        analytical_info = analytical.minimizer_output['infodic']
+        numerical_info = numerical.minimizer_output['infodic']
+        assert analytical_info['nfev'] < numerical_info['nfev']
+        assert analytical_info['njev'] > 0
+
+
+def test_trust_region_reflective():
+    """
+    TrustRegionReflective uses the analytic Jacobian of the residuals,
+    bounds and sparsity patterns.
+    """
+    x, y = variables('x, y')
+    a, c = parameters('a, c')
+    b = Parameter('b', min=0)
+    model = Model({y: a * np.e ** (- b * x) + c})
+    xdata = np.linspace(0, 5, 50)
+    np.random.seed(3)
+    ydata = model(x=xdata, a=3.0, b=1.2, c=0.5).y
+    ydata += np.random.normal(0, 0.02, xdata.shape)
+
+    bfgs_result = Fit(model, x=xdata, y=ydata).execute()
+    assert isinstance(bfgs_result.minimizer, LBFGSB)
+    fit = Fit(model, x=xdata, y=ydata, minimizer=TrustRegionReflective)
+    assert fit.minimizer.jacobian.__name__ == 'eval_residual_jacobian'
+    fit_result = fit.execute()
+    for param in [a, b, c]:
+        assert fit_result.value(param) == pytest.approx(bfgs_result.value(param), rel=1e-4)
+        assert fit_result.stdev(param) == pytest.approx(bfgs_result.stdev(param), rel=1e-3)
+    assert fit_result.chi_squared == pytest.approx(bfgs_result.chi_squared)
+    assert fit_result.iterations < bfgs_result.iterations
+
+    # The residuals are only those of data for the free parameters.
+    sparsity = np.ones((len(xdata), 3))
+    for options in [{'method': 'dogbox'}, {'jac_sparsity': sparsity}]:
+        result = fit.execute(**options)
+        for param in [a, b, c]:
+            assert result.value(param) == pytest.approx(fit_result.value(param), rel=1e-4)
+    # lm does not support bounds.
+    unbounded = Model({y: a * np.e ** (- Parameter('b') * x) + c})
+    result = Fit(unbounded, x=xdata, y=ydata,
+                 minimizer=TrustRegionReflective).execute(method='lm')
+    assert result.value(a) == pytest.approx(fit_result.value(a), rel=1e-4)
+
+    # Fixed parameters and finite differences
+    a = Parameter('a')
+    b = Parameter('b', min=0)
+    c = Parameter('c', value=0.5, fixed=True)
+    model = Model({y: a * np.e ** (- b * x) + c})
+    objective = LeastSquares(model, data={x: xdata, y: ydata, model.sigmas[y]: np.ones_like(ydata)})
+    for jacobian in [None, objective.eval_residual_jacobian]:
+        minimizer = TrustRegionReflective(objective, [a, b, c], jacobian=jacobian)
+        result = minimizer.execute(jac_sparsity=sparsity[:, :2])
+        assert result.value(a) == pytest.approx(3.0, rel=1e-2)
+        assert result.value(b) == pytest.approx(1.2, rel=1e-2)
+        assert result.value(c) == 0.5
+
+    with pytest.raises(TypeError):
+        TrustRegionReflective(MinimizeModel(model, data={x: xdata, y: None}), [a, b, c])
+
+
+def test_trust_region_reflective_bounds():
+    """
+    Initial values outside of the bounds are moved inside of them, equal
+    lower and upper bounds are allowed, and NaN in the data gives a failed
+    fit instead of an error.
+    """
+    x, y = variables('x, y')
+    a = Parameter('a', value=5, min=0, max=1)
+    b = Parameter('b', value=1.0)
+    model = Model({y: a * np.e ** (- b * x)})
+    xdata = np.linspace(0, 5, 50)
+    ydata = model(x=xdata, a=0.8, b=1.2).y
+
+    fit = Fit(model, x=xdata, y=ydata, minimizer=TrustRegionReflective)
+    fit_result = fit.execute()
+    assert fit_result.value(a) == pytest.approx(0.8)
+    assert fit_result.value(b) == pytest.approx(1.2)
+    assert a.value == 5
+
+    a = Parameter('a', value=0.8, min=0.8, max=0.8)
+    model = Model({y: a * np.e ** (- b * x)})
+    fit = Fit(model, x=xdata, y=ydata, minimizer=TrustRegionReflective)
+    fit_result = fit.execute()
+    assert fit_result.value(a) == pytest.approx(0.8)
+    assert fit_result.value(b) == pytest.approx(1.2)
+
+    ydata[3] = np.nan
+    fit = Fit(model, x=xdata, y=ydata, minimizer=TrustRegionReflective)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        fit_result = fit.execute()
+    assert not fit_result.minimizer_output['success']
+    assert fit_result.status_message == 'NaN result encountered.'
+
+
+def test_sparse_global_fit(monkeypatch):
+    """
+    In a global fit every component depends on only a few parameters, so the
+    Jacobian of the residuals is evaluated as a sparse matrix.
+    """
+    n_datasets = 6
+    xs = variables(', '.join('x_{}'.format(i) for i in range(n_datasets)))
+    ys = variables(', '.join('y_{}'.format(i) for i in range(n_datasets)))
+    ks = parameters(', '.join('k_{}'.format(i) for i in range(n_datasets)), value=1.0)
+    amplitude = Parameter('A', value=1.0)
+    model = Model({y: amplitude * np.e ** (- k * x) for x, y, k in zip(xs, ys, ks)})
+
+    np.random.seed(4)
+    data = {}
+    for i, (x, y) in enumerate(zip(xs, ys)):
+        xdata = np.linspace(0, 3, 20 + i)
+        data[x.name] = xdata
+        data[y.name] = 2.0 * np.exp(- (0.5 + 0.2 * i) * xdata)
+        data[y.name] += np.random.normal(0, 0.01, xdata.shape)
+
+    fit = Fit(model, minimizer=TrustRegionReflective, **data)
+    assert fit.minimizer.jacobian.__name__ == 'eval_sparse_residual_jacobian'
+    sparse_result = fit.execute()
+    jac = fit.objective.eval_sparse_residual_jacobian(sparse_result._popt)
+    assert jac.nnz == 2 * sum(len(data[x.name]) for x in xs)
+
+    monkeypatch.setattr(TrustRegionReflective, 'max_sparse_density', 0)
+    fit = Fit(model, minimizer=TrustRegionReflective, **data)
+    assert fit.minimizer.jacobian.__name__ == 'eval_residual_jacobian'
+    dense_result = fit.execute()
+    assert sparse_result.value(amplitude) == pytest.approx(2.0, rel=1e-2)
+    for param in model.params:
+        assert sparse_result.value(param) == pytest.approx(dense_result.value(param), rel=1e-6)
+        assert sparse_result.stdev(param) == pytest.approx(dense_result.stdev(param), rel=1e-6)
+
+
+def test_linear_least_squares():
+    """
+    Models which are linear in all their free parameters are solved in
+    closed form, without ever generating the Hessian of the model. The
+    results are those of weighted linear least squares.
+    """
+    x, y = variables('x, y')
+    a, b, c = parameters('a, b, c')
+    model = Model({y: a * x ** 2 + b * x + c})
+    xdata = np.linspace(-3, 3, 40)
+    np.random.seed(5)
+    sigma = np.random.uniform(0.1, 0.5, xdata.shape)
+    ydata = model(x=xdata, a=0.7, b=-1.5, c=2.0).y
+    ydata += np.random.normal(0, sigma)
+
+    design = np.vstack([xdata ** 2, xdata, np.ones_like(xdata)]).T / sigma[:, None]
+    expected = np.linalg.lstsq(design, ydata / sigma, rcond=None)[0]
+    expected_cov = np.linalg.inv(design.T.dot(design))
+    for absolute_sigma in [True, False]:
+        fit = Fit(model, x=xdata, y=ydata, sigma_y=sigma,
+                  absolute_sigma=absolute_sigma)
+        assert isinstance(fit.minimizer, LinearLeastSquares)
+        fit_result = fit.execute()
+        assert [fit_result.value(p) for p in [a, b, c]] == pytest.approx(expected)
+        cov = expected_cov
+        if not absolute_sigma:
+            cov = cov * fit_result.chi_squared / (len(xdata) - 3)
+        assert fit_result.covariance_matrix == pytest.approx(cov)
+        assert fit_result.iterations == 0
+    assert '_cached_hessian_model' not in model.__dict__
+
+    # NaN in the data gives a failed fit instead of an error.
+    nan_ydata = ydata.copy()
+    nan_ydata[3] = np.nan
+    fit = Fit(model, x=xdata, y=nan_ydata)
+    assert isinstance(fit.minimizer, LinearLeastSquares)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        fit_result = fit.execute()
+    assert not fit_result.minimizer_output['success']
+    assert fit_result.status_message == 'NaN result encountered.'
+    assert np.isnan(fit_result.chi_squared)
+
+    # Parameters which cannot be told apart make the fit fail.
+    degenerate = Model({y: a * x + b * x})
+    fit = Fit(degenerate, x=xdata, y=ydata)
+    assert isinstance(fit.minimizer, LinearLeastSquares)
+    fit_result = fit.execute()
+    assert not fit_result.minimizer_output['success']
+    assert fit_result.minimizer_output['status'] != 0
+    assert 'rank deficient' in fit_result.status_message
+
+    # Fixed and bounded parameters
+    fixed = Model({y: a * x ** 2 + b * x + Parameter('c', value=2.0, fixed=True)})
+    fit = Fit(fixed, x=xdata, y=ydata, sigma_y=sigma)
+    assert isinstance(fit.minimizer, LinearLeastSquares)
+    assert fit.execute().value(c) == 2.0
+    bounded = Model({y: Parameter('a', min=0) * x ** 2 + b * x + Parameter('c')})
+    assert isinstance(Fit(bounded, x=xdata, y=ydata).minimizer, LBFGSB)
+
+    with pytest.raises(TypeError):
+        nonlinear = Model({y: a * np.e ** (b * x)})
+        Fit(nonlinear, x=xdata, y=ydata, minimizer=LinearLeastSquares)
@@ -12,8 +12,9 @@ import numpy as np
 from symfit import (
     Fit, parameters, variables, Model, ODEModel, D, Eq,
     CallableModel, CallableNumericalModel, Inverse, MatrixSymbol, Symbol, sqrt,
-    Function, diff
+    Function, diff, exp
 )
+from symfit.core import models
 from symfit.core.models import (
     jacobian_from_model, hessian_from_model, ModelError, ModelOutput
 )
@@ -277,6 +278,33 @@ def test_pickle():
         assert model.__dict__ == new_model.__dict__
 
 
+def test_pickle_generated_source(monkeypatch):
+    """
+    A model which has been evaluated carries its generated code along when
+    pickled, so the copy does not have to do any symbolic work.
+    """
+    a, b = parameters('a, b')
+    x, y, z = variables('x, y, z')
+    model = Model({y: a * exp(- b * x), z: y ** 2})
+    xdata = np.linspace(0, 1, 5)
+    expected = model.eval_fused(x=xdata, a=2.0, b=0.5)
+    expected_jac = model.eval_jacobian(x=xdata, a=2.0, b=0.5)
+
+    def no_symbolics(*args, **kwargs):
+        raise AssertionError('Symbolic work done after unpickling.')
+    monkeypatch.setattr(models, 'jacobian_from_model', no_symbolics)
+    monkeypatch.setattr(models, 'sympy_to_py', no_symbolics)
+    new_model = pickle.loads(pickle.dumps(model))
+    ans = (new_model(x=xdata, a=2.0, b=0.5),
+           new_model.eval_jacobian(x=xdata, a=2.0, b=0.5),
+           new_model.eval_hessian(x=xdata, a=2.0, b=0.5))
+    for outputs, expected_outputs in zip(ans, expected):
+        for output, expected_output in zip(outputs, expected_outputs):
+            assert output == pytest.approx(expected_output)
+    for output, expected_output in zip(ans[1], expected_jac):
+        assert output == pytest.approx(expected_output)
+
+
 def test_MatrixSymbolModel():
     """
     Test a model which is defined by ModelSymbols, see #194
@@ -402,11 +430,11 @@ def test_interdependency():
         assert str_con_map == str_args
 
     hess_model = hessian_from_model(callable_model)
-    # Result according to Mathematica
+    # Result according to Mathematica. Structurally zero derivatives are left
+    # out, unless another component refers to them.
     hess_as_dict = {
         D(y, (a, 2)): 6 * a * x,
         D(y, a, b): 0,
-        D(y, b, a): 0,
         D(y, (b, 2)): 2,
         D(z, (a, 2)): 2 * D(y, a)**2 + 2 * y * D(y, (a, 2)),
         D(z, a, b): 1 + 2 * D(y, b) * D(y, a) + 2 * y * D(y, a, b),
@@ -434,6 +462,35 @@ def test_interdependency():
     assert model.__signature__ == model.hessian_model.__signature__
 
 
+def test_eval_fused():
+    """
+    The fused evaluation of a model has to give the same result as calling
+    the model, its jacobian and its hessian separately, also in the presence
+    of interdependent components.
+    """
+    a, b, c = parameters('a, b, c')
+    x, y, z = variables('x, y, z')
+    xdata = np.linspace(0, 5, 11)
+    models = [
+        Model({y: a * exp(- (x - b)**2 / (2 * c**2))}),
+        Model({y: a**3 * x + b**2, z: y**2 + a * b * exp(c * x)}),
+        Model({y: a * x + b}),
+    ]
+    for model in models:
+        args = dict(x=xdata, a=1.2, b=2.1, c=0.8)
+        args = {name: value for name, value in args.items()
+                if name in model.__signature__.parameters}
+        fused = model.eval_fused(**args)
+        separate = (model(**args), model.eval_jacobian(**args),
+                    model.eval_hessian(**args))
+        for fused_output, output in zip(fused, separate):
+            assert isinstance(fused_output, ModelOutput)
+            assert fused_output._asdict().keys() == output._asdict().keys()
+            for fused_comp, comp in zip(fused_output, output):
+                assert fused_comp.shape == comp.shape
+                assert fused_comp == pytest.approx(comp)
+
+
 def test_ModelOutput():
     """
     Test the ModelOutput object. To prevent #267 from recurring,
@@ -446,3 +503,80 @@ def test_ModelOutput():
     assert isinstance(output._asdict(), OrderedDict)
     assert output._asdict() is not output.output_dict
     assert output._asdict() == output.output_dict
+
+
+def test_evaluation_plan():
+    """
+    Models are evaluated through a precompiled plan, which should give the
+    same results for positional and keyword calls, respect the argument names
+    of numerical components and be rebuilt when the parameters change.
+    """
+    x, y, z = variables('x, y, z')
+    a, b = parameters('a, b')
+    model = CallableNumericalModel(
+        {y: lambda b, x, a: a * x + 2 * b, z: y ** 2 + a},
+        connectivity_mapping={y: {x, a, b}}
+    )
+    assert model.ordered_symbols is model.ordered_symbols
+    xdata = np.linspace(0, 1, 5)
+    ans = model(xdata, 2.0, 3.0)
+    assert ans.y == pytest.approx(2.0 * xdata + 6.0)
+    assert ans.z == pytest.approx((2.0 * xdata + 6.0) ** 2 + 2.0)
+    ans_kwargs = model(x=xdata, b=3.0, a=2.0)
+    for comp, comp_kwargs in zip(ans, ans_kwargs):
+        assert comp == pytest.approx(comp_kwargs)
+
+    # Components which can not be called positionally are called by keyword.
+    model = CallableNumericalModel(
+        {y: lambda **kwargs: kwargs['a'] * kwargs['x']},
+        connectivity_mapping={y: {x, a}}
+    )
+    assert model(xdata, 2.0).y == pytest.approx(2.0 * xdata)
+    _, steps, _ = model._evaluation_plan
+    assert steps[0][-1] is not None
+
+    # Changing the parameters changes the signature, and thus the plan.
+    model = Model({y: a * x + b})
+    model.params = [b, a]
+    assert model(xdata, 3.0, 2.0).y == pytest.approx(2.0 * xdata + 3.0)
+    with pytest.raises(TypeError):
+        model(xdata, 3.0)
+
+
+def test_jacobian_sparsity():
+    """
+    The sparsity of the Jacobian follows from the connectivity of the model,
+    also through interdependent components, and structurally zero entries
+    are not evaluated.
+    """
+    x, y, z, w = variables('x, y, z, w')
+    a, b, c = parameters('a, b, c')
+    model = Model({y: a * x ** 2, z: b * exp(- y), w: c * x})
+    assert model.jacobian_sparsity.toarray().tolist() == [
+        [False, False, True],  # w
+        [True, False, False],  # y
+        [True, True, False],  # z
+    ]
+    assert D(w, a) not in model.jacobian_model
+    assert D(z, a) in model.jacobian_model
+
+    xdata = np.linspace(0, 1, 5)
+    dense = model.eval_jacobian(x=xdata, a=2.0, b=3.0, c=4.0)
+    sparse_jac = model.eval_sparse_jacobian(x=xdata, a=2.0, b=3.0, c=4.0)
+    for dense_comp, sparse_comp, pattern in zip(dense, sparse_jac,
+                                                model.jacobian_sparsity):
+        assert sparse_comp.shape == (3, 5)
+        assert sparse_comp.toarray() == pytest.approx(dense_comp)
+        assert sparse_comp.nnz == 5 * pattern.nnz
+    hess = model.eval_hessian(x=xdata, a=2.0, b=3.0, c=4.0)
+    assert hess.z[0, 1] == pytest.approx(np.exp(- 2 * xdata ** 2) * - xdata ** 2)
+    assert np.all(hess.w == 0)
+
+    # Numerical models take their sparsity from the connectivity_mapping.
+    numerical_model = CallableNumericalModel(
+        {y: lambda x, a: a * x, z: lambda x, b: b * x},
+        connectivity_mapping={y: {x, a}, z: {x, b}}
+    )
+    assert numerical_model.jacobian_sparsity.toarray().tolist() == [
+        [True, False], [False, True]
+    ]
@@ -11,8 +11,9 @@ from symfit import (
 )
 from symfit.core.objectives import (
     VectorLeastSquares, LeastSquares, LogLikelihood, MinimizeModel,
-    BaseIndependentObjective
+    BaseIndependentObjective, HessianObjectiveJacApprox, VariableProjection
 )
+from symfit.core.minimizers import BFGS
 from symfit.distributions import Exp
 
 # Overwrite the way Sum is printed by numpy just while testing. Is not
@@ -110,7 +111,8 @@ def test_LeastSquares():
 
     fit = Fit(chi2_exact, x=xdata, y=ydata, objective=MinimizeModel)
     fit_exact_result = fit.execute()
-    fit = Fit(model, x=xdata, y=ydata, absolute_sigma=True)
+    # Same minimizer as for MinimizeModel, such that the results are identical.
+    fit = Fit(model, x=xdata, y=ydata, absolute_sigma=True, minimizer=BFGS)
     fit_num_result = fit.execute()
     assert fit_exact_result.value(a) == fit_num_result.value(a)
     assert fit_exact_result.value(b) == fit_num_result.value(b)
@@ -262,3 +264,197 @@ def test_LogLikelihood_global():
     assert eval_numerical.shape == tuple()  # Empty tuple -> scalar
     assert jac_numerical.shape == (3,)
     assert hess_numerical.shape == (3, 3,)
+
+
+def test_eval_fused():
+    """
+    eval_fused should give the value, jacobian and hessian of an objective
+    in one go, identical to evaluating them separately.
+    """
+    x, y = variables('x, y')
+    a, b = parameters('a, b')
+    model = Model({y: a * exp(- b * x)})
+    xdata = np.linspace(0, 5, 50)
+    ydata = model(x=xdata, a=2.0, b=0.5).y + np.random.normal(0, 0.01, xdata.shape)
+
+    for objective in [LeastSquares, LogLikelihood]:
+        if issubclass(objective, LogLikelihood):
+            data = {x: xdata, y: None}
+        else:
+            data = {x: xdata, y: ydata, model.sigmas[y]: np.ones_like(ydata)}
+        obj = objective(model, data=data)
+        value, jac, hess = obj.eval_fused([1.5, 0.4])
+        assert value == pytest.approx(obj([1.5, 0.4]))
+        assert jac == pytest.approx(obj.eval_jacobian([1.5, 0.4]))
+        assert hess == pytest.approx(obj.eval_hessian([1.5, 0.4]))
+        assert jac.shape == (2,)
+        assert hess.shape == (2, 2)
+
+
+def test_chunked_hessian():
+    """
+    The hessian of LeastSquares is reduced in chunks of data points, which
+    should not change the result. Without the hessian of the model, only
+    the J^T W J term remains.
+    """
+    x, y, z = variables('x, y, z')
+    a, b, c = parameters('a, b, c')
+    model = Model({z: a * exp(- b * x) * cos(c * y)})
+    xdata, ydata = np.meshgrid(np.linspace(0, 5, 30), np.linspace(0, 1, 20),
+                               indexing='ij')
+    zdata = model(x=xdata, y=ydata, a=2.0, b=0.5, c=1.0).z
+    zdata = zdata + np.random.normal(0, 0.01, zdata.shape)
+    sigma = np.random.uniform(0.5, 1.5, zdata.shape)
+    data = {x: xdata, y: ydata, z: zdata, model.sigmas[z]: sigma}
+    p = np.array([1.5, 0.4, 0.9])
+
+    obj = LeastSquares(model, data=data)
+    func = obj.model(x=xdata, y=ydata, a=1.5, b=0.4, c=0.9).z
+    jac = np.array(obj.model.eval_jacobian(x=xdata, y=ydata, a=1.5, b=0.4, c=0.9).z)
+    hess = np.array(obj.model.eval_hessian(x=xdata, y=ydata, a=1.5, b=0.4, c=0.9).z)
+    jtwj = np.einsum('ikl,jkl->ij', jac, jac / sigma ** 2)
+    expected = jtwj - np.sum(hess * (zdata - func) / sigma ** 2, axis=(2, 3))
+    assert obj.eval_hessian(p) == pytest.approx(expected)
+    # Chunks of less than one row, and of several rows.
+    for chunk_size in [7, 45]:
+        obj.chunk_size = chunk_size
+        assert obj.eval_hessian(p) == pytest.approx(expected)
+
+    class GaussNewton(LeastSquares, HessianObjectiveJacApprox):
+        pass
+    obj = GaussNewton(model, data=data)
+    obj.chunk_size = 45
+    assert obj.eval_hessian(p) == pytest.approx(jtwj)
+
+
+def test_hoisted_data():
+    """
+    Subexpressions which only depend on the data and fixed parameters are
+    computed once per objective, without changing the outcome.
+    """
+    x, y = variables('x, y')
+    a, b = parameters('a, b')
+    w = Parameter('w', value=2.0, fixed=True)
+    model = Model({y: a * cos(w * x) + b * x ** 2 + exp(- a * x)})
+    xdata = np.linspace(0, 5, 50)
+    ydata = model(x=xdata, a=2.0, b=0.5, w=2.0).y
+    data = {x: xdata, y: ydata, model.sigmas[y]: np.ones_like(xdata)}
+
+    obj = LeastSquares(model, data=data)
+    plain_obj = LeastSquares(model, data=data)
+    plain_obj.hoisted_data.max_size = 0
+    for p in [[1.0, 1.0], [2.0, 0.5]]:
+        assert obj(p) == pytest.approx(plain_obj(p))
+        assert obj.eval_jacobian(p) == pytest.approx(plain_obj.eval_jacobian(p))
+        assert obj.eval_hessian(p) == pytest.approx(plain_obj.eval_hessian(p))
+    assert obj([2.0, 0.5]) == pytest.approx(0.0)
+    assert len(plain_obj.hoisted_data) == 0
+    # The model, its jacobian and its hessian each have their own.
+    assert len(obj.hoisted_data) == 3
+    assert obj.hoisted_data.size > 0
+    for values in obj.hoisted_data.values():
+        for value in values:
+            assert not np.asarray(value).flags.writeable
+
+    # If w is not fixed, it varies and cannot be hoisted.
+    w = Parameter('w', value=2.0)
+    model = Model({y: a * cos(w * x) + b * x ** 2 + exp(- a * x)})
+    obj = LeastSquares(model, data=data)
+    assert obj([2.0, 0.5, 2.0]) == pytest.approx(0.0)
+    assert obj([2.0, 0.5, 1.0]) > 0
+
+
+def test_model_cache():
+    """
+    Calling an objective, its jacobian and its hessian at the same parameter
+    values should evaluate the model only once for each.
+    """
+    x, y = variables('x, y')
+    a, b = parameters('a, b')
+    model = Model({y: a * x ** 2 + b})
+    xdata = np.linspace(0, 5, 50)
+    ydata = model(x=xdata, a=2.0, b=0.5).y
+
+    obj = LeastSquares(model, data={x: xdata, y: ydata,
+                                   model.sigmas[y]: np.ones_like(xdata)})
+    obj.cache_size = 2
+    assert obj.cache_hits == obj.cache_misses == 0
+
+    value = obj([1.0, 1.0])
+    assert obj.cache_misses == 1
+    jac = obj.eval_jacobian(np.array([1.0, 1.0]))
+    # Reused the model, but still had to evaluate the model jacobian.
+    assert (obj.cache_hits, obj.cache_misses) == (1, 2)
+    hess = obj.eval_hessian([1.0, 1.0])
+    assert (obj.cache_hits, obj.cache_misses) == (1, 3)
+    assert obj([1.0, 1.0]) == value
+    assert obj.eval_jacobian([1.0, 1.0]) == pytest.approx(jac)
+    assert obj.eval_hessian([1.0, 1.0]) == pytest.approx(hess)
+    assert (obj.cache_hits, obj.cache_misses) == (5, 3)
+
+    # Keyword calls are never cached.
+    assert obj(a=1.0, b=1.0) == value
+    assert (obj.cache_hits, obj.cache_misses) == (5, 3)
+
+    # The size of the cache is bounded, the least recently used is dropped.
+    obj([2.0, 0.5])
+    obj([1.0, 1.0])
+    obj([3.0, 3.0])
+    assert len(obj._model_cache) == 2
+    obj([2.0, 0.5])
+    assert (obj.cache_hits, obj.cache_misses) == (6, 6)
+    assert obj([2.0, 0.5]) == pytest.approx(0.0)
+
+    obj.clear_cache()
+    assert obj.cache_hits == obj.cache_misses == 0
+    assert len(obj._model_cache) == 0
+
+
+def test_variable_projection():
+    """
+    VariableProjection solves for the parameters which enter the model
+    linearly, such that the minimizer only sees the others. The results are
+    the same as those of LeastSquares.
+    """
+    x, y = variables('x, y')
+    a, b, c, d = parameters('a, b, c, d')
+    b.value = 1.0
+    model = Model({y: a * exp(- b * x) + c * x + d})
+    assert model.linear_params == [a, c, d]
+    assert Model({y: a * b * x + c}).linear_params == [a, c]
+
+    np.random.seed(0)
+    xdata = np.linspace(0, 5, 100)
+    ydata = model(x=xdata, a=3.0, b=1.3, c=0.5, d=1.0).y
+    ydata += np.random.normal(0, 0.05, xdata.shape)
+    data = {x: xdata, y: ydata, model.sigmas[y]: np.ones_like(xdata)}
+
+    obj = VariableProjection(model, data=data)
+    assert obj.projected_params == [a, c, d]
+    assert obj.nonlinear_params == [b]
+    # The jacobian and hessian are those of the projected objective.
+    eps = 1e-5
+    values = [obj([1.2 + step]) for step in [-eps, 0, eps]]
+    assert obj.eval_jacobian([1.2]) == pytest.approx(
+        (values[2] - values[0]) / (2 * eps), rel=1e-5
+    )
+    assert obj.eval_hessian([1.2]) == pytest.approx(
+        (values[2] - 2 * values[1] + values[0]) / eps ** 2, rel=1e-4
+    )
+    # With all parameters given, it is just least squares.
+    least_squares = LeastSquares(model, data=data)
+    assert obj(a=2, b=1, c=3, d=4) == least_squares(a=2, b=1, c=3, d=4)
+
+    fit = Fit(model, x=xdata, y=ydata, objective=VariableProjection,
+              minimizer=BFGS)
+    assert fit.minimizer.params == [b]
+    fit_result = fit.execute()
+    ref_fit = Fit(model, x=xdata, y=ydata, minimizer=BFGS)
+    ref_result = ref_fit.execute()
+    for param in model.params:
+        assert fit_result.value(param) == pytest.approx(ref_result.value(param))
+        assert fit_result.stdev(param) == pytest.approx(ref_result.stdev(param),
+                                                        rel=1e-4)
+    assert fit_result.r_squared == pytest.approx(ref_result.r_squared)
+    assert (fit_result.minimizer_output['nfev'] <
+            ref_result.minimizer_output['nfev'])
@@ -1,4 +1,7 @@
 from __future__ import division, print_function
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import pickle
+
 import pytest
 
 import numpy as np
@@ -252,3 +255,216 @@ def test_initial_parameters():
     assert ode_model.params == [a0, c0, k, l, m, p]
     assert ode_model.initial_params == [a0, c0]
     assert ode_model.model_params == [a0, k, l, m, p]
+
+
+def test_parallel_jacobian():
+    """
+    The integrations needed for the jacobian of an ODEModel can be performed
+    by an executor, with results identical to the serial computation.
+    """
+    t, x, v = variables('t, x, v')
+    k, c, x0 = parameters('k, c, x0')
+    model = ODEModel({D(v, t): - k * x - c * v, D(x, t): v},
+                     initial={t: 0, x: x0, v: 0})
+    tdata = np.linspace(0, 10, 100)
+    serial = model.eval_jacobian(t=tdata, k=3.0, c=0.1, x0=1.0)
+
+    with ProcessPoolExecutor(2) as executor:
+        passed = model.eval_jacobian(t=tdata, k=3.0, c=0.1, x0=1.0,
+                                     executor=executor, n_workers=3)
+        model.executor = executor
+        processed = model.eval_jacobian(t=tdata, k=3.0, c=0.1, x0=1.0)
+        # The model can still be pickled with an executor set.
+        model_copy = pickle.loads(pickle.dumps(model))
+        assert model_copy.executor is None
+    for result in [passed, processed]:
+        for serial_comp, comp in zip(serial, result):
+            assert np.array_equal(serial_comp, comp)
+
+    # odeint is not thread safe.
+    with ThreadPoolExecutor(2) as executor:
+        with pytest.raises(TypeError):
+            model.eval_jacobian(t=tdata, k=3.0, c=0.1, x0=1.0,
+                                executor=executor)
+
+    # Copies made by pickling in the same process share the compiled
+    # components.
+    model_copy(t=tdata, k=3.0, c=0.1, x0=1.0)
+    second_copy = pickle.loads(pickle.dumps(model))
+    assert second_copy._nsystem is model_copy._nsystem
+
+
+def test_sensitivities():
+    """
+    With sensitivities=True, the jacobian of an ODEModel is obtained from the
+    forward sensitivity equations, also for parameters in the initial values.
+    """
+    y, t = variables('y, t')
+    p, y0 = parameters('p, y0')
+    model = ODEModel({D(y, t): - p * y}, initial={t: 0, y: y0},
+                     sensitivities=True)
+    tdata = np.linspace(-1, 5, 50)
+    jac = model.eval_jacobian(t=tdata, p=0.7, y0=2.0)
+    assert jac.y.shape == (2, 50)
+    # Known solution: y = y0 * exp(- p * t)
+    exact = [- tdata * 2.0 * np.exp(- 0.7 * tdata), np.exp(- 0.7 * tdata)]
+    assert jac.y == pytest.approx(np.array(exact), rel=1e-5, abs=1e-6)
+    # Also works for a single point
+    jac = model.eval_jacobian(t=1.0, p=0.7, y0=2.0)
+    assert jac.y[:, 0] == pytest.approx([-2.0 * np.exp(-0.7), np.exp(-0.7)],
+                                        rel=1e-5)
+
+    # Fitting gives the same result with either jacobian.
+    ydata = 2.0 * np.exp(- 0.7 * tdata)
+    fd_model = ODEModel({D(y, t): - p * y}, initial={t: 0, y: y0})
+    p.value, y0.value = 1.0, 1.0
+    sens_result = Fit(model, t=tdata, y=ydata).execute()
+    fd_result = Fit(fd_model, t=tdata, y=ydata).execute()
+    assert sens_result.value(p) == pytest.approx(0.7, rel=1e-4)
+    assert sens_result.value(y0) == pytest.approx(2.0, rel=1e-4)
+    assert sens_result.value(p) == pytest.approx(fd_result.value(p), rel=1e-4)
+    assert sens_result.value(y0) == pytest.approx(fd_result.value(y0), rel=1e-4)
+
+
+@pytest.mark.parametrize('integrator', ['LSODA', 'BDF', 'Radau', 'RK45'])
+def test_solve_ivp(integrator):
+    """
+    ODEModels can be integrated with solve_ivp, whose dense solution is
+    reused when the model is evaluated at other points for the same
+    parameters.
+    """
+    t, x, v = variables('t, x, v')
+    k, c, x0 = parameters('k, c, x0')
+    model_dict = {D(v, t): - k * x - c * v, D(x, t): v}
+    initial = {t: 0, x: x0, v: 0}
+    tdata = np.linspace(-2, 10, 200)
+    odeint_model = ODEModel(model_dict, initial=initial)
+    model = ODEModel(model_dict, initial=initial, integrator=integrator,
+                     rtol=1e-8, atol=1e-10)
+
+    expected = odeint_model(t=tdata, k=3.0, c=0.1, x0=1.3)
+    ans = model(t=tdata, k=3.0, c=0.1, x0=1.3)
+    for comp, expected_comp in zip(ans, expected):
+        assert comp == pytest.approx(expected_comp, abs=1e-5)
+    assert len(model._solution_cache) == 1
+    solutions = dict(list(model._solution_cache.values())[0])
+
+    # Evaluating within the integrated range only interpolates.
+    subset = model(t=tdata[50:100:3], k=3.0, c=0.1, x0=1.3)
+    assert subset.x == pytest.approx(ans.x[50:100:3])
+    assert list(model._solution_cache.values())[0] == solutions
+    # Outside the integrated range the solution is extended.
+    model(t=[-1, 12], k=3.0, c=0.1, x0=1.3)
+    new_solutions = list(model._solution_cache.values())[0]
+    assert new_solutions[-1] is solutions[-1]
+    assert new_solutions[1] is not solutions[1]
+    # Unsorted times and the initial value itself are supported.
+    unsorted = model(t=[5, 0, -1], k=3.0, c=0.1, x0=1.3)
+    assert unsorted.x[1] == 1.3
+    assert unsorted.x[0] == pytest.approx(ans.x[np.argmin(abs(tdata - 5))],
+                                          abs=0.1)
+
+    # Other parameters are integrated separately
+    other = model(t=tdata, k=2.0, c=0.1, x0=1.3)
+    assert len(model._solution_cache) == 2
+    assert not other.x == pytest.approx(ans.x)
+    # And so is another initial value of the independent variable.
+    model.initial = {t: 1, x: x0, v: 0}
+    shifted = model(t=tdata + 1, k=3.0, c=0.1, x0=1.3)
+    assert len(model._solution_cache) == 3
+    assert shifted.x == pytest.approx(ans.x, abs=1e-5)
+    model.initial = initial
+    with pytest.raises(TypeError):
+        ODEModel(model_dict, initial, (), integrator=integrator)
+
+    # Sensitivities work with any integrator.
+    sens_model = ODEModel(model_dict, initial=initial, integrator=integrator,
+                          sensitivities=True, rtol=1e-8, atol=1e-10)
+    odeint_sens_model = ODEModel(model_dict, initial=initial,
+                                 sensitivities=True, rtol=1e-8, atol=1e-10)
+    jac = sens_model.eval_jacobian(t=tdata, k=3.0, c=0.1, x0=1.3)
+    expected_jac = odeint_sens_model.eval_jacobian(t=tdata, k=3.0, c=0.1,
+                                                   x0=1.3)
+    for comp, expected_comp in zip(jac, expected_jac):
+        assert comp == pytest.approx(expected_comp, abs=1e-5)
+
+
+def test_solve_ivp_sparse_jacobian():
+    """
+    For stiff solvers, a sparse jacobian of the components is passed as a
+    sparse matrix.
+    """
+    t = variables('t')[0]
+    ys = variables(', '.join('y{}'.format(i) for i in range(8)))
+    k = parameters('k')[0]
+    model_dict = {D(ys[0], t): - k * ys[0]}
+    for y_prev, y in zip(ys[:-1], ys[1:]):
+        model_dict[D(y, t)] = k * y_prev - k * y
+    initial = {y: 0.0 for y in ys}
+    initial.update({t: 0.0, ys[0]: 1.0})
+
+    tdata = np.linspace(0, 5, 20)
+    model = ODEModel(model_dict, initial=initial, integrator='BDF',
+                     rtol=1e-8, atol=1e-10)
+    assert model._sparse_jacobian
+    ans = model(t=tdata, k=2.0)
+    expected = ODEModel(model_dict, initial=initial)(t=tdata, k=2.0)
+    for comp, expected_comp in zip(ans, expected):
+        assert comp == pytest.approx(expected_comp, abs=1e-6)
+
+
+@pytest.mark.parametrize('integrator', ['odeint', 'BDF', 'LSODA'])
+def test_batched_experiments(integrator):
+    """
+    A list of initial conditions fits all experiments at once with shared
+    parameters. Stacked integration, integration per experiment and
+    integration using an executor should all agree.
+    """
+    t, y = variables('t, y')
+    k, y0 = parameters('k, y0')
+    tdata = np.linspace(0, 3, 20)
+    initial = [{t: 0.0, y: 1.0}, {t: 0.0, y: 2.0}, {t: 0.0, y: y0}]
+    model = ODEModel({D(y, t): - k * y ** 2}, initial=initial,
+                     integrator=integrator, rtol=1e-10, atol=1e-10)
+    assert model.batched
+    assert set(model.initial_params) == {y0}
+
+    ans = model(t=tdata, k=0.7, y0=3.0)
+    assert ans.y.shape == (3, 20)
+    for y_init, y_ans in zip([1.0, 2.0, 3.0], ans.y):
+        assert y_ans == pytest.approx(y_init / (1 + 0.7 * y_init * tdata))
+
+    # Different starting points are integrated per experiment
+    shifted = [{t: 0.0, y: 1.0}, {t: 0.0, y: 2.0}, {t: 1.0, y: 0.5}]
+    shifted_model = ODEModel({D(y, t): - k * y ** 2}, initial=shifted,
+                             integrator=integrator, rtol=1e-10, atol=1e-10)
+    shifted_ans = shifted_model(t=tdata, k=0.7)
+    assert shifted_ans.y[:2] == pytest.approx(ans.y[:2])
+    assert shifted_ans.y[2] == pytest.approx(0.5 / (1 + 0.7 * 0.5 * (tdata - 1)))
+
+    model.executor = ProcessPoolExecutor(2)
+    assert model(t=tdata, k=0.7, y0=3.0).y == pytest.approx(ans.y)
+    model.executor.shutdown()
+    # Only odeint and LSODA are not thread safe.
+    model.executor = ThreadPoolExecutor(2)
+    if integrator == 'BDF':
+        assert model(t=tdata, k=0.7, y0=3.0).y == pytest.approx(ans.y)
+    else:
+        with pytest.raises(TypeError):
+            model(t=tdata, k=0.7, y0=3.0)
+    model.executor.shutdown()
+    model.executor = None
+
+    fit = Fit(model, t=tdata, y=ans.y)
+    fit_result = fit.execute()
+    assert fit_result.value(k) == pytest.approx(0.7, 1e-4)
+    assert fit_result.value(y0) == pytest.approx(3.0, 1e-4)
+
+    sens_model = ODEModel({D(y, t): - k * y ** 2}, initial=initial,
+                          integrator=integrator, sensitivities=True,
+                          rtol=1e-10, atol=1e-10)
+    jac = sens_model.eval_jacobian(t=tdata, k=0.7, y0=3.0)[0]
+    assert jac.shape == (2, 3, 20)
+    # Only the last experiment depends on y0
+    assert jac[1, :2] == pytest.approx(0)
+    assert jac[1, 2] == pytest.approx(1 / (1 + 0.7 * 3.0 * tdata) ** 2)